@@ -3,6 +3,7 @@ from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth import get_user_model
 from api.models import UserProfile, Task, Category, Status, Priority, Position, \
     TaskGroup
+from api import services
 
 user = get_user_model()
 
@@ -24,9 +25,20 @@ class CustomUserAdmin(BaseUserAdmin):
     ordering = ('email',)
 
 
+class TaskAdmin(admin.ModelAdmin):
+    def save_model(self, request, obj, form, change):
+        """Creates new tasks with their task group (see
+        services.create_task)."""
+
+        if change:
+            return super().save_model(request, obj, form, change)
+
+        services.create_task(obj)
+
+
 admin.site.register(user, CustomUserAdmin)
 admin.site.register(UserProfile)
-admin.site.register(Task)
+admin.site.register(Task, TaskAdmin)
 admin.site.register(TaskGroup)
 admin.site.register(Priority)
 admin.site.register(Status)
@@ -0,0 +1,164 @@
+import hashlib
+import pickle
+import time
+from collections import OrderedDict
+from threading import Lock
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication that serves the token lookups from a two-level
+    cache instead of querying the Token and User tables on every request.
+
+    1. An in-process LRU with a short TTL (local_timeout). Entries of other
+       processes can't be invalidated, so the TTL bounds how long a
+       revoked token keeps working on them.
+    2. The Django cache (cache_timeout), invalidated explicitly by the
+       signal handlers in api/signals.py whenever the token is deleted or
+       regenerated, or its user, profile or position changes. It has to be
+       shared by all processes (see settings.CACHES), otherwise the other
+       processes keep serving a revoked token for the cache_timeout.
+
+    On a miss the token is fetched together with its user, profile and
+    position in one query, so the permission checks don't query them
+    again.
+
+    Example:
+    ```python
+    class TaskView(ModelViewSet):
+        authentication_classes = [CachedTokenAuthentication]
+    ```
+    """
+
+    cache_prefix = 'auth-token'
+    cache_timeout = 300
+    local_timeout = 5
+    local_max_size = 1024
+
+    # Shared by all instances of the process: cache key -> (expires, data)
+    _local_cache = OrderedDict()
+    _local_lock = Lock()
+
+    def authenticate_credentials(self, key):
+        cache_key = self.get_cache_key(key)
+        token = self.get_cached_token(cache_key)
+
+        if token is None:
+            model = self.get_model()
+
+            try:
+                token = model.objects.select_related(
+                    'user__profile__position'
+                ).get(key=key)
+            except model.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+            self.cache_token(cache_key, token)
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.')
+            )
+
+        return (token.user, token)
+
+    @classmethod
+    def get_cache_key(cls, key):
+        """
+        Returns the cache key of a token. The token itself is hashed so it
+        doesn't show up in the shared cache.
+        """
+
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return f'{cls.cache_prefix}:{digest}'
+
+    @classmethod
+    def get_cached_token(cls, cache_key):
+        """
+        Returns a fresh copy of the cached token (with user, profile and
+        position) or None.
+        """
+
+        with cls._local_lock:
+            entry = cls._local_cache.get(cache_key)
+
+            if entry is not None and entry[0] > time.monotonic():
+                cls._local_cache.move_to_end(cache_key)
+                data = entry[1]
+            else:
+                cls._local_cache.pop(cache_key, None)
+                data = None
+
+        if data is None:
+            data = cache.get(cache_key)
+
+            if data is None:
+                return None
+
+            cls.store_local(cache_key, data)
+
+        # Every request gets its own instances, so changes made to
+        # request.user never leak into other requests.
+        return pickle.loads(data)
+
+    @classmethod
+    def cache_token(cls, cache_key, token):
+        data = pickle.dumps(token, pickle.HIGHEST_PROTOCOL)
+
+        cache.set(cache_key, data, cls.cache_timeout)
+        cls.store_local(cache_key, data)
+
+    @classmethod
+    def store_local(cls, cache_key, data):
+        with cls._local_lock:
+            cls._local_cache[cache_key] = (
+                time.monotonic() + cls.local_timeout, data
+            )
+            cls._local_cache.move_to_end(cache_key)
+
+            while len(cls._local_cache) > cls.local_max_size:
+                cls._local_cache.popitem(last=False)
+
+    @classmethod
+    def invalidate(cls, *keys):
+        """
+        Removes the tokens from the shared cache and the cache of this
+        process.
+
+        Inside a transaction the tokens are removed again on commit, so no
+        request that ran in parallel keeps a token it cached before the
+        commit.
+
+        Example:
+        ```python
+        CachedTokenAuthentication.invalidate(token.key)
+        ```
+        """
+
+        cache_keys = [cls.get_cache_key(key) for key in keys]
+        if not cache_keys:
+            return
+
+        def remove():
+            cache.delete_many(cache_keys)
+
+            with cls._local_lock:
+                for cache_key in cache_keys:
+                    cls._local_cache.pop(cache_key, None)
+
+        remove()
+
+        if transaction.get_connection().in_atomic_block:
+            transaction.on_commit(remove)
+
+    @classmethod
+    def clear_local_cache(cls):
+        """Empties the cache of this process."""
+
+        with cls._local_lock:
+            cls._local_cache.clear()
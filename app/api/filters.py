@@ -0,0 +1,155 @@
+from functools import reduce
+from operator import add
+from django.contrib.postgres.search import SearchQuery, SearchRank, \
+    TrigramWordSimilarity
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import Cast, Greatest
+from rest_framework.filters import SearchFilter
+from rest_framework.settings import api_settings
+
+# Text search configuration of the task search vectors, must match the
+# trigger of migration 0008_task_search_vector
+SEARCH_CONFIG = 'english'
+
+# Largest id a numeric search is compared with (bigint)
+MAX_ID = 2 ** 63 - 1
+
+# Largest number a numeric search is compared with (integer fields)
+MAX_INTEGER = 2 ** 31 - 1
+
+
+class TaskSearchFilter(SearchFilter):
+    """
+    Full text search of the tasks (?search=) over the stored search vector
+    of their title and description (see Task.search_vector), which is
+    backed by a GIN index instead of ILIKE scans. Accepts the web search
+    syntax ("quoted phrases", or, -excluded words). A number also matches
+    the task with that id.
+
+    Results are annotated with their search_rank (title matches weigh more
+    than description matches) and ordered by it, best first, unless the
+    request asks for another ordering (?ordering=). The KeysetPagination
+    picks the rank up through get_ordering.
+
+    Example:
+    ```python
+    class TaskView(ModelViewSet):
+        filter_backends = [TaskSearchFilter, OrderingFilter]
+    ```
+    """
+
+    rank_field = 'search_rank'
+    search_description = 'Full text search of the title and description.'
+
+    def get_search_query(self, request):
+        """Returns the search string of the request."""
+
+        search = request.query_params.get(self.search_param, '')
+        return search.replace('\x00', '').strip()
+
+    def filter_queryset(self, request, queryset, view):
+        search = self.get_search_query(request)
+
+        if not search:
+            return queryset
+
+        query = SearchQuery(
+            search,
+            config=SEARCH_CONFIG,
+            search_type='websearch'
+        )
+        condition = Q(search_vector=query)
+
+        if search.isdigit() and int(search) <= MAX_ID:
+            condition |= Q(id=int(search))
+
+        # ts_rank is a real, which is read back rounded. As double precision
+        # the rank survives the round trip through the pagination cursor.
+        rank = Cast(SearchRank(F('search_vector'), query), FloatField())
+
+        return queryset.filter(condition).annotate(**{self.rank_field: rank})
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Returns the ordering by rank for searches without an explicit
+        ordering, otherwise None.
+        """
+
+        if request.query_params.get(api_settings.ORDERING_PARAM):
+            return None
+
+        if not self.get_search_query(request):
+            return None
+
+        return [f'-{self.rank_field}']
+
+
+class TrigramSearchFilter(SearchFilter):
+    """
+    Search (?search=) over the text fields in the search_fields of the view
+    whose pg_trgm indexes find the candidate rows instead of sequential
+    scans. The candidates are still read from the table, to recheck the
+    match and to rank them. Every search term must be contained in one of
+    the fields (case insensitive). Numeric terms also match the
+    search_exact_fields of the view (e.g. a phone number) by equality.
+
+    Results are ordered by their trigram word similarity to the search
+    terms, best first. An ordering query param (OrderingFilter) replaces
+    that order.
+
+    Example:
+    ```python
+    class UserProfileView(ModelViewSet):
+        filter_backends = [TrigramSearchFilter, OrderingFilter]
+        search_fields = ['first_name', 'last_name', 'email']
+        search_exact_fields = ['phone_number']
+    ```
+    """
+
+    rank_field = 'search_rank'
+
+    def filter_queryset(self, request, queryset, view):
+        fields = self.get_search_fields(view, request)
+        terms = self.get_search_terms(request)
+
+        if not fields or not terms:
+            return queryset
+
+        return self.search(
+            queryset,
+            fields,
+            terms,
+            getattr(view, 'search_exact_fields', [])
+        )
+
+    def search(self, queryset, fields, terms, exact_fields=()):
+        """
+        Returns the rows of the queryset that contain all the terms in one
+        of the fields, annotated with their search_rank and ordered by it.
+        """
+
+        ranks = []
+
+        for term in terms:
+            condition = Q()
+
+            for field in fields:
+                condition |= Q(**{f'{field}__icontains': term})
+
+            if term.isdigit() and int(term) <= MAX_INTEGER:
+                for field in exact_fields:
+                    condition |= Q(**{field: int(term)})
+
+            queryset = queryset.filter(condition)
+
+            similarities = [
+                TrigramWordSimilarity(term, field) for field in fields
+            ]
+            ranks.append(
+                Greatest(*similarities) if len(similarities) > 1
+                else similarities[0]
+            )
+
+        return queryset.annotate(
+            **{self.rank_field: reduce(add, ranks)}
+        ).order_by(f'-{self.rank_field}', 'pk')
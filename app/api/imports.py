@@ -0,0 +1,479 @@
+import csv
+import io
+import json
+import time
+from collections import Counter, namedtuple
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from api import models, renderers, services
+
+# Columns of an imported task, the slug columns are resolved like the
+# fields of the TaskSerializer (category name, priority and status caption,
+# owner email). Other columns (e.g. the id of an export) are ignored.
+COLUMNS = [
+    'title', 'description', 'due_date', 'completed_at', 'category',
+    'priority', 'status', 'owner'
+]
+
+FORMATS = ['csv', 'json', 'ndjson']
+
+# Number of errors after which the rows aren't checked any further
+MAX_ERRORS = 100
+
+# Temporary table the rows are copied into, dropped with the transaction
+STAGING_TABLE = 'api_task_import'
+
+ImportResult = namedtuple(
+    'ImportResult', ['imported', 'errors', 'seconds', 'rows_per_second']
+)
+
+
+def get_format(file_name):
+    """Returns the format of a file name by its extension, if known."""
+
+    extension = file_name.rsplit('.', 1)[-1].lower()
+    return extension if extension in FORMATS else None
+
+
+def read_rows(file, format):
+    """
+    Yields the rows (dicts) of a binary file with tasks as CSV (with a
+    header line), a JSON array or newline delimited JSON.
+
+    Example:
+    ```python
+    with open('tasks.csv', 'rb') as file:
+        result = import_tasks(read_rows(file, 'csv'))
+    ```
+    """
+
+    if format not in FORMATS:
+        raise ValueError(f'Unknown format {format!r}')
+
+    text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+
+    try:
+        if format == 'csv':
+            yield from csv.DictReader(text)
+
+        elif format == 'json':
+            yield from json.load(text)
+
+        else:
+            for line in text:
+                if line.strip():
+                    yield json.loads(line)
+    finally:
+        # The caller closes the file
+        text.detach()
+
+
+class CopyFile:
+    """
+    File-like object that COPY ... FROM STDIN reads the CSV lines of the
+    rows from, one line at a time. An error raised by the lines (e.g. a
+    malformed file) is kept in error, COPY only reports that read failed.
+    """
+
+    def __init__(self, lines):
+        self.lines = iter(lines)
+        self.buffer = b''
+        self.error = None
+
+    def read(self, size=-1):
+        while size < 0 or len(self.buffer) < size:
+            try:
+                line = next(self.lines, None)
+            except Exception as error:
+                self.error = error
+                raise
+
+            if line is None:
+                break
+            self.buffer += line.encode()
+
+        if size < 0:
+            size = len(self.buffer)
+
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+
+def get_copy_lines(rows, errors):
+    """
+    Yields the CSV lines of the staging table for the rows. Adds the
+    errors of invalid rows ({line: [message, ...]}) to errors, with the
+    line of the first row being 1.
+    """
+
+    # Empty (quoted) fields are copied as NULL (FORCE_NULL)
+    writer = csv.writer(
+        renderers.CSVRenderer.Line(),
+        quoting=csv.QUOTE_ALL,
+        lineterminator='\n'
+    )
+
+    for line, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            errors[line] = ['Expected an object with the task fields.']
+            continue
+
+        values = {
+            column: str(row.get(column) or '').strip() for column in COLUMNS
+        }
+        messages = []
+
+        if not values['title']:
+            messages.append('The title is required.')
+        elif len(values['title']) > models.Task._meta.get_field(
+                'title').max_length:
+            messages.append('The title is too long.')
+
+        if values['due_date']:
+            due_date = parse_date(values['due_date'])
+
+            if due_date is None:
+                messages.append(f'Invalid due_date {values["due_date"]!r}.')
+            else:
+                values['due_date'] = due_date.isoformat()
+
+        if values['completed_at']:
+            completed_at = parse_datetime(values['completed_at'])
+
+            if completed_at is None:
+                messages.append(
+                    f'Invalid completed_at {values["completed_at"]!r}.'
+                )
+            else:
+                if timezone.is_naive(completed_at):
+                    completed_at = timezone.make_aware(completed_at)
+
+                values['completed_at'] = completed_at.isoformat()
+
+        if messages:
+            errors[line] = messages
+
+        # Nothing is imported after an invalid row, the remaining rows are
+        # only validated
+        if errors:
+            if len(errors) >= MAX_ERRORS:
+                return
+            continue
+
+        yield writer.writerow([line, *(values[column] for column in COLUMNS)])
+
+
+def import_tasks(rows, default_owner=None):
+    """
+    Creates the tasks of the rows (dicts with the COLUMNS) in one
+    transaction, for loading large numbers of tasks at once.
+
+    The rows are streamed into a temporary staging table with COPY. The
+    slugs of all rows are resolved with one UPDATE per lookup table and
+    the tasks, their task groups, team members (the owner) and suggested
+    positions are inserted with one INSERT ... SELECT per table. The tasks
+    are added to the TaskStatsDaily rollup and their reminders scheduled
+    with one statement each. Unlike the create action, due
+    dates in the past are accepted (legacy tasks).
+
+    Either all rows are imported or none. Rows without owner get the
+    default_owner (a UserProfile), rows without status 'In Progress'. A
+    malformed file raises the error of read_rows (ValueError or
+    csv.Error).
+
+    Returns an ImportResult with the number of imported tasks, the errors
+    ({line: [message, ...]}, nothing is imported if there are any), the
+    duration and the throughput in rows per second.
+
+    Example:
+    ```python
+    result = import_tasks(read_rows(file, 'csv'))
+    print(f'{result.rows_per_second:.0f} rows/s')
+    ```
+    """
+
+    started = time.monotonic()
+    errors = {}
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        create_staging_table(cursor)
+        copy_file = CopyFile(get_copy_lines(rows, errors))
+
+        try:
+            cursor.copy_expert(
+                f'COPY {STAGING_TABLE} (line, {", ".join(COLUMNS)}) '
+                f'FROM STDIN WITH (FORMAT csv, '
+                f'FORCE_NULL ({", ".join(COLUMNS)}))',
+                copy_file
+            )
+        # psycopg2 errors of COPY aren't wrapped into Django's errors
+        except Exception:
+            if copy_file.error is not None:
+                raise copy_file.error from None
+            raise
+
+        if not errors:
+            resolve_slugs(cursor, default_owner)
+            errors = get_slug_errors(cursor)
+
+        if errors:
+            transaction.set_rollback(True)
+            imported = 0
+        else:
+            imported = insert_tasks(cursor)
+
+            # Inside an outer transaction the table would outlive the import
+            cursor.execute(f'DROP TABLE {STAGING_TABLE}')
+
+    seconds = time.monotonic() - started
+
+    return ImportResult(
+        imported=imported,
+        errors=errors,
+        seconds=seconds,
+        rows_per_second=imported / seconds if seconds else 0
+    )
+
+
+def create_staging_table(cursor):
+    """Creates the staging table of the rows for the transaction."""
+
+    cursor.execute(
+        f'''
+        CREATE TEMPORARY TABLE {STAGING_TABLE} (
+            line integer PRIMARY KEY,
+            title text NOT NULL,
+            description text,
+            due_date date,
+            completed_at timestamptz,
+            category text,
+            priority text,
+            status text,
+            owner text,
+            category_id bigint,
+            priority_id bigint,
+            status_id bigint,
+            owner_id bigint,
+            task_id bigint,
+            task_group_id bigint
+        ) ON COMMIT DROP
+        '''
+    )
+
+
+def resolve_slugs(cursor, default_owner=None):
+    """
+    Sets the ids of the lookups and owners of the staged rows. Slugs
+    shared by several rows resolve to the first of them (by id).
+    """
+
+    lookups = [
+        ('category_id', 'category', models.Category, 'name'),
+        ('priority_id', 'priority', models.Priority, 'caption'),
+        ('status_id', 'status', models.Status, 'caption'),
+        ('owner_id', 'owner', models.UserProfile, 'email'),
+    ]
+
+    for id_column, slug_column, model, slug_field in lookups:
+        cursor.execute(
+            f'''
+            UPDATE {STAGING_TABLE} AS staged
+            SET {id_column} = slugs.id
+            FROM (
+                SELECT {slug_field} AS slug, MIN(id) AS id
+                FROM {model._meta.db_table}
+                GROUP BY {slug_field}
+            ) AS slugs
+            WHERE slugs.slug = staged.{slug_column}
+            '''
+        )
+
+    cursor.execute(
+        f'''
+        UPDATE {STAGING_TABLE}
+        SET status_id = %s
+        WHERE status IS NULL
+        ''',
+        [services.get_status('In Progress').id]
+    )
+
+    if default_owner is not None:
+        cursor.execute(
+            f'''
+            UPDATE {STAGING_TABLE}
+            SET owner_id = %s
+            WHERE owner IS NULL
+            ''',
+            [default_owner.id]
+        )
+
+
+def get_slug_errors(cursor):
+    """Returns the errors of the staged rows with unknown slugs."""
+
+    errors = {}
+
+    cursor.execute(
+        f'''
+        SELECT line, category, priority, status, owner,
+            category IS NOT NULL AND category_id IS NULL,
+            priority IS NOT NULL AND priority_id IS NULL,
+            status IS NOT NULL AND status_id IS NULL,
+            owner IS NOT NULL AND owner_id IS NULL
+        FROM {STAGING_TABLE}
+        WHERE category IS NOT NULL AND category_id IS NULL
+            OR priority IS NOT NULL AND priority_id IS NULL
+            OR status IS NOT NULL AND status_id IS NULL
+            OR owner IS NOT NULL AND owner_id IS NULL
+        ORDER BY line
+        LIMIT %s
+        ''',
+        [MAX_ERRORS]
+    )
+
+    for line, *values in cursor.fetchall():
+        slugs, unknown = values[:4], values[4:]
+        errors[line] = [
+            f'Unknown {column} {slug!r}.'
+            for column, slug, missing in zip(
+                ['category', 'priority', 'status', 'owner'], slugs, unknown
+            )
+            if missing
+        ]
+
+    return errors
+
+
+def insert_tasks(cursor):
+    """
+    Inserts the staged rows as tasks with their task groups and returns
+    the number of tasks.
+    """
+
+    now = timezone.now()
+    task_table = models.Task._meta.db_table
+    task_group_table = models.TaskGroup._meta.db_table
+    TeamMember = models.TaskGroup.team_members.through
+    SuggestedPosition = models.TaskGroup.suggested_positions.through
+
+    # The ids are drawn up front, so the rows of all tables are linked
+    # without reading the inserted rows back
+    cursor.execute(
+        "SELECT pg_get_serial_sequence(%s, 'id'), "
+        "pg_get_serial_sequence(%s, 'id')",
+        [task_table, task_group_table]
+    )
+    cursor.execute(
+        f'''
+        UPDATE {STAGING_TABLE}
+        SET task_id = nextval(%s::regclass),
+            task_group_id = nextval(%s::regclass)
+        ''',
+        cursor.fetchone()
+    )
+
+    cursor.execute(
+        f'''
+        INSERT INTO {task_group_table} (id, name, updated_at)
+        SELECT task_group_id, LEFT('TaskGroup of ' || title, %s), %s
+        FROM {STAGING_TABLE}
+        ORDER BY line
+        ''',
+        [models.TaskGroup._meta.get_field('name').max_length, now]
+    )
+
+    cursor.execute(
+        f'''
+        INSERT INTO {TeamMember._meta.db_table} (taskgroup_id, userprofile_id)
+        SELECT task_group_id, owner_id
+        FROM {STAGING_TABLE}
+        WHERE owner_id IS NOT NULL
+        '''
+    )
+
+    # The first positions (by id) of the category, see
+    # services.get_suggested_positions
+    cursor.execute(
+        f'''
+        INSERT INTO {SuggestedPosition._meta.db_table}
+            (taskgroup_id, position_id)
+        SELECT staged.task_group_id, positions.id
+        FROM {STAGING_TABLE} AS staged
+        JOIN (
+            SELECT id, category_id, ROW_NUMBER() OVER (
+                PARTITION BY category_id ORDER BY id
+            ) AS row_number
+            FROM {models.Position._meta.db_table}
+        ) AS positions
+            ON positions.category_id = staged.category_id
+            AND positions.row_number <= %s
+        ''',
+        [services.SUGGESTED_POSITIONS]
+    )
+
+    cursor.execute(
+        f'''
+        INSERT INTO {task_table}
+            (id, title, description, due_date, category_id, priority_id,
+             status_id, owner_id, task_group_id, created_at, completed_at,
+             updated_at)
+        SELECT task_id, title, COALESCE(description, ''), due_date,
+            category_id, priority_id, status_id, owner_id, task_group_id,
+            %s, completed_at, %s
+        FROM {STAGING_TABLE}
+        ORDER BY line
+        ''',
+        [now, now]
+    )
+    imported = cursor.rowcount
+
+    # Same rows as TaskStatsDaily.objects.get_key
+    cursor.execute(
+        f'''
+        SELECT owner_id,
+            (COALESCE(completed_at, %s) AT TIME ZONE %s)::date,
+            status_id,
+            COUNT(*)
+        FROM {STAGING_TABLE}
+        WHERE owner_id IS NOT NULL AND status_id IS NOT NULL
+        GROUP BY 1, 2, 3
+        ''',
+        [now, timezone.get_current_timezone_name()]
+    )
+    models.TaskStatsDaily.objects.apply_deltas(Counter({
+        (owner_id, day, status_id): count
+        for owner_id, day, status_id, count in cursor.fetchall()
+    }))
+
+    # Same reminders as Reminder.objects.get_reminders: the due date ends
+    # at midnight (in the current time zone) after the due date
+    kinds = ', '.join(['(%s, %s::interval)'] * len(models.REMINDER_OFFSETS))
+    cursor.execute(
+        f'''
+        INSERT INTO {models.Reminder._meta.db_table} (task_id, kind, fire_at)
+        SELECT task_id, kind, fire_at
+        FROM (
+            SELECT staged.task_id, kinds.kind,
+                ((staged.due_date + 1)::timestamp AT TIME ZONE %s)
+                    - kinds.offset_interval AS fire_at
+            FROM {STAGING_TABLE} AS staged
+            CROSS JOIN (VALUES {kinds}) AS kinds (kind, offset_interval)
+            WHERE staged.due_date IS NOT NULL
+                AND staged.status_id <> ALL(%s)
+        ) AS reminders
+        WHERE fire_at > %s
+        ''',
+        [
+            timezone.get_current_timezone_name(),
+            *(
+                value
+                for kind, offset in models.REMINDER_OFFSETS.items()
+                for value in (kind, offset)
+            ),
+            list(models.Reminder.objects.get_inactive_status_ids()),
+            now
+        ]
+    )
+
+    return imported
@@ -0,0 +1,188 @@
+import copy
+import time
+from threading import Lock
+from django.core.cache import cache
+from django.db import transaction
+
+# Lookup tables are tiny and rarely change, so each of them is cached as a
+# whole ({slug: instance}) under a version key that is bumped whenever one
+# of its rows is saved or deleted (see api/signals.py). The versions live in
+# the shared cache (settings.CACHES), so a bump reaches every process.
+LOOKUP_CACHE_TIMEOUT = 60 * 60
+
+# Seconds a process reuses a version or mapping without asking the shared
+# cache. Bounds how long other processes miss a bump, even a lost one.
+LOOKUP_LOCAL_TIMEOUT = 5
+
+# Versions and mappings already read by this process:
+# label -> (expires, version) and
+# (label, slug_field) -> (expires, version, mapping)
+_local_versions = {}
+_local_mappings = {}
+_local_lock = Lock()
+
+
+def get_version_key(model):
+    return f'lookup-version:{model._meta.label_lower}'
+
+
+def get_version(model):
+    """
+    Returns the current version of the cached rows of the model.
+    """
+
+    return get_versions([model])[0]
+
+
+def get_versions(lookup_models):
+    """
+    Returns the current versions of the cached rows of the models. The
+    shared cache is asked at most every LOOKUP_LOCAL_TIMEOUT seconds, with
+    one round trip for all models it is asked for.
+
+    New versions are based on the current time, so a version key that got
+    evicted from the cache never comes back with an old value.
+
+    Example:
+    ```python
+    versions = get_versions([Category, Priority, Status])
+    ```
+    """
+
+    now = time.monotonic()
+    versions = {}
+
+    with _local_lock:
+        for model in lookup_models:
+            entry = _local_versions.get(model._meta.label_lower)
+
+            if entry is not None and entry[0] > now:
+                versions[model] = entry[1]
+
+    missing = {
+        get_version_key(model): model
+        for model in lookup_models if model not in versions
+    }
+
+    if missing:
+        stored = cache.get_many(list(missing))
+
+        for version_key, model in missing.items():
+            if version_key not in stored:
+                cache.add(version_key, time.time_ns(), None)
+                stored[version_key] = cache.get(version_key)
+
+            versions[model] = stored[version_key]
+
+        with _local_lock:
+            for version_key, model in missing.items():
+                _local_versions[model._meta.label_lower] = (
+                    now + LOOKUP_LOCAL_TIMEOUT, versions[model]
+                )
+
+    return [versions[model] for model in lookup_models]
+
+
+def bump_version(model):
+    """
+    Invalidates the cached rows of the model in every process: this one
+    right away, the others once their local entries expire.
+
+    Inside a transaction the version is bumped again on commit, so no
+    process keeps a mapping that was loaded before the commit.
+    """
+
+    label = model._meta.label_lower
+
+    def bump():
+        try:
+            cache.incr(get_version_key(model))
+        except ValueError:
+            cache.set(get_version_key(model), time.time_ns(), None)
+
+        with _local_lock:
+            _local_versions.pop(label, None)
+
+            for key in [key for key in _local_mappings if key[0] == label]:
+                del _local_mappings[key]
+
+    bump()
+
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(bump)
+
+
+def clear_local_cache():
+    """Forgets the versions and mappings read by this process."""
+
+    with _local_lock:
+        _local_versions.clear()
+        _local_mappings.clear()
+
+
+def get_mapping(model, slug_field):
+    """
+    Returns the {slug: instance} mapping of all rows of the model. Slugs
+    shared by several rows map to None.
+    """
+
+    version = get_version(model)
+    local_key = (model._meta.label_lower, slug_field)
+    now = time.monotonic()
+
+    with _local_lock:
+        entry = _local_mappings.get(local_key)
+
+    if entry is not None and entry[0] > now and entry[1] == version:
+        return entry[2]
+
+    cache_key = f'lookup:{local_key[0]}:{slug_field}:{version}'
+    mapping = cache.get(cache_key)
+
+    if mapping is None:
+        mapping = {}
+
+        for instance in model._default_manager.all():
+            slug = getattr(instance, slug_field)
+            mapping[slug] = None if slug in mapping else instance
+
+        cache.set(cache_key, mapping, LOOKUP_CACHE_TIMEOUT)
+
+    with _local_lock:
+        _local_mappings[local_key] = (
+            now + LOOKUP_LOCAL_TIMEOUT, version, mapping
+        )
+
+    return mapping
+
+
+def resolve(model, slug_field, slug):
+    """
+    Returns the instance of the model whose slug_field equals the slug
+    without querying the database (once the mapping is cached).
+
+    Raises model.DoesNotExist or model.MultipleObjectsReturned like
+    model.objects.get(**{slug_field: slug}) would.
+
+    Example:
+    ```python
+    status = lookups.resolve(models.Status, 'caption', 'In Progress')
+    ```
+    """
+
+    mapping = get_mapping(model, slug_field)
+
+    if slug not in mapping:
+        raise model.DoesNotExist(
+            f'{model._meta.object_name} matching query does not exist.'
+        )
+
+    instance = mapping[slug]
+
+    if instance is None:
+        raise model.MultipleObjectsReturned(
+            f'get() returned more than one {model._meta.object_name}.'
+        )
+
+    # Callers may change their instance, the cached one stays untouched
+    return copy.copy(instance)
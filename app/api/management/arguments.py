@@ -0,0 +1,24 @@
+from argparse import ArgumentTypeError
+
+
+def positive_int(value):
+    """
+    Argument type of the counts of the management commands (e.g.
+    --batch-size) that only accepts integers of at least 1. call_command
+    raises a CommandError for other values.
+
+    Example:
+    ```python
+    parser.add_argument('--batch-size', type=positive_int, default=500)
+    ```
+    """
+
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ArgumentTypeError(f'invalid int value: {value!r}')
+
+    if number < 1:
+        raise ArgumentTypeError(f'must be at least 1, got {number}')
+
+    return number
@@ -0,0 +1,166 @@
+import re
+import time
+from typing import Any
+from django.core.management import BaseCommand
+from django.contrib.postgres.search import SearchQuery
+from django.db import connection, transaction
+from django.utils import timezone
+from api import filters, models, notifications, services
+
+
+class Command(BaseCommand):
+    """
+    Seed a large number of tasks and show the plans PostgreSQL picks for
+    the task queries of the views and commands, with the indexes they use.
+    The seeded rows are rolled back at the end.
+    """
+
+    help = '''Seed tasks (1M by default) in a transaction that is rolled back
+    and EXPLAIN ANALYZE the task queries to show the indexes they use.'''
+
+    # Statuses the seeded tasks are spread over
+    statuses = ['In Progress', 'Postponed', 'Archived', 'Completed']
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tasks',
+            type=int,
+            default=1_000_000,
+            help='Number of tasks to seed.'
+        )
+        parser.add_argument(
+            '--owners',
+            type=int,
+            default=1000,
+            help='Number of user profiles the tasks are spread over.'
+        )
+        parser.add_argument(
+            '--verbose-plans',
+            action='store_true',
+            help='Print the whole plan of every query.'
+        )
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        with transaction.atomic():
+            started = time.monotonic()
+            status_ids = self.seed(
+                options['tasks'],
+                options['owners']
+            )
+            self.stdout.write(
+                f'Seeded {options["tasks"]} tasks in '
+                f'{time.monotonic() - started:.2f}s.'
+            )
+
+            for name, queryset in self.get_queries(status_ids):
+                plan = queryset.explain(analyze=True)
+                indexes = sorted(set(
+                    re.findall(r'(?:using|Index Scan on) (\w+)', plan)
+                ))
+                duration = re.search(r'Execution Time: ([\d.]+ ms)', plan)
+
+                self.stdout.write(
+                    f'{name}: {", ".join(indexes) or "no index"} '
+                    f'({duration.group(1) if duration else "?"})'
+                )
+
+                if options['verbose_plans']:
+                    self.stdout.write(plan + '\n')
+
+            # Nothing of the benchmark is kept
+            transaction.set_rollback(True)
+
+    def seed(self, tasks, owners):
+        """
+        Inserts the user profiles and tasks with one statement each and
+        updates the planner statistics. Returns the ids of the statuses.
+        """
+
+        profiles = models.UserProfile.objects.bulk_create(
+            models.UserProfile(
+                first_name='Benchmark',
+                last_name=f'Owner {i}',
+                email=f'benchmark{i}@example.com'
+            )
+            for i in range(owners)
+        )
+        owner_ids = [profile.id for profile in profiles]
+        status_ids = [
+            services.get_status(caption).id for caption in self.statuses
+        ]
+
+        # Due dates and creation dates spread over two years, one in four
+        # tasks completed
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'''
+                INSERT INTO {models.Task._meta.db_table}
+                    (title, description, due_date, status_id, owner_id,
+                     created_at, completed_at, updated_at)
+                SELECT
+                    'Benchmark Task ' || i,
+                    '',
+                    CURRENT_DATE + (i %% 730 - 365),
+                    (%(status_ids)s::bigint[])[1 + i %% 4],
+                    (%(owner_ids)s::bigint[])[1 + i / 4 %% %(owners)s],
+                    NOW() - (i %% 730) * INTERVAL '1 day',
+                    CASE WHEN i %% 4 = 3
+                        THEN NOW() - (i %% 365) * INTERVAL '1 day'
+                    END,
+                    NOW()
+                FROM generate_series(1, %(tasks)s) AS i
+                ''',
+                {
+                    'status_ids': status_ids,
+                    'owner_ids': owner_ids,
+                    'owners': len(owner_ids),
+                    'tasks': tasks
+                }
+            )
+            cursor.execute(f'ANALYZE {models.Task._meta.db_table}')
+
+        return status_ids
+
+    def get_queries(self, status_ids):
+        """Returns (name, queryset) of the query shapes to explain."""
+
+        now = timezone.now()
+        current_date = timezone.localdate(now)
+        in_progress_id = status_ids[0]
+
+        return [
+            (
+                'Approaching due dates (notify_due_dates)',
+                notifications.get_approaching_tasks(current_date).values('id')
+            ),
+            (
+                'Overdue escalations (notify_overdue_dates --escalate)',
+                notifications.get_overdue_tasks(
+                    current_date,
+                    escalate=True
+                ).values('id')
+            ),
+            (
+                'Tasks of a status by due date (task list)',
+                models.Task.objects.filter(
+                    status=in_progress_id
+                ).order_by('due_date', 'id').values('id')[:50]
+            ),
+            (
+                'Full text search (task list ?search=)',
+                models.Task.objects.filter(
+                    search_vector=SearchQuery(
+                        'task 4242',
+                        config=filters.SEARCH_CONFIG,
+                        search_type='websearch'
+                    )
+                ).values('id')
+            ),
+            (
+                'Tasks created within a week (trends)',
+                models.Task.objects.filter(
+                    created_at__gte=now - timezone.timedelta(days=7),
+                    created_at__lt=now
+                ).values('id')
+            ),
+        ]
@@ -0,0 +1,70 @@
+# api/management/commands/import_tasks.py
+
+import csv
+from django.core.management.base import BaseCommand, CommandError
+from api import imports, models
+
+
+class Command(BaseCommand):
+    """
+    Import tasks from a CSV, JSON or NDJSON file (e.g. an export of the
+    task list) through a COPY into a staging table (see
+    imports.import_tasks). Either all tasks are imported or none.
+    """
+
+    help = 'Import tasks from a CSV, JSON or NDJSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='File with one task per row or object.'
+        )
+        parser.add_argument(
+            '--format',
+            choices=imports.FORMATS,
+            help='Format of the file, defaults to its extension.'
+        )
+        parser.add_argument(
+            '--owner',
+            help='Email of the user profile that owns tasks without owner.'
+        )
+
+    def handle(self, *args, **options):
+        file_format = options['format'] or imports.get_format(options['path'])
+
+        if file_format is None:
+            raise CommandError(
+                f'Unknown format of {options["path"]}, use --format.'
+            )
+
+        default_owner = None
+        if options['owner']:
+            default_owner = models.UserProfile.objects.filter(
+                email=options['owner']
+            ).order_by('id').first()
+
+            if default_owner is None:
+                raise CommandError(f'Unknown owner {options["owner"]}.')
+
+        try:
+            with open(options['path'], 'rb') as file:
+                result = imports.import_tasks(
+                    imports.read_rows(file, file_format),
+                    default_owner=default_owner
+                )
+        except (OSError, ValueError, csv.Error) as error:
+            raise CommandError(f'Could not read {options["path"]}: {error}')
+
+        if result.errors:
+            for line, messages in result.errors.items():
+                self.stderr.write(f'Row {line}: {" ".join(messages)}')
+
+            raise CommandError(
+                f'Nothing was imported, {len(result.errors)} rows are '
+                f'invalid.'
+            )
+
+        self.stdout.write(
+            f'Imported {result.imported} tasks in {result.seconds:.2f}s '
+            f'({result.rows_per_second:.0f} rows/s).'
+        )
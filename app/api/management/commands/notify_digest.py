@@ -0,0 +1,59 @@
+import time
+from typing import Any
+from django.core.management import BaseCommand
+from django.utils import timezone
+from api import notifications
+from api.management.arguments import positive_int
+
+
+class Command(BaseCommand):
+    """Send one digest of approaching and overdue tasks per recipient."""
+
+    help = '''Send one email per team member with all of their tasks whose
+    due date is approaching or overdue (instead of one email per task).
+    Tasks that were already part of a digest of the team member today are
+    skipped.'''
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=positive_int,
+            default=notifications.APPROACHING_DAYS,
+            help='Days before the due date in which a task is approaching.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=positive_int,
+            default=notifications.DEFAULT_BATCH_SIZE,
+            help='Number of recipients per query and emails per batch.'
+        )
+        parser.add_argument(
+            '--escalate',
+            action='store_true',
+            help='''Only include overdue tasks 1, 3 and 7 days after the
+            due date and weekly after that (instead of every day).'''
+        )
+        parser.add_argument(
+            '--outbox',
+            action='store_true',
+            help='''Add the emails to the EmailOutbox instead of sending them
+            (see the run_outbox_worker command).'''
+        )
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        started = time.monotonic()
+        current_date = (timezone.now()).date()
+
+        sent = notifications.send_digests(
+            current_date,
+            days=options['days'],
+            escalate=options['escalate'],
+            batch_size=options['batch_size'],
+            outbox=options['outbox']
+        )
+
+        action = 'Queued' if options['outbox'] else 'Sent'
+        self.stdout.write(
+            f'{action} {sent} digests in '
+            f'{time.monotonic() - started:.2f}s.'
+        )
@@ -1,36 +1,50 @@
 # api/management/commands/notify_due_dates.py
 
+import time
 from django.core.management.base import BaseCommand
-from django.core.mail import send_mail
 from django.utils import timezone
-from api.models import Task
+from api import models, notifications
+from api.management.arguments import positive_int
 
 
 class Command(BaseCommand):
-    """Send notifications for due dates approaching in 7 days."""
+    """
+    Send notifications for due dates approaching in 7 days. Team members
+    who were already notified of a task today are skipped (see
+    NotificationLog), so the command can be rerun after a crash.
+    """
 
     help = 'Send notifications for due dates approaching in 7 days'
 
-    def handle(self, *args, **options):
-        current_date = timezone.now()
-        seven_days_later = current_date + timezone.timedelta(days=7)
-
-        due_dates_approaching = Task.objects.filter(
-            due_date__lte=seven_days_later,
-            due_date__gte=current_date
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=positive_int,
+            default=notifications.DEFAULT_BATCH_SIZE,
+            help='Number of tasks per query and emails per batch.'
+        )
+        parser.add_argument(
+            '--outbox',
+            action='store_true',
+            help='''Add the emails to the EmailOutbox instead of sending them
+            (see the run_outbox_worker command).'''
         )
 
-        for task in due_dates_approaching:
-
-            subject = 'Task due date is approaching'
-            message = f'''The deadline for the task "{task.title}" with the
-                          ID: {task.id} is approaching! Due-date:
-                          {task.due_date}, Current-date: {current_date}.'''
-
-            from_email = 'admin@it-backends.com'
-
-            recipient_list = [
-                member.email for member in task.task_group.team_members.all()
-            ]
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        current_date = timezone.now().date()
+
+        sent = notifications.send_task_notifications(
+            notifications.get_approaching_tasks(current_date),
+            models.NotificationLog.DUE_DATE,
+            notifications.get_due_date_message,
+            current_date,
+            batch_size=options['batch_size'],
+            outbox=options['outbox']
+        )
 
-            send_mail(subject, message, from_email, recipient_list)
+        action = 'Queued' if options['outbox'] else 'Sent'
+        self.stdout.write(
+            f'{action} {sent} due date notifications in '
+            f'{time.monotonic() - started:.2f}s.'
+        )
@@ -1,31 +1,57 @@
+import time
 from typing import Any
 from django.core.management import BaseCommand
 from django.utils import timezone
-from api import models
-from django.core.mail import send_mail
+from api import models, notifications
+from api.management.arguments import positive_int
 
 
 class Command(BaseCommand):
-    """Send notifications for overdue dates."""
+    """
+    Send notifications for overdue dates. Team members who were already
+    notified of a task today are skipped (see NotificationLog), so the
+    command can be rerun after a crash.
+    """
 
     help = 'Send notifications for overdue dates.'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=positive_int,
+            default=notifications.DEFAULT_BATCH_SIZE,
+            help='Number of tasks per query and emails per batch.'
+        )
+        parser.add_argument(
+            '--escalate',
+            action='store_true',
+            help='''Only notify overdue tasks 1, 3 and 7 days after the due
+            date and weekly after that (instead of every day).'''
+        )
+        parser.add_argument(
+            '--outbox',
+            action='store_true',
+            help='''Add the emails to the EmailOutbox instead of sending them
+            (see the run_outbox_worker command).'''
+        )
+
     def handle(self, *args: Any, **options: Any) -> str | None:
+        started = time.monotonic()
         current_date = (timezone.now()).date()
 
-        overdue_dates = models.Task.objects.filter(
-            due_date__lt=current_date
+        sent = notifications.send_task_notifications(
+            notifications.get_overdue_tasks(
+                current_date, escalate=options['escalate']
+            ),
+            models.NotificationLog.OVERDUE,
+            notifications.get_overdue_message,
+            current_date,
+            batch_size=options['batch_size'],
+            outbox=options['outbox']
         )
 
-        for task in overdue_dates:
-            recipient_list = [
-                member.email for member in task.task_group.team_members.all()
-            ]
-
-            subject = 'The date of the task is overdue!'
-            message = f'''The deadline for the task "{task.title}" with the
-                       ID: {task.id} is overdue! Due-date: {task.due_date},
-                       Current-date: {current_date}.'''
-            from_email = 'admin@it-backends.com'
-
-            send_mail(subject, message, from_email, recipient_list)
+        action = 'Queued' if options['outbox'] else 'Sent'
+        self.stdout.write(
+            f'{action} {sent} overdue notifications in '
+            f'{time.monotonic() - started:.2f}s.'
+        )
@@ -0,0 +1,49 @@
+from typing import Any
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, transaction
+from api import models
+
+
+class Command(BaseCommand):
+    """Rebuild the TaskStatsDaily rollup from the tasks and verify it."""
+
+    help = 'Rebuild the TaskStatsDaily rollup from the tasks and verify it.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only verify the rollup without rebuilding it.'
+        )
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        if not options['check']:
+            with transaction.atomic(), connection.cursor() as cursor:
+                # Blocks task writes (not reads) during the rebuild so no
+                # delta gets lost.
+                cursor.execute(
+                    f'LOCK TABLE {models.Task._meta.db_table} IN SHARE MODE'
+                )
+
+                rows = models.TaskStatsDaily.objects.rebuild()
+
+            self.stdout.write(f'Rebuilt {rows} TaskStatsDaily rows.')
+
+        mismatches = models.TaskStatsDaily.objects.verify()
+
+        for key, expected, actual in mismatches:
+            owner_id, day, status_id = key
+            self.stderr.write(
+                f'Owner {owner_id}, day {day}, status {status_id}: '
+                f'expected {expected}, found {actual}'
+            )
+
+        if mismatches:
+            raise CommandError(
+                f'{len(mismatches)} TaskStatsDaily rows do not match the '
+                'tasks.'
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS('TaskStatsDaily rollup matches the tasks.')
+        )
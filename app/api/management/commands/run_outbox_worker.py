@@ -0,0 +1,131 @@
+import threading
+import time
+from typing import Any
+from django.core.mail import get_connection
+from django.core.management import BaseCommand
+from django.db import connection as db_connection
+from api import outbox
+from api.management.arguments import positive_int
+
+
+class Command(BaseCommand):
+    """
+    Send the emails of the EmailOutbox. Any number of these workers can
+    run on any number of nodes, each claims its own batches (see
+    outbox.send_batch).
+    """
+
+    help = '''Send the emails of the outbox with a pool of worker threads.
+    Runs until interrupted or, with --once, until no email is due.'''
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=positive_int,
+            default=1,
+            help='Number of worker threads.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=positive_int,
+            default=outbox.DEFAULT_BATCH_SIZE,
+            help='Number of emails claimed per transaction.'
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=positive_int,
+            default=outbox.MAX_ATTEMPTS,
+            help='Attempts after which an email is marked as failed.'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=5,
+            help='Seconds to wait when no email is due.'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Stop as soon as no email is due.'
+        )
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        started = time.monotonic()
+        self.stop = threading.Event()
+        self.lock = threading.Lock()
+        self.sent = 0
+        self.failed = 0
+
+        if options['workers'] == 1:
+            self.work(options)
+
+        else:
+            threads = [
+                threading.Thread(
+                    target=self.work_in_thread,
+                    args=(options,),
+                    daemon=True
+                )
+                for i in range(options['workers'])
+            ]
+
+            for thread in threads:
+                thread.start()
+
+            try:
+                for thread in threads:
+                    while thread.is_alive():
+                        thread.join(timeout=1)
+            except KeyboardInterrupt:
+                self.stop.set()
+                for thread in threads:
+                    thread.join()
+
+        self.stdout.write(
+            f'Sent {self.sent} emails ({self.failed} failed attempts) in '
+            f'{time.monotonic() - started:.2f}s.'
+        )
+
+    def work_in_thread(self, options):
+        """Runs a worker with its own database connection."""
+
+        try:
+            self.work(options)
+        finally:
+            db_connection.close()
+
+    def work(self, options):
+        """
+        Sends batches over one mail connection, which stays open between
+        the batches, until stopped.
+        """
+
+        mail_connection = get_connection()
+
+        try:
+            while not self.stop.is_set():
+                sent, failed = outbox.send_batch(
+                    mail_connection,
+                    batch_size=options['batch_size'],
+                    max_attempts=options['max_attempts']
+                )
+
+                with self.lock:
+                    self.sent += sent
+                    self.failed += failed
+
+                if sent or failed:
+                    continue
+
+                if options['once']:
+                    break
+
+                # Closes the idle mail connection until emails are due
+                mail_connection.close()
+                self.stop.wait(options['poll_interval'])
+
+        except KeyboardInterrupt:
+            self.stop.set()
+
+        finally:
+            mail_connection.close()
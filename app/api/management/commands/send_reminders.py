@@ -0,0 +1,44 @@
+# api/management/commands/send_reminders.py
+
+import time
+from django.core.management.base import BaseCommand
+from api import notifications
+from api.management.arguments import positive_int
+
+
+class Command(BaseCommand):
+    """
+    Send the task reminders that are due (see Reminder). Only the reminders
+    that fired since the last run are read, so the command can run as often
+    as the shortest reminder offset requires.
+    """
+
+    help = 'Send the task reminders that are due'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=positive_int,
+            default=notifications.DEFAULT_BATCH_SIZE,
+            help='Number of reminders claimed per transaction.'
+        )
+        parser.add_argument(
+            '--outbox',
+            action='store_true',
+            help='''Add the emails to the EmailOutbox instead of sending them
+            (see the run_outbox_worker command).'''
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+
+        sent = notifications.send_reminders(
+            batch_size=options['batch_size'],
+            outbox=options['outbox']
+        )
+
+        action = 'Queued' if options['outbox'] else 'Sent'
+        self.stdout.write(
+            f'{action} {sent} reminders in '
+            f'{time.monotonic() - started:.2f}s.'
+        )
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:44
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Coalesce, TruncDate
+import django.db.models.deletion
+
+
+def populate_task_stats(apps, schema_editor):
+    """Counts the existing tasks into the rollup."""
+
+    Task = apps.get_model('api', 'Task')
+    TaskStatsDaily = apps.get_model('api', 'TaskStatsDaily')
+
+    rows = Task.objects.filter(
+        owner__isnull=False,
+        status__isnull=False
+    ).annotate(
+        day=TruncDate(Coalesce('completed_at', 'created_at'))
+    ).values_list(
+        'owner_id', 'day', 'status_id'
+    ).annotate(
+        count=Count('id')
+    ).order_by()
+
+    TaskStatsDaily.objects.bulk_create(
+        [
+            TaskStatsDaily(
+                owner_id=owner_id, day=day, status_id=status_id, count=count
+            )
+            for owner_id, day, status_id, count in rows
+        ],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_task_due_date_id_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskStatsDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('count', models.IntegerField(default=0)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_stats', to='api.userprofile')),
+                ('status', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_stats', to='api.status')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='taskstatsdaily',
+            constraint=models.UniqueConstraint(fields=('owner', 'day', 'status'), name='api_taskstatsdaily_owner_day_status_uniq'),
+        ),
+        migrations.RunPython(
+            populate_task_stats, migrations.RunPython.noop
+        ),
+    ]
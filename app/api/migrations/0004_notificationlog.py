@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_taskstatsdaily'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('due_date', 'Due date approaching'), ('overdue', 'Due date overdue'), ('digest', 'Digest')], max_length=20)),
+                ('sent_on', models.DateField()),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_logs', to='api.userprofile')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_logs', to='api.task')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='notificationlog',
+            constraint=models.UniqueConstraint(fields=('task', 'recipient', 'kind', 'sent_on'), name='api_notificationlog_task_recipient_kind_sent_on_uniq'),
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:00
+
+from django.db import migrations, models
+from django.utils import timezone
+import django.db.models.deletion
+
+
+# Copies of api.models.REMINDER_OFFSETS and INACTIVE_STATUSES as of this
+# migration, so replaying it doesn't depend on their later values
+REMINDER_OFFSETS = {
+    '7d': timezone.timedelta(days=7),
+    '1d': timezone.timedelta(days=1),
+    '1h': timezone.timedelta(hours=1),
+}
+INACTIVE_STATUSES = ['Completed', 'Archived']
+
+
+def populate_reminders(apps, schema_editor):
+    """Schedules the upcoming reminders of the existing tasks."""
+
+    Task = apps.get_model('api', 'Task')
+    Reminder = apps.get_model('api', 'Reminder')
+
+    now = timezone.now()
+    tasks = Task.objects.filter(
+        due_date__gte=timezone.localdate(now)
+    ).exclude(
+        status__caption__in=INACTIVE_STATUSES
+    ).values_list('id', 'due_date')
+
+    reminders = []
+    for task_id, due_date in tasks.iterator(chunk_size=2000):
+        due_at = timezone.make_aware(
+            timezone.datetime.combine(
+                due_date + timezone.timedelta(days=1),
+                timezone.datetime.min.time()
+            )
+        )
+
+        reminders.extend(
+            Reminder(task_id=task_id, kind=kind, fire_at=due_at - offset)
+            for kind, offset in REMINDER_OFFSETS.items()
+            if due_at - offset > now
+        )
+
+    Reminder.objects.bulk_create(reminders, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_emailoutbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Reminder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=10)),
+                ('fire_at', models.DateTimeField()),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='api.task')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('sent_at__isnull', True)), fields=['fire_at', 'id'], name='api_reminder_unsent_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='reminder',
+            constraint=models.UniqueConstraint(fields=('task', 'kind'), name='api_reminder_task_kind_uniq'),
+        ),
+        migrations.RunPython(
+            populate_reminders, migrations.RunPython.noop
+        ),
+    ]
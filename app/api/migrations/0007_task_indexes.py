@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:03
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # The indexes are built without blocking writes to the task table
+    atomic = False
+
+    dependencies = [
+        ('api', '0006_reminder'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(condition=models.Q(('completed_at__isnull', True)), fields=['due_date'], name='api_task_open_due_date_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(fields=['status', 'due_date', 'id'], name='api_task_status_due_id_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(fields=['created_at'], name='api_task_created_at_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:05
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Keeps the search vector up to date for every write, including the
+# bulk_create and update() calls that bypass the model signals. The
+# 'english' configuration must match api.filters.SEARCH_CONFIG.
+CREATE_TRIGGER = """
+CREATE FUNCTION api_task_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.description, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER api_task_search_vector_trigger
+BEFORE INSERT OR UPDATE OF title, description, search_vector ON api_task
+FOR EACH ROW EXECUTE FUNCTION api_task_search_vector_update();
+
+-- The trigger computes the vectors of the existing tasks
+UPDATE api_task SET search_vector = NULL;
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER api_task_search_vector_trigger ON api_task;
+DROP FUNCTION api_task_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_task_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(CREATE_TRIGGER, DROP_TRIGGER),
+        migrations.AddIndex(
+            model_name='task',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='api_task_search_vector_idx'),
+        ),
+    ]
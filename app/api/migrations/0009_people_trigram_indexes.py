@@ -0,0 +1,41 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:10
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently, \
+    TrigramExtension
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    # The indexes are built without blocking writes to the people tables
+    atomic = False
+
+    dependencies = [
+        ('api', '0008_task_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        AddIndexConcurrently(
+            model_name='customuser',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('email'), name='gin_trgm_ops'), name='api_customuser_email_trgm_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='userprofile',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('first_name'), name='gin_trgm_ops'), name='api_profile_first_trgm_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='userprofile',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('last_name'), name='gin_trgm_ops'), name='api_profile_last_trgm_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='userprofile',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('email'), name='gin_trgm_ops'), name='api_profile_email_trgm_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='userprofile',
+            index=models.Index(fields=['phone_number'], name='api_profile_phone_idx'),
+        ),
+    ]
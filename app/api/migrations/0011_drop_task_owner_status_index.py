@@ -0,0 +1,21 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    # The index is dropped without blocking writes to the task table
+    atomic = False
+
+    dependencies = [
+        ('api', '0010_updated_at'),
+    ]
+
+    # No query uses the (owner, status, completed_at) index since the task
+    # statistics read the TaskStatsDaily rollup. 0007_task_indexes no
+    # longer creates it, databases that ran the old 0007 drop it here.
+    operations = [
+        migrations.RunSQL(
+            'DROP INDEX CONCURRENTLY IF EXISTS api_task_owner_status_done_idx',
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -1,4 +1,10 @@
-from django.db import models
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, connections, transaction
+from django.db.models import Count, Prefetch
+from django.db.models.functions import Coalesce, TruncDate, Upper
+from django.utils import timezone
 from django.contrib.auth.models import BaseUserManager, AbstractBaseUser, \
     PermissionsMixin
 # Create your models here.
@@ -85,6 +91,16 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
 
     USERNAME_FIELD = 'email'
 
+    class Meta:
+        indexes = [
+            # Trigram index for the people search (icontains compares the
+            # uppercased values)
+            GinIndex(
+                OpClass(Upper('email'), name='gin_trgm_ops'),
+                name='api_customuser_email_trgm_idx'
+            ),
+        ]
+
     def __str__(self) -> str:
         """
         Returns a string representation of the user based on its email.
@@ -279,6 +295,29 @@ class UserProfile(models.Model):
         blank=True
     )
 
+    class Meta:
+        indexes = [
+            # Trigram indexes for the people search and autocomplete
+            # (icontains compares the uppercased values)
+            GinIndex(
+                OpClass(Upper('first_name'), name='gin_trgm_ops'),
+                name='api_profile_first_trgm_idx'
+            ),
+            GinIndex(
+                OpClass(Upper('last_name'), name='gin_trgm_ops'),
+                name='api_profile_last_trgm_idx'
+            ),
+            GinIndex(
+                OpClass(Upper('email'), name='gin_trgm_ops'),
+                name='api_profile_email_trgm_idx'
+            ),
+            # Exact phone number matches of the people search
+            models.Index(
+                fields=['phone_number'],
+                name='api_profile_phone_idx'
+            ),
+        ]
+
     def __str__(self) -> str:
         """
         Returns a string representation of the user profile based on email and phone number.
@@ -294,6 +333,8 @@ class TaskGroup(models.Model):
     - name (CharField): The name of the task group.
     - suggested_positions (ManyToManyField): Many-to-many relationship with the Position model.
     - team_members (ManyToManyField): Many-to-many relationship with the UserProfile model.
+    - updated_at (DateTimeField): The time the task group or its
+      positions and team members were last changed.
 
     Related Name Relationships:
     - assigned_task (related_name): Task instance related to the task group.
@@ -330,6 +371,8 @@ class TaskGroup(models.Model):
         UserProfile,
         related_name='taskgroup_set'
     )
+    # Also bumped by m2m changes (see signals), read by conditional GETs
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def calculate_members(self):
         """
@@ -357,6 +400,10 @@ class Task(models.Model):
     - status (ForeignKey): Foreign key relationship with the Status model.
     - owner (ForeignKey): Foreign key relationship with the UserProfile model.
     - task_group (OneToOneField): One-to-one relationship with the TaskGroup model.
+    - search_vector (SearchVectorField): The title and description for
+      full text search, kept up to date by the database.
+    - updated_at (DateTimeField): The time the task or its resources
+      were last changed.
 
     Related Name Relationships:
     - resource_collection (related_name): TaskResource instances related to the task.
@@ -432,6 +479,44 @@ class Task(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     completed_at = models.DateTimeField(blank=True, null=True)
 
+    # Also bumped by changes of its resources (see signals) and by the
+    # bulk updates of the services, read by conditional GETs
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    # Weighted title and description lexemes, maintained by a database
+    # trigger (see migration 0008_task_search_vector)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the task list
+            models.Index(
+                fields=['due_date', 'id'],
+                name='api_task_due_date_id_idx'
+            ),
+            # Open tasks by due date (notification commands)
+            models.Index(
+                fields=['due_date'],
+                name='api_task_open_due_date_idx',
+                condition=models.Q(completed_at__isnull=True)
+            ),
+            # Tasks of a status ordered like the task list
+            models.Index(
+                fields=['status', 'due_date', 'id'],
+                name='api_task_status_due_id_idx'
+            ),
+            # Tasks created within a period (trends)
+            models.Index(
+                fields=['created_at'],
+                name='api_task_created_at_idx'
+            ),
+            # Full text search of the task list
+            GinIndex(
+                fields=['search_vector'],
+                name='api_task_search_vector_idx'
+            ),
+        ]
+
     def __str__(self) -> str:
         """
         Returns a string representation of the task based on its ID, status, and title.
@@ -448,6 +533,7 @@ class TaskResource(models.Model):
     - description (TextField): The description of the resource.
     - resource_link (CharField): The link to the resource.
     - task (ForeignKey): Foreign key relationship with the Task model.
+    - updated_at (DateTimeField): The time the resource was last changed.
 
     Related Name Relationships:
     - Empty
@@ -476,9 +562,573 @@ class TaskResource(models.Model):
         null=True,
         blank=True
     )
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self) -> str:
         """
         Returns a string representation of the task resource based on its ID and source name.
         """
         return f'Title: {self.source_name} ID: {self.id}'
+
+
+class TaskStatsDailyManager(models.Manager):
+    """
+    Manager for the TaskStatsDaily model.
+
+    Methods:
+    - get_key(task): Returns the (owner_id, day, status_id) row of a task.
+    - apply_deltas(deltas): Adds the deltas to the counts of the rows.
+    - count_tasks(): Counts the tasks per row from the Task table.
+    - rebuild(): Replaces all rows with the counts of the Task table.
+    - verify(): Returns the rows that differ from the Task table.
+    """
+
+    def get_key(self, task):
+        """
+        Returns the (owner_id, day, status_id) row that counts the task or
+        None if the task isn't counted (no owner or status).
+
+        Example:
+        ```python
+        key = TaskStatsDaily.objects.get_key(task)
+        ```
+        """
+
+        if task.owner_id is None or task.status_id is None:
+            return None
+
+        moment = task.completed_at or task.created_at
+        if moment is None:
+            return None
+
+        return (task.owner_id, timezone.localdate(moment), task.status_id)
+
+    def apply_deltas(self, deltas):
+        """
+        Adds the deltas ({(owner_id, day, status_id): delta}) to the counts
+        of the rows with a single upsert statement.
+
+        Example:
+        ```python
+        # A task of owner 1 changed from status 2 to status 3
+        TaskStatsDaily.objects.apply_deltas({
+            (1, day, 2): -1,
+            (1, day, 3): 1
+        })
+        ```
+        """
+
+        deltas = {
+            key: delta for key, delta in deltas.items()
+            if key is not None and delta
+        }
+        if not deltas:
+            return
+
+        table = self.model._meta.db_table
+        values = ', '.join(['(%s, %s, %s, %s)'] * len(deltas))
+        params = []
+        for (owner_id, day, status_id), delta in deltas.items():
+            params.extend([owner_id, day, status_id, delta])
+
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                f'''
+                INSERT INTO {table} (owner_id, day, status_id, count)
+                VALUES {values}
+                ON CONFLICT (owner_id, day, status_id)
+                DO UPDATE SET count = {table}.count + EXCLUDED.count
+                ''',
+                params
+            )
+
+    def count_tasks(self, tasks=None):
+        """
+        Counts the (given) tasks per (owner_id, day, status_id) row
+        directly from the Task table.
+        """
+
+        if tasks is None:
+            tasks = Task.objects.all()
+
+        rows = tasks.filter(
+            owner__isnull=False,
+            status__isnull=False
+        ).annotate(
+            day=TruncDate(Coalesce('completed_at', 'created_at'))
+        ).values_list(
+            'owner_id', 'day', 'status_id'
+        ).annotate(
+            count=Count('id')
+        ).order_by()
+
+        return {
+            (owner_id, day, status_id): count
+            for owner_id, day, status_id, count in rows
+        }
+
+    def rebuild(self):
+        """
+        Replaces all rows with the counts of the Task table and returns the
+        number of rows.
+        """
+
+        counts = self.count_tasks()
+
+        self.all().delete()
+        self.bulk_create(
+            [
+                self.model(
+                    owner_id=owner_id,
+                    day=day,
+                    status_id=status_id,
+                    count=count
+                )
+                for (owner_id, day, status_id), count in counts.items()
+            ],
+            batch_size=1000
+        )
+
+        return len(counts)
+
+    def verify(self):
+        """
+        Returns a list of (key, expected count, actual count) for every row
+        that differs from the counts of the Task table.
+        """
+
+        expected = self.count_tasks()
+        actual = {
+            (owner_id, day, status_id): count
+            for owner_id, day, status_id, count in self.exclude(
+                count=0
+            ).values_list('owner_id', 'day', 'status_id', 'count')
+        }
+
+        return [
+            (key, expected.get(key, 0), actual.get(key, 0))
+            for key in sorted(expected.keys() | actual.keys(), key=str)
+            if expected.get(key, 0) != actual.get(key, 0)
+        ]
+
+
+class TaskStatsDaily(models.Model):
+    """
+    Rollup of the number of tasks per owner, day and status. Read by the
+    task statistics instead of scanning all tasks of an owner.
+
+    A task is counted on the day of its completed_at datetime or, if not
+    completed, on the day of its created_at datetime. The rows are kept
+    current by signal handlers (see api/signals.py) and can be rebuilt
+    with the rebuild_task_stats management command.
+
+    Fields:
+    - owner (ForeignKey): Foreign key relationship with the UserProfile model.
+    - day (DateField): The day the tasks are counted on.
+    - status (ForeignKey): Foreign key relationship with the Status model.
+    - count (IntegerField): The number of tasks.
+
+    Example:
+    ```python
+    # Number of completed tasks of an owner within the last 7 days
+    TaskStatsDaily.objects.filter(
+        owner=user_profile,
+        status__caption='Completed',
+        day__gte=timezone.now().date() - timezone.timedelta(days=7)
+    ).aggregate(Sum('count'))
+    ```
+    """
+    owner = models.ForeignKey(
+        UserProfile,
+        on_delete=models.CASCADE,
+        related_name='task_stats'
+    )
+    day = models.DateField()
+    status = models.ForeignKey(
+        Status,
+        on_delete=models.CASCADE,
+        related_name='task_stats'
+    )
+    count = models.IntegerField(default=0)
+
+    objects = TaskStatsDailyManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['owner', 'day', 'status'],
+                name='api_taskstatsdaily_owner_day_status_uniq'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        """
+        Returns a string representation of the row based on its owner,
+        day, status and count.
+        """
+        return f'{self.owner_id} - {self.day} - {self.status_id}: {self.count}'
+
+
+class NotificationLog(models.Model):
+    """
+    Ledger of the notification emails sent per task, recipient, kind and
+    day. The notify commands skip the (task, recipient) pairs that are
+    already logged for the day, so a crashed run can be restarted without
+    sending duplicates.
+
+    Fields:
+    - task (ForeignKey): Foreign key relationship with the Task model.
+    - recipient (ForeignKey): Foreign key relationship with the UserProfile
+      model.
+    - kind (CharField): The kind of notification (see KIND_CHOICES).
+    - sent_on (DateField): The day the notification was sent.
+
+    Example:
+    ```python
+    # Was the overdue notification of a task sent to a user today?
+    NotificationLog.objects.filter(
+        task=task,
+        recipient=user_profile,
+        kind=NotificationLog.OVERDUE,
+        sent_on=timezone.now().date()
+    ).exists()
+    ```
+    """
+
+    DUE_DATE = 'due_date'
+    OVERDUE = 'overdue'
+    DIGEST = 'digest'
+    KIND_CHOICES = [
+        (DUE_DATE, 'Due date approaching'),
+        (OVERDUE, 'Due date overdue'),
+        (DIGEST, 'Digest'),
+    ]
+
+    task = models.ForeignKey(
+        Task,
+        on_delete=models.CASCADE,
+        related_name='notification_logs'
+    )
+    recipient = models.ForeignKey(
+        UserProfile,
+        on_delete=models.CASCADE,
+        related_name='notification_logs'
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    sent_on = models.DateField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['task', 'recipient', 'kind', 'sent_on'],
+                name='api_notificationlog_task_recipient_kind_sent_on_uniq'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        """
+        Returns a string representation of the log entry based on its task,
+        recipient, kind and day.
+        """
+        return f'{self.task_id} - {self.recipient_id} - {self.kind}: ' \
+            f'{self.sent_on}'
+
+
+class EmailOutboxManager(models.Manager):
+    """
+    Manager for the EmailOutbox model.
+
+    Methods:
+    - enqueue(datatuples): Adds emails to the outbox.
+    - claim(batch_size): Locks the next emails that are due for sending.
+    """
+
+    def enqueue(self, datatuples):
+        """
+        Adds the (subject, message, from_email, recipient_list) tuples (like
+        send_mass_mail takes them) to the outbox with a single insert.
+
+        Example:
+        ```python
+        EmailOutbox.objects.enqueue([
+            ('Subject', 'Message', 'admin@it-backends.com', ['a@b.com'])
+        ])
+        ```
+        """
+
+        return self.bulk_create([
+            self.model(
+                subject=subject,
+                body=body,
+                from_email=from_email,
+                recipients=list(recipients)
+            )
+            for subject, body, from_email, recipients in datatuples
+        ])
+
+    def claim(self, batch_size):
+        """
+        Returns the next (batch_size) pending emails that are due, locked
+        with SELECT ... FOR UPDATE SKIP LOCKED. Must be called in a
+        transaction; rows locked by other workers are skipped instead of
+        waited for, so any number of workers can claim in parallel.
+        """
+
+        return list(
+            self.select_for_update(skip_locked=True).filter(
+                status=self.model.PENDING,
+                available_at__lte=timezone.now()
+            ).order_by('available_at', 'id')[:batch_size]
+        )
+
+
+class EmailOutbox(models.Model):
+    """
+    Emails waiting to be sent by the run_outbox_worker management command.
+    Producers only insert rows (see EmailOutbox.objects.enqueue), so they
+    don't wait for the mail server.
+
+    Fields:
+    - subject (CharField): The subject of the email.
+    - body (TextField): The body of the email.
+    - from_email (CharField): The sender of the email.
+    - recipients (JSONField): The list of recipient addresses.
+    - status (CharField): Pending, sent or failed (see STATUS_CHOICES).
+    - attempts (IntegerField): The number of failed sending attempts.
+    - available_at (DateTimeField): The time from which the email may be
+      sent (pushed back after failed attempts).
+    - last_error (TextField): The error of the last failed attempt.
+    - created_at (DateTimeField): The time the email was added.
+    - sent_at (DateTimeField): The time the email was sent.
+
+    Example:
+    ```python
+    # Emails that are waiting for their next attempt
+    EmailOutbox.objects.filter(
+        status=EmailOutbox.PENDING,
+        attempts__gt=0
+    )
+    ```
+    """
+
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255)
+    recipients = models.JSONField(default=list)
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=PENDING
+    )
+    attempts = models.IntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    objects = EmailOutboxManager()
+
+    class Meta:
+        indexes = [
+            # Only the pending rows are scanned by the workers
+            models.Index(
+                fields=['available_at', 'id'],
+                name='api_emailoutbox_pending_idx',
+                condition=models.Q(status='pending')
+            ),
+        ]
+
+    def __str__(self) -> str:
+        """
+        Returns a string representation of the email based on its subject,
+        recipients and status.
+        """
+        return f'{self.subject} - {", ".join(self.recipients)}: {self.status}'
+
+
+# Reminders of a task by kind and time before the end of its due date.
+# Can be overridden with the TASK_REMINDER_OFFSETS setting.
+REMINDER_OFFSETS = getattr(settings, 'TASK_REMINDER_OFFSETS', {
+    '7d': timezone.timedelta(days=7),
+    '1d': timezone.timedelta(days=1),
+    '1h': timezone.timedelta(hours=1),
+})
+
+# Tasks with these statuses don't get reminders
+INACTIVE_STATUSES = ['Completed', 'Archived']
+
+
+class ReminderManager(models.Manager):
+    """
+    Manager for the Reminder model.
+
+    Methods:
+    - get_reminders(task): Returns the upcoming reminders of a task.
+    - sync(tasks): Replaces the reminders of the tasks.
+    - claim(now, batch_size): Locks the next reminders that are due.
+    """
+
+    def get_reminders(self, task, now=None, inactive_status_ids=None):
+        """
+        Returns the (unsaved) reminders of the task that fire after now,
+        one per REMINDER_OFFSETS kind. Tasks without due date or with an
+        inactive status have none.
+
+        The due date ends at midnight (in the current time zone) after the
+        due date, when the task becomes overdue.
+        """
+
+        if inactive_status_ids is None:
+            inactive_status_ids = self.get_inactive_status_ids()
+
+        if task.due_date is None or task.status_id in inactive_status_ids:
+            return []
+
+        now = now or timezone.now()
+        due_at = timezone.make_aware(
+            timezone.datetime.combine(
+                task.due_date + timezone.timedelta(days=1),
+                timezone.datetime.min.time()
+            )
+        )
+
+        return [
+            self.model(task_id=task.id, kind=kind, fire_at=due_at - offset)
+            for kind, offset in REMINDER_OFFSETS.items()
+            if due_at - offset > now
+        ]
+
+    def get_inactive_status_ids(self):
+        """Returns the ids of the statuses whose tasks get no reminders."""
+
+        # Imported here, lookups is independent of the models
+        from api import lookups
+
+        mapping = lookups.get_mapping(Status, 'caption')
+
+        return {
+            status.id for caption, status in mapping.items()
+            if caption in INACTIVE_STATUSES and status is not None
+        }
+
+    def sync(self, tasks, replace=True):
+        """
+        Replaces the reminders of the (saved) tasks with their upcoming
+        reminders, with one DELETE and one INSERT for all tasks. New tasks
+        can skip the DELETE (replace=False).
+
+        Example:
+        ```python
+        # After the due dates of the tasks changed
+        Reminder.objects.sync(tasks)
+        ```
+        """
+
+        tasks = list(tasks)
+        if not tasks:
+            return
+
+        now = timezone.now()
+        inactive_status_ids = self.get_inactive_status_ids()
+
+        with transaction.atomic(using=self.db):
+            if replace:
+                self.filter(task__in=[task.id for task in tasks]).delete()
+
+            self.bulk_create([
+                reminder
+                for task in tasks
+                for reminder in self.get_reminders(
+                    task, now, inactive_status_ids
+                )
+            ])
+
+    def claim(self, now, batch_size):
+        """
+        Returns the next (batch_size) unsent reminders that fired until now
+        with their task and team members, locked with SELECT ... FOR UPDATE
+        SKIP LOCKED. Must be called in a transaction.
+        """
+
+        return list(
+            self.select_for_update(skip_locked=True, of=('self',)).filter(
+                sent_at__isnull=True,
+                fire_at__lte=now
+            ).select_related(
+                'task__task_group'
+            ).prefetch_related(
+                Prefetch(
+                    'task__task_group__team_members',
+                    queryset=UserProfile.objects.only('id', 'email')
+                )
+            ).order_by('fire_at', 'id')[:batch_size]
+        )
+
+
+class Reminder(models.Model):
+    """
+    Scheduled reminder of the due date of a task. The reminders of a task
+    are replaced whenever its due date or status changes (see
+    Reminder.objects.sync), so the send_reminders management command only
+    reads the rows that fired since its last run instead of scanning the
+    tasks.
+
+    Fields:
+    - task (ForeignKey): Foreign key relationship with the Task model.
+    - kind (CharField): The offset before the due date (a key of
+      REMINDER_OFFSETS, e.g. '1d').
+    - fire_at (DateTimeField): The time the reminder is sent at.
+    - sent_at (DateTimeField): The time the reminder was sent.
+
+    Example:
+    ```python
+    # Reminders that are waiting to be sent
+    Reminder.objects.filter(
+        sent_at__isnull=True,
+        fire_at__lte=timezone.now()
+    )
+    ```
+    """
+
+    task = models.ForeignKey(
+        Task,
+        on_delete=models.CASCADE,
+        related_name='reminders'
+    )
+    kind = models.CharField(max_length=10)
+    fire_at = models.DateTimeField()
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    objects = ReminderManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['task', 'kind'],
+                name='api_reminder_task_kind_uniq'
+            ),
+        ]
+        indexes = [
+            # Only the unsent reminders are scanned by the scheduler
+            models.Index(
+                fields=['fire_at', 'id'],
+                name='api_reminder_unsent_idx',
+                condition=models.Q(sent_at__isnull=True)
+            ),
+        ]
+
+    def __str__(self) -> str:
+        """
+        Returns a string representation of the reminder based on its task,
+        kind and time.
+        """
+        return f'{self.task_id} - {self.kind}: {self.fire_at}'
@@ -0,0 +1,455 @@
+from collections import namedtuple
+from contextlib import nullcontext
+from itertools import groupby
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.core.mail import get_connection, send_mass_mail
+from django.db import transaction
+from django.db.models import Exists, F, Func, IntegerField, OuterRef, Q, \
+    Value
+from django.db.models.functions import JSONObject, Mod
+from django.db.models.lookups import Exact
+from django.utils import timezone
+from api import models
+
+# Sender of all notification emails
+FROM_EMAIL = 'admin@it-backends.com'
+
+# Number of rows per query chunk and emails per send_mass_mail call
+DEFAULT_BATCH_SIZE = 500
+
+# Days before the due date in which a task counts as approaching
+APPROACHING_DAYS = 7
+
+# Overdue tasks are notified on these days after the due date, then every
+# ESCALATION_INTERVAL days
+ESCALATION_DAYS = [1, 3, 7]
+ESCALATION_INTERVAL = 7
+
+# Task as needed by the messages
+NotifiedTask = namedtuple('NotifiedTask', ['id', 'title', 'due_date'])
+
+
+def get_approaching_tasks(current_date, days=APPROACHING_DAYS):
+    """
+    Returns the open tasks whose due date is within the next (days) days.
+    """
+
+    return models.Task.objects.filter(
+        completed_at__isnull=True,
+        due_date__lte=current_date + timezone.timedelta(days=days),
+        due_date__gte=current_date
+    )
+
+
+def get_overdue_tasks(current_date, escalate=False):
+    """
+    Returns the open tasks whose due date has passed. With escalate, only
+    those that are due for a notification on the escalation schedule today.
+    """
+
+    tasks = models.Task.objects.filter(
+        completed_at__isnull=True,
+        due_date__lt=current_date
+    )
+
+    if escalate:
+        tasks = tasks.filter(get_escalation_filter(current_date))
+
+    return tasks
+
+
+def get_escalation_filter(current_date, field='due_date'):
+    """
+    Returns the condition for the overdue dates (field) that are notified
+    today on the escalation schedule: 1, 3 and 7 days after the due date
+    and weekly after that.
+    """
+
+    days_overdue = Func(
+        Value(current_date),
+        F(field),
+        template='(%(expressions)s)',
+        arg_joiner=' - ',
+        output_field=IntegerField()
+    )
+    last_day = ESCALATION_DAYS[-1]
+
+    return Q(**{
+        f'{field}__in': [
+            current_date - timezone.timedelta(days=days)
+            for days in ESCALATION_DAYS
+        ]
+    }) | Q(
+        Exact(Mod(days_overdue, ESCALATION_INTERVAL), 0),
+        **{f'{field}__lt': current_date - timezone.timedelta(days=last_day)}
+    )
+
+
+def get_unsent_logs(kind, current_date, task='task', recipient='recipient'):
+    """
+    Returns the condition for the rows whose (task, recipient) has no
+    NotificationLog of the kind and day yet (an anti-join). task and
+    recipient are the paths of the task and user profile ids in the outer
+    query.
+    """
+
+    return ~Exists(
+        models.NotificationLog.objects.filter(
+            task=OuterRef(task),
+            recipient=OuterRef(recipient),
+            kind=kind,
+            sent_on=current_date
+        )
+    )
+
+
+def iter_task_recipients(tasks, kind, current_date,
+                         batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Yields (task, [(recipient_id, email), ...]) for each of the tasks with
+    the team members of its task group that weren't notified of the kind
+    today (see NotificationLog).
+
+    The (task, team member) pairs are selected by the database with an
+    anti-join against the NotificationLog table and streamed by one query
+    in chunks of batch_size.
+
+    Example:
+    ```python
+    for task, recipients in iter_task_recipients(tasks, kind, today):
+        ...
+    ```
+    """
+
+    members = models.TaskGroup.team_members.through.objects.filter(
+        get_unsent_logs(
+            kind,
+            current_date,
+            task='taskgroup__task',
+            recipient='userprofile'
+        ),
+        taskgroup__task__in=tasks.values('id')
+    ).exclude(
+        userprofile__email=''
+    ).values_list(
+        'taskgroup__task__id',
+        'taskgroup__task__title',
+        'taskgroup__task__due_date',
+        'userprofile_id',
+        'userprofile__email'
+    ).order_by('taskgroup__task__id', 'userprofile_id')
+
+    rows = members.iterator(chunk_size=batch_size)
+
+    for task, task_rows in groupby(rows, key=lambda row: row[:3]):
+        yield NotifiedTask(*task), [row[3:] for row in task_rows]
+
+
+def get_digest_recipients(current_date, days=APPROACHING_DAYS,
+                          escalate=False):
+    """
+    Returns one row per recipient with the open approaching and overdue
+    tasks of all the task groups of the recipient that weren't part of a
+    digest today, grouped by the database:
+    {'id': ..., 'email': ...,
+     'approaching': [{'id', 'title', 'due_date'}, ...], 'overdue': [...]}
+
+    Tasks are ordered by due date. A list is None if there are no tasks
+    of its kind.
+    """
+
+    prefix = 'taskgroup_set__task__'
+    approaching = Q(**{
+        f'{prefix}completed_at__isnull': True,
+        f'{prefix}due_date__gte': current_date,
+        f'{prefix}due_date__lte': current_date + timezone.timedelta(days=days)
+    })
+    overdue = Q(**{
+        f'{prefix}completed_at__isnull': True,
+        f'{prefix}due_date__lt': current_date
+    })
+
+    if escalate:
+        overdue &= get_escalation_filter(current_date, f'{prefix}due_date')
+
+    def tasks(condition):
+        return ArrayAgg(
+            JSONObject(
+                id=F(f'{prefix}id'),
+                title=F(f'{prefix}title'),
+                due_date=F(f'{prefix}due_date')
+            ),
+            filter=condition,
+            ordering=(f'{prefix}due_date', f'{prefix}id')
+        )
+
+    return models.UserProfile.objects.exclude(
+        email=''
+    ).filter(
+        (approaching | overdue) & get_unsent_logs(
+            models.NotificationLog.DIGEST,
+            current_date,
+            task=f'{prefix}id',
+            recipient='id'
+        )
+    ).values(
+        'id', 'email'
+    ).annotate(
+        approaching=tasks(approaching),
+        overdue=tasks(overdue)
+    ).order_by('id')
+
+
+def get_due_date_message(task, current_date):
+    """Returns the (subject, message) of an approaching due date."""
+
+    subject = 'Task due date is approaching'
+    message = f'''The deadline for the task "{task.title}" with the
+                          ID: {task.id} is approaching! Due-date:
+                          {task.due_date}, Current-date: {current_date}.'''
+
+    return subject, message
+
+
+def get_overdue_message(task, current_date):
+    """Returns the (subject, message) of an overdue due date."""
+
+    subject = 'The date of the task is overdue!'
+    message = f'''The deadline for the task "{task.title}" with the
+                       ID: {task.id} is overdue! Due-date: {task.due_date},
+                       Current-date: {current_date}.'''
+
+    return subject, message
+
+
+def get_digest_message(recipient, current_date):
+    """Returns the (subject, message) of a digest recipient row."""
+
+    subject = 'Your tasks with approaching and overdue due dates'
+    lines = []
+
+    for key, title in [
+        ('approaching', 'Tasks with an approaching due date'),
+        ('overdue', 'Overdue tasks')
+    ]:
+        tasks = recipient[key] or []
+        if not tasks:
+            continue
+
+        lines.append(f'{title} ({len(tasks)}):')
+        lines.extend(
+            f'- "{task["title"]}" with the ID: {task["id"]}, '
+            f'Due-date: {task["due_date"]}'
+            for task in tasks
+        )
+        lines.append('')
+
+    lines.append(f'Current-date: {current_date}.')
+
+    return subject, '\n'.join(lines)
+
+
+def send_in_batches(messages, kind, current_date,
+                    batch_size=DEFAULT_BATCH_SIZE, connection=None,
+                    outbox=False):
+    """
+    Sends the messages, (datatuple, [(task_id, recipient_id), ...]) pairs,
+    with send_mass_mail in batches of batch_size and logs them in the
+    NotificationLog. All batches share one connection to the mail server,
+    which is opened once.
+
+    Each batch is logged and sent in one transaction, so a batch that
+    fails to send isn't logged and gets sent by the next run. With outbox,
+    the emails are added to the EmailOutbox in that transaction instead
+    (see the run_outbox_worker management command).
+
+    Returns the number of sent emails.
+
+    Example:
+    ```python
+    sent = send_in_batches(
+        [((subject, message, FROM_EMAIL, [email]), [(task_id, profile_id)])],
+        NotificationLog.OVERDUE,
+        current_date
+    )
+    ```
+    """
+
+    sent = 0
+    batch = []
+
+    def send(batch):
+        logs = [
+            models.NotificationLog(
+                task_id=task_id,
+                recipient_id=recipient_id,
+                kind=kind,
+                sent_on=current_date
+            )
+            for datatuple, keys in batch
+            for task_id, recipient_id in keys
+        ]
+
+        datatuples = [datatuple for datatuple, keys in batch]
+
+        with transaction.atomic():
+            models.NotificationLog.objects.bulk_create(
+                logs, ignore_conflicts=True
+            )
+
+            if outbox:
+                return len(models.EmailOutbox.objects.enqueue(datatuples))
+
+            return send_mass_mail(datatuples, connection=connection)
+
+    # The outbox doesn't need a connection to the mail server
+    if outbox:
+        connection = nullcontext()
+    else:
+        connection = connection or get_connection()
+
+    with connection:
+        for message in messages:
+            batch.append(message)
+
+            if len(batch) >= batch_size:
+                sent += send(batch)
+                batch = []
+
+        if batch:
+            sent += send(batch)
+
+    return sent
+
+
+def send_task_notifications(tasks, kind, get_message, current_date,
+                            batch_size=DEFAULT_BATCH_SIZE, connection=None,
+                            outbox=False):
+    """
+    Sends one email per task to the team members of the task that weren't
+    notified of the kind today, built by get_message(task, current_date).
+
+    Returns the number of sent emails.
+    """
+
+    messages = (
+        (
+            (
+                *get_message(task, current_date),
+                FROM_EMAIL,
+                [email for recipient_id, email in recipients]
+            ),
+            [(task.id, recipient_id) for recipient_id, email in recipients]
+        )
+        for task, recipients in iter_task_recipients(
+            tasks, kind, current_date, batch_size
+        )
+    )
+
+    return send_in_batches(
+        messages, kind, current_date, batch_size, connection, outbox
+    )
+
+
+def send_digests(current_date, days=APPROACHING_DAYS, escalate=False,
+                 batch_size=DEFAULT_BATCH_SIZE, connection=None,
+                 outbox=False):
+    """
+    Sends one email per recipient with all of the approaching and overdue
+    tasks of the recipient (see get_digest_recipients).
+
+    Returns the number of sent emails.
+    """
+
+    recipients = get_digest_recipients(current_date, days, escalate)
+
+    messages = (
+        (
+            (
+                *get_digest_message(recipient, current_date),
+                FROM_EMAIL,
+                [recipient['email']]
+            ),
+            [
+                (task['id'], recipient['id'])
+                for task in (recipient['approaching'] or []) +
+                (recipient['overdue'] or [])
+            ]
+        )
+        for recipient in recipients.iterator(chunk_size=batch_size)
+    )
+
+    return send_in_batches(
+        messages,
+        models.NotificationLog.DIGEST,
+        current_date,
+        batch_size,
+        connection,
+        outbox
+    )
+
+
+def get_reminder_emails(reminder):
+    """Returns the emails of the team members of the task of a reminder."""
+
+    task_group = reminder.task.task_group
+    if task_group is None:
+        return []
+
+    return [
+        member.email for member in task_group.team_members.all()
+        if member.email
+    ]
+
+
+def send_reminders(now=None, batch_size=DEFAULT_BATCH_SIZE, connection=None,
+                   outbox=False):
+    """
+    Sends one email per Reminder that fired until now to the team members
+    of its task and marks the reminders as sent.
+
+    Only the unsent reminders that are due are read (see
+    Reminder.objects.claim), so the cost doesn't grow with the number of
+    tasks. Each batch is claimed, sent and marked in one transaction,
+    concurrent runs skip the batches of each other.
+
+    Returns the number of sent emails.
+    """
+
+    now = now or timezone.now()
+    current_date = timezone.localdate(now)
+    sent = 0
+
+    # The outbox doesn't need a connection to the mail server
+    if outbox:
+        connection = nullcontext()
+    else:
+        connection = connection or get_connection()
+
+    with connection:
+        while True:
+            with transaction.atomic():
+                reminders = models.Reminder.objects.claim(now, batch_size)
+                if not reminders:
+                    break
+
+                datatuples = []
+                for reminder in reminders:
+                    emails = get_reminder_emails(reminder)
+                    if emails:
+                        datatuples.append((
+                            *get_due_date_message(reminder.task, current_date),
+                            FROM_EMAIL,
+                            emails
+                        ))
+
+                if outbox:
+                    sent += len(models.EmailOutbox.objects.enqueue(datatuples))
+                else:
+                    sent += send_mass_mail(datatuples, connection=connection)
+
+                models.Reminder.objects.filter(
+                    id__in=[reminder.id for reminder in reminders]
+                ).update(sent_at=now)
+
+    return sent
@@ -0,0 +1,95 @@
+from django.core.mail import EmailMessage
+from django.db import transaction
+from django.utils import timezone
+from api import models
+
+# Number of emails claimed per transaction
+DEFAULT_BATCH_SIZE = 100
+
+# Attempts after which an email is marked as failed
+MAX_ATTEMPTS = 5
+
+# Delay before the first retry, doubled for every further attempt
+RETRY_DELAY = timezone.timedelta(minutes=1)
+MAX_RETRY_DELAY = timezone.timedelta(hours=1)
+
+
+def get_retry_delay(attempts):
+    """Returns the delay before the next attempt after (attempts) failed
+    attempts."""
+
+    return min(RETRY_DELAY * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+
+
+def send_batch(connection, batch_size=DEFAULT_BATCH_SIZE,
+               max_attempts=MAX_ATTEMPTS):
+    """
+    Claims the next (batch_size) due emails of the outbox, sends them over
+    the (already opened) mail connection and records the results.
+
+    The rows stay locked until the results are committed, so no other
+    worker sends them at the same time. If the worker dies, the rows are
+    unlocked and sent by the next worker. A failed email is retried after
+    an exponential backoff and marked as failed after (max_attempts)
+    attempts.
+
+    Returns the numbers of (sent, failed) emails.
+
+    Example:
+    ```python
+    with get_connection() as connection:
+        sent, failed = send_batch(connection)
+    ```
+    """
+
+    with transaction.atomic():
+        emails = models.EmailOutbox.objects.claim(batch_size)
+        now = timezone.now()
+        sent_ids = []
+        failed_emails = []
+
+        for email in emails:
+            message = EmailMessage(
+                email.subject,
+                email.body,
+                email.from_email,
+                email.recipients,
+                connection=connection
+            )
+
+            try:
+                # Keeps the connection open across messages and batches
+                # (only opens it if it isn't open yet)
+                connection.open()
+                message.send()
+            except Exception as error:
+                # The connection may be broken, the next message reopens it
+                connection.close()
+
+                email.attempts += 1
+                email.last_error = f'{type(error).__name__}: {error}'
+
+                if email.attempts >= max_attempts:
+                    email.status = models.EmailOutbox.FAILED
+                else:
+                    email.available_at = now + get_retry_delay(email.attempts)
+
+                failed_emails.append(email)
+
+            else:
+                sent_ids.append(email.id)
+
+        if sent_ids:
+            models.EmailOutbox.objects.filter(id__in=sent_ids).update(
+                status=models.EmailOutbox.SENT,
+                sent_at=now
+            )
+
+        if failed_emails:
+            models.EmailOutbox.objects.bulk_update(
+                failed_emails,
+                ['status', 'attempts', 'available_at', 'last_error']
+            )
+
+    return len(sent_ids), len(failed_emails)
+
@@ -0,0 +1,290 @@
+import json
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from datetime import date, datetime
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination that seeks to the next page with a WHERE clause over
+    a stable (ordering field, id) ordering instead of an OFFSET. Page N+1
+    costs the same as page 1 and no COUNT(*) is ever executed.
+
+    The ordering field comes from the OrderingFilter of the view (only the
+    first field is used) and falls back to the 'ordering' attribute. The id
+    is always appended as tie-breaker. Nulls are placed the way PostgreSQL
+    sorts them (last for ascending, first for descending), so an index over
+    (field, id) can be scanned in both directions.
+
+    The cursor is an opaque base64 string with the position of the last
+    (or first) row of the current page.
+    """
+
+    cursor_query_param = 'cursor'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    ordering = 'due_date'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.field, self.descending = self.get_ordering(
+            request, queryset, view
+        )
+        self.attname = self.get_attname(queryset, self.field)
+        self.base_url = request.build_absolute_uri()
+
+        cursor = self.decode_cursor(request, queryset)
+
+        if cursor is None:
+            value, pk, reverse = None, None, False
+        else:
+            value, pk, reverse = cursor
+
+        # Previous pages are fetched in the opposite direction and flipped
+        descending = self.descending != reverse
+        queryset = queryset.order_by(*self.get_order_by(descending))
+
+        if cursor is not None:
+            queryset = queryset.filter(
+                self.get_seek_filter(value, pk, descending)
+            )
+
+        # One extra row tells if there is another page in that direction
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if reverse:
+            results.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {
+                    'type': 'string',
+                    'nullable': True,
+                    'format': 'uri',
+                },
+                'previous': {
+                    'type': 'string',
+                    'nullable': True,
+                    'format': 'uri',
+                },
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        """
+        Returns the page size requested by the client within the
+        max_page_size boundary or the default page size.
+        """
+
+        if self.page_size_query_param:
+            try:
+                return _positive_int(
+                    request.query_params[self.page_size_query_param],
+                    strict=True,
+                    cutoff=self.max_page_size
+                )
+            except (KeyError, ValueError):
+                pass
+
+        return self.page_size
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Returns the ordering field and whether it is descending. Defers to
+        the first filter backend of the view that returns an ordering from
+        get_ordering (e.g. OrderingFilter or the rank of TaskSearchFilter).
+        """
+
+        ordering = None
+
+        for backend in getattr(view, 'filter_backends', []):
+            if hasattr(backend, 'get_ordering'):
+                ordering = backend().get_ordering(request, queryset, view)
+                if ordering:
+                    break
+
+        if not ordering:
+            ordering = self.ordering
+
+        if isinstance(ordering, str):
+            ordering = [ordering]
+
+        field = ordering[0]
+        return field.lstrip('-'), field.startswith('-')
+
+    def get_attname(self, queryset, field):
+        """
+        Returns the column attribute of the ordering field (e.g.
+        'category_id' for 'category').
+        """
+
+        if field in ('pk', 'id'):
+            return 'pk'
+
+        try:
+            return queryset.model._meta.get_field(field).attname
+        except FieldDoesNotExist:
+            # Annotations are read from the instance as they are
+            return field
+
+    def get_order_by(self, descending):
+        prefix = '-' if descending else ''
+
+        if self.attname == 'pk':
+            return [f'{prefix}pk']
+
+        return [f'{prefix}{self.attname}', f'{prefix}pk']
+
+    def get_seek_filter(self, value, pk, descending):
+        """
+        Returns the condition for the rows that come after the position
+        (value, pk) in the given direction.
+        """
+
+        after = 'lt' if descending else 'gt'
+
+        if self.attname == 'pk':
+            return Q(**{f'pk__{after}': pk})
+
+        field = self.attname
+        same_value_after = Q(**{f'pk__{after}': pk})
+
+        # Ascending: values first, nulls last
+        # Descending: nulls first, values last
+        if value is None:
+            seek = Q(**{f'{field}__isnull': True}) & same_value_after
+
+            if descending:
+                seek |= Q(**{f'{field}__isnull': False})
+
+        else:
+            seek = Q(**{f'{field}__{after}': value}) | \
+                (Q(**{field: value}) & same_value_after)
+
+            if not descending:
+                seek |= Q(**{f'{field}__isnull': True})
+
+        return seek
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+
+        if not self.page:
+            # Nothing left in this direction, go back to the first page
+            return remove_query_param(
+                self.base_url, self.cursor_query_param
+            )
+
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+
+        if not self.page:
+            # Nothing left in this direction, go back to the first page
+            return remove_query_param(
+                self.base_url, self.cursor_query_param
+            )
+
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def decode_cursor(self, request, queryset):
+        """
+        Returns the (value, pk, reverse) tuple of the cursor query param
+        or None for the first page. The value is converted to the type of
+        the ordering field, a tampered cursor responds with 404.
+        """
+
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            cursor = json.loads(b64decode(encoded.encode('ascii')))
+            value, pk, reverse = cursor['v'], cursor['i'], bool(cursor['r'])
+
+            if not self.is_bigint(pk):
+                raise ValueError('Invalid cursor id')
+
+            value = self.to_python(queryset, value)
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return value, pk, reverse
+
+    def to_python(self, queryset, value):
+        """
+        Converts a value of a cursor to the type of the ordering field.
+        Raises ValidationError, TypeError or ValueError for invalid values.
+        """
+
+        if value is None or self.attname == 'pk':
+            return value
+
+        try:
+            field = queryset.model._meta.get_field(self.field)
+        except FieldDoesNotExist:
+            # Annotations (e.g. the search rank) are numbers
+            if isinstance(value, bool) or \
+                    not isinstance(value, (int, float)):
+                raise TypeError('Invalid cursor value')
+            return value
+
+        value = field.to_python(value)
+
+        if isinstance(value, int) and not self.is_bigint(value):
+            raise ValueError('Invalid cursor value')
+
+        return value
+
+    def is_bigint(self, value):
+        """Checks if the value is an int within the bigint range."""
+
+        return isinstance(value, int) and not isinstance(value, bool) and \
+            -2 ** 63 <= value < 2 ** 63
+
+    def encode_cursor(self, instance, reverse):
+        value = getattr(instance, self.attname)
+
+        if isinstance(value, (date, datetime)):
+            value = value.isoformat()
+
+        cursor = {'v': value, 'i': instance.pk, 'r': reverse}
+        encoded = b64encode(
+            json.dumps(cursor, separators=(',', ':')).encode('utf-8')
+        ).decode('ascii')
+
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded
+        )
@@ -5,6 +5,35 @@ from django.contrib.auth import get_user_model
 User = get_user_model()
 
 
+def get_task_group_ids(request):
+    """
+    Returns the set of ids of the task groups in which the request user is
+    a team member.
+
+    The set is computed by a single query once per request and stored on
+    the request, so serializers and permissions can check membership with
+    a set lookup (e.g. task.task_group_id in get_task_group_ids(request)).
+    """
+
+    user = request.user
+    cached = getattr(request, '_task_group_ids', None)
+
+    if cached is not None and cached[0] == user.pk:
+        return cached[1]
+
+    if user.is_authenticated and hasattr(user, 'profile'):
+        task_group_ids = frozenset(
+            models.TaskGroup.team_members.through.objects.filter(
+                userprofile=user.profile
+            ).values_list('taskgroup_id', flat=True)
+        )
+    else:
+        task_group_ids = frozenset()
+
+    request._task_group_ids = (user.pk, task_group_ids)
+    return task_group_ids
+
+
 class IsTaskManager(permissions.BasePermission):
     """Allows access only to task manager."""
 
@@ -52,7 +81,7 @@ class IsTeamMember(permissions.BasePermission):
 
         if request and request.user.is_authenticated:
             if isinstance(obj, models.TaskResource):
-                if request.user.profile\
-                        in obj.task.task_group.team_members.all():
+                if obj.task is not None and obj.task.task_group_id\
+                        in get_task_group_ids(request):
 
                     return True
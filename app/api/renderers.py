@@ -0,0 +1,100 @@
+import csv
+import json
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class StreamRenderer(BaseRenderer):
+    """
+    Base class of the renderers of streamed exports. render_stream turns an
+    iterable of representations (dicts) into an iterable of encoded chunks,
+    one per row, so a StreamingHttpResponse never holds more than one row.
+    render renders complete data (e.g. error responses) the same way.
+    """
+
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        if not isinstance(data, list):
+            data = [data]
+
+        rows = [
+            row if isinstance(row, dict) else {'detail': row} for row in data
+        ]
+        return b''.join(self.render_stream(rows))
+
+    def render_stream(self, rows, fields=None):
+        raise NotImplementedError(
+            '.render_stream() must be implemented.'
+        )
+
+
+class NDJSONRenderer(StreamRenderer):
+    """
+    Renders newline delimited JSON: one JSON object per line.
+    """
+
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def render_stream(self, rows, fields=None):
+        for row in rows:
+            yield json.dumps(
+                row,
+                cls=JSONEncoder,
+                ensure_ascii=False,
+                separators=(',', ':')
+            ).encode(self.charset) + b'\n'
+
+
+class CSVRenderer(StreamRenderer):
+    """
+    Renders CSV with a header line of the field names. Nested values are
+    written as JSON and list values are joined by the list_separator.
+
+    The field names default to the keys of the first row.
+    """
+
+    media_type = 'text/csv'
+    format = 'csv'
+    list_separator = ';'
+
+    class Line:
+        """File-like object whose write returns the written line."""
+
+        def write(self, value):
+            return value
+
+    def render_stream(self, rows, fields=None):
+        writer = csv.writer(self.Line())
+
+        if fields is not None:
+            yield writer.writerow(fields).encode(self.charset)
+
+        for row in rows:
+            if fields is None:
+                fields = list(row)
+                yield writer.writerow(fields).encode(self.charset)
+
+            yield writer.writerow(
+                [self.get_value(row.get(field)) for field in fields]
+            ).encode(self.charset)
+
+    def get_value(self, value):
+        """Returns the CSV cell of a value of a representation."""
+
+        if value is None:
+            return ''
+
+        if isinstance(value, (list, tuple)):
+            return self.list_separator.join(
+                str(self.get_value(item)) for item in value
+            )
+
+        if isinstance(value, dict):
+            return json.dumps(value, cls=JSONEncoder, ensure_ascii=False)
+
+        return value
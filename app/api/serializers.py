@@ -1,15 +1,187 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from api import models
+from api import models, permissions, lookups, services
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
 from django.utils import timezone
+from django.utils.encoding import smart_str
+from django.utils.functional import cached_property
+from rest_framework.permissions import SAFE_METHODS
 from rest_framework.exceptions import ValidationError
 from django.contrib.auth.hashers import make_password
 
 User = get_user_model()
 
 
+# Serializer fields
+class CachedSlugRelatedField(serializers.SlugRelatedField):
+    """
+    A slug-related field for the small lookup tables (Priority, Status,
+    Category, Position) that resolves slugs from the versioned lookup cache
+    (see api/lookups.py) instead of querying the database on every write.
+    """
+
+    def to_internal_value(self, data):
+        model = self.get_queryset().model
+
+        try:
+            return lookups.resolve(model, self.slug_field, data)
+        except ObjectDoesNotExist:
+            self.fail(
+                'does_not_exist',
+                slug_name=self.slug_field,
+                value=smart_str(data)
+            )
+        except (TypeError, ValueError, model.MultipleObjectsReturned):
+            self.fail('invalid')
+
+
+class PrefetchedSlugRelatedField(serializers.SlugRelatedField):
+    """
+    A slug-related field for larger tables (e.g. UserProfile) whose slugs
+    are resolved from the instances a PrefetchSlugsListSerializer fetched
+    for all items of a many=True serializer, with one query per field
+    instead of one per item. Single items query like a SlugRelatedField.
+    """
+
+    def get_prefetch_key(self):
+        return (self.get_queryset().model._meta.label_lower, self.slug_field)
+
+    def to_internal_value(self, data):
+        prefetched = self.context.get('prefetched_slugs', {}).get(
+            self.get_prefetch_key()
+        )
+
+        try:
+            if prefetched is None or data not in prefetched[0]:
+                return super().to_internal_value(data)
+        except TypeError:
+            self.fail('invalid')
+
+        slugs, instances = prefetched
+
+        if data not in instances:
+            self.fail(
+                'does_not_exist',
+                slug_name=self.slug_field,
+                value=smart_str(data)
+            )
+
+        # Shared by several rows, like get() raising MultipleObjectsReturned
+        if instances[data] is None:
+            self.fail('invalid')
+
+        return instances[data]
+
+
+# Serializer mixins
+class SparseFieldsMixin:
+    """
+    Trims the fields of a serializer to the sparse fieldset of read
+    requests: ?fields= keeps only the listed fields and ?omit= drops the
+    listed fields (comma separated names, e.g. ?fields=id,title,status).
+    Unknown names are ignored.
+
+    Write requests always use all fields, so no input is dropped silently.
+    The views load only the columns and relations of the remaining fields
+    (see views.SparseFieldsViewMixin).
+    """
+
+    fields_param = 'fields'
+    omit_param = 'omit'
+
+    @cached_property
+    def fields(self):
+        fields = super().fields
+
+        for name in self.get_omitted_field_names(list(fields)):
+            del fields[name]
+
+        return fields
+
+    def get_omitted_field_names(self, names):
+        """Returns the names of the fields that were not requested."""
+
+        request = self.context.get('request')
+
+        # Only the serializer of the view is trimmed, not nested ones
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+
+        if request is None or parent is not None or \
+                request.method not in SAFE_METHODS:
+            return []
+
+        requested = self.get_param_names(request, self.fields_param)
+        omitted = self.get_param_names(request, self.omit_param)
+
+        return [
+            name for name in names
+            if (requested and name not in requested) or name in omitted
+        ]
+
+    def get_param_names(self, request, param):
+        """Returns the set of field names of a query param."""
+
+        # Plain Django requests (e.g. in tests) have no query_params
+        query_params = getattr(request, 'query_params', request.GET)
+        value = query_params.get(param, '')
+        return {name.strip() for name in value.split(',') if name.strip()}
+
+
+# List serializers
+class PrefetchSlugsListSerializer(serializers.ListSerializer):
+    """
+    Validates many items with one query per PrefetchedSlugRelatedField of
+    the child serializer (also many=True ones): the slugs of all items are
+    fetched at once and shared with the fields through the context.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self.context['prefetched_slugs'] = self.prefetch_slugs(data)
+
+        return super().to_internal_value(data)
+
+    def prefetch_slugs(self, data):
+        """
+        Returns {(model label, slug_field): (slugs, {slug: instance})} of
+        the slugs in the data. Slugs of several rows map to None.
+        """
+
+        prefetched = {}
+
+        for field in self.child.fields.values():
+            relation = getattr(field, 'child_relation', field)
+
+            if field.read_only or \
+                    not isinstance(relation, PrefetchedSlugRelatedField):
+                continue
+
+            slugs = set()
+            for item in data:
+                value = item.get(field.field_name) \
+                    if isinstance(item, dict) else None
+                values = value if isinstance(value, list) else [value]
+                slugs.update(
+                    value for value in values if isinstance(value, str)
+                )
+
+            instances = {}
+            for instance in relation.get_queryset().filter(**{
+                f'{relation.slug_field}__in': slugs
+            }):
+                slug = getattr(instance, relation.slug_field)
+                instances[slug] = None if slug in instances else instance
+
+            prefetched[relation.get_prefetch_key()] = (slugs, instances)
+
+        return prefetched
+
+
 # Modelserializer
-class CustomUserSerializer(serializers.ModelSerializer):
+class CustomUserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the CustomUser model.
 
@@ -60,7 +232,7 @@ class CustomUserSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class PrioritySerializer(serializers.ModelSerializer):
+class PrioritySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the Priority model.
     """
@@ -70,7 +242,7 @@ class PrioritySerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class StatusSerializer(serializers.ModelSerializer):
+class StatusSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the Status model.
     """
@@ -80,7 +252,7 @@ class StatusSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the Category model.
     """
@@ -90,7 +262,7 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class PositionSerializer(serializers.ModelSerializer):
+class PositionSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the Position model.
 
@@ -98,7 +270,7 @@ class PositionSerializer(serializers.ModelSerializer):
         category: A slug-related field representing the related category.
     """
 
-    category = serializers.SlugRelatedField(
+    category = CachedSlugRelatedField(
         queryset=models.Category.objects.all(),
         slug_field='name'
     )
@@ -108,7 +280,7 @@ class PositionSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the UserProfile model.
 
@@ -119,7 +291,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
         owner: A slug-related field representing the owner of the profile.
     """
 
-    position = serializers.SlugRelatedField(
+    position = CachedSlugRelatedField(
         queryset=models.Position.objects.all(),
         slug_field='title'
     )
@@ -162,7 +334,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
             return fields
 
 
-class TaskGroupSerializer(serializers.ModelSerializer):
+class TaskGroupSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the TaskGroup model.
 
@@ -223,18 +395,18 @@ class TaskGroupSerializer(serializers.ModelSerializer):
             return data
 
         # If the request user profile is a team member of the task group.
-        elif request.user.profile in instance.team_members.all():
+        elif instance.id in permissions.get_task_group_ids(request):
 
             return data
 
 
-class TaskSerializer(serializers.ModelSerializer):
+class TaskSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the Task model.
 
     This serializer handles the Task model with custom behavior such as
-    read-only fields for non-staff users and restrictions on visibility
-    based on team membership.
+    read-only fields for non-staff users. Visibility based on team
+    membership is handled by the queryset of the task view.
 
     Attributes:
         owner: A slug-related field representing the owner of the task.
@@ -245,32 +417,35 @@ class TaskSerializer(serializers.ModelSerializer):
                              associated with the task.
     """
 
-    owner = serializers.SlugRelatedField(
+    owner = PrefetchedSlugRelatedField(
         queryset=models.UserProfile.objects.all(),
         slug_field='email',
         required=False
     )
-    category = serializers.SlugRelatedField(
+    category = CachedSlugRelatedField(
         queryset=models.Category.objects.all(),
         slug_field='name'
     )
-    priority = serializers.SlugRelatedField(
+    priority = CachedSlugRelatedField(
         queryset=models.Priority.objects.all(),
         slug_field='caption'
     )
-    status = serializers.SlugRelatedField(
+    status = CachedSlugRelatedField(
         queryset=models.Status.objects.all(),
         slug_field='caption'
     )
-    taskresource_set = serializers.SlugRelatedField(
+    taskresource_set = PrefetchedSlugRelatedField(
         queryset=models.TaskResource.objects.all(),
         many=True,
-        slug_field='title',
+        slug_field='source_name',
         required=False
     )
 
     class Meta:
         model = models.Task
+        # The bulk action validates the owners and resources of all tasks
+        # with one query each
+        list_serializer_class = PrefetchSlugsListSerializer
         fields = [
             'id', 'title', 'description', 'due_date', 'category', 'priority',
             'status', 'owner', 'task_group', 'taskresource_set',
@@ -291,6 +466,11 @@ class TaskSerializer(serializers.ModelSerializer):
 
             current_date = timezone.now()
 
+            # The due_date field holds dates, which can't be compared to
+            # datetimes
+            if not isinstance(due_date, timezone.datetime):
+                current_date = current_date.date()
+
             if due_date <= current_date:
                 raise ValidationError(
                     '''
@@ -300,6 +480,39 @@ class TaskSerializer(serializers.ModelSerializer):
 
         return due_date
 
+    def create(self, validated_data):
+        """
+        Creates the task together with its task group and initial status
+        (see services.create_task).
+        """
+
+        validated_data = dict(validated_data)
+        resources = validated_data.pop('taskresource_set', None)
+
+        return services.create_task(
+            models.Task(**validated_data),
+            resources=resources
+        )
+
+    def update(self, instance, validated_data):
+        """
+        Updates the task in one transaction that locks its row first (see
+        services.lock_task), assigning its task resources (if given)
+        through services.assign_resources.
+        """
+
+        validated_data = dict(validated_data)
+        resources = validated_data.pop('taskresource_set', None)
+
+        with transaction.atomic():
+            services.lock_task(instance)
+            instance = super().update(instance, validated_data)
+
+            if resources is not None:
+                services.assign_resources(instance, resources)
+
+        return instance
+
     def get_fields(self):
         """Sets certain fields to read_only for non-staff users."""
 
@@ -318,24 +531,9 @@ class TaskSerializer(serializers.ModelSerializer):
 
             return fields
 
-    def to_representation(self, instance):
-        """Restricts users from seeing tasks in which they are not a team
-        member, except for staff users.."""
-
-        request = self.context.get('request')
-        data = super().to_representation(instance)
-
-        if request and request.user.is_staff:
-            return data
-
-        else:
-            if request.user.profile in\
-                    instance.task_group.team_members.all():
-
-                return data
-
 
-class TaskResourceSerializer(serializers.ModelSerializer):
+class TaskResourceSerializer(SparseFieldsMixin,
+                             serializers.ModelSerializer):
     """
     Serializer for the TaskResource model.
 
@@ -381,8 +579,8 @@ class TaskResourceSerializer(serializers.ModelSerializer):
                 task_instance = value
 
                 # Check if the user is a team member of the selected task
-                if request.user.profile not in\
-                        task_instance.task_group.team_members.all():
+                if task_instance.task_group_id not in\
+                        permissions.get_task_group_ids(request):
                     raise ValidationError(
                         '''The requesting user is not a member of the selected task's
                         team.'''
@@ -407,8 +605,8 @@ class TaskResourceSerializer(serializers.ModelSerializer):
 
             return data
 
-        elif request.user.profile\
-                in instance.task.task_group.team_members.all():
+        elif instance.task is not None and instance.task.task_group_id\
+                in permissions.get_task_group_ids(request):
 
             return data
 
@@ -471,7 +669,10 @@ class StatusChangeSerializer(serializers.Serializer):
                 validated_data.get('due_date') is not None:
 
             current_date = timezone.now().date()
-            due_date = validated_data.get('due_date')
+
+            # Tasks only store the date of the due_date
+            due_date = timezone.localdate(validated_data.get('due_date'))
+            validated_data['due_date'] = due_date
 
             if due_date <= current_date:
                 raise ValidationError(
@@ -484,11 +685,32 @@ class StatusChangeSerializer(serializers.Serializer):
 
     def update(self, instance, validated_data):
         """
-        Updates the fields of the task instance.
+        Updates the fields of the task instance. Saving the instance moves
+        it to its new row of the TaskStatsDaily rollup (see
+        signals.update_task_stats), its row is locked before (see
+        services.lock_task).
         """
-        instance.status = validated_data.get('status')
-        instance.due_date = validated_data.get('due_date')
-        instance.completed_at = validated_data.get('completed_at')
-        instance.save()
+        status = services.get_status(validated_data.get('status'))
+
+        with transaction.atomic():
+            services.lock_task(instance)
+            instance.status = status
+            instance.due_date = validated_data.get('due_date')
+            instance.completed_at = validated_data.get('completed_at')
+            instance.save()
 
         return instance
+
+
+class BulkStatusChangeSerializer(StatusChangeSerializer):
+    """
+    A custom serializer for the bulk change_status view action of the task
+    view. Validates the ids of the tasks besides the fields of the
+    StatusChangeSerializer.
+    """
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=1000
+    )
@@ -0,0 +1,312 @@
+from collections import Counter
+from django.db import transaction
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+from api import models, lookups
+
+# Number of positions that are suggested for the task group of a new task
+SUGGESTED_POSITIONS = 4
+
+# Number of rows per INSERT statement of the bulk creation
+BULK_BATCH_SIZE = 500
+
+
+def get_status(caption):
+    """
+    Returns the status with the caption. Creates it if it doesn't exist
+    yet.
+
+    Example:
+    ```python
+    in_progress_status = get_status('In Progress')
+    ```
+    """
+
+    try:
+        return lookups.resolve(models.Status, 'caption', caption)
+    except models.Status.DoesNotExist:
+        status, created = models.Status.objects.get_or_create(
+            caption=caption
+        )
+        return status
+    except models.Status.MultipleObjectsReturned:
+        return models.Status.objects.filter(
+            caption=caption
+        ).order_by('id').first()
+
+
+def get_suggested_positions(category_ids):
+    """
+    Returns the ids of the first positions (by id) of each category as
+    {category_id: [position_id, ...]} with a single query.
+    """
+
+    if not category_ids:
+        return {}
+
+    positions = models.Position.objects.filter(
+        category_id__in=category_ids
+    ).annotate(
+        row_number=Window(
+            RowNumber(),
+            partition_by=[F('category_id')],
+            order_by=F('id').asc()
+        )
+    ).filter(
+        row_number__lte=SUGGESTED_POSITIONS
+    ).order_by('category_id', 'id').values_list('category_id', 'id')
+
+    suggested_positions = {}
+    for category_id, position_id in positions:
+        suggested_positions.setdefault(category_id, []).append(position_id)
+
+    return suggested_positions
+
+
+def create_task_groups(tasks, batch_size=BULK_BATCH_SIZE):
+    """
+    Creates a TaskGroup for each of the (unsaved) tasks, with the owner of
+    the task as team member and the first positions of its category as
+    suggested positions. Uses one statement per table for all tasks.
+    """
+
+    task_groups = models.TaskGroup.objects.bulk_create(
+        [models.TaskGroup(name=f'TaskGroup of {task.title}') for task in tasks],
+        batch_size=batch_size
+    )
+
+    suggested_positions = get_suggested_positions({
+        task.category_id for task in tasks if task.category_id is not None
+    })
+
+    team_members = []
+    group_positions = []
+    TeamMember = models.TaskGroup.team_members.through
+    SuggestedPosition = models.TaskGroup.suggested_positions.through
+
+    for task, task_group in zip(tasks, task_groups):
+        task.task_group = task_group
+
+        if task.owner_id is not None:
+            team_members.append(TeamMember(
+                taskgroup_id=task_group.id,
+                userprofile_id=task.owner_id
+            ))
+
+        for position_id in suggested_positions.get(task.category_id, []):
+            group_positions.append(SuggestedPosition(
+                taskgroup_id=task_group.id,
+                position_id=position_id
+            ))
+
+    if team_members:
+        TeamMember.objects.bulk_create(team_members, batch_size=batch_size)
+
+    if group_positions:
+        SuggestedPosition.objects.bulk_create(
+            group_positions, batch_size=batch_size
+        )
+
+    return task_groups
+
+
+def create_task(task, resources=None):
+    """
+    Saves a new task in one transaction:
+    - Creates its TaskGroup first (unless it already has one), with the
+      owner as team member and the first positions of the category as
+      suggested positions.
+    - Sets its status to 'In Progress' if it has none.
+    - Inserts the task once, with the task group and status already set.
+    - Assigns the task resources (if given) to the task.
+
+    Example:
+    ```python
+    task = create_task(Task(title='...', owner=profile, ...))
+    ```
+    """
+
+    with transaction.atomic():
+        if task.status_id is None:
+            task.status = get_status('In Progress')
+
+        if task.task_group_id is None:
+            create_task_groups([task])
+
+        task.save()
+
+        if resources is not None:
+            assign_resources(task, resources)
+
+    return task
+
+
+def lock_task(task):
+    """
+    Locks the row of the (saved) task until the end of the transaction and
+    reloads the stored values that its save compares against: the
+    TaskStatsDaily row and the reminder schedule it was loaded with (see
+    signals). A concurrent save committed since the task was loaded would
+    otherwise make the save move the count from the wrong rollup row.
+
+    Has to run in the transaction that saves the task.
+
+    Example:
+    ```python
+    with transaction.atomic():
+        lock_task(task)
+        task.status = get_status('Completed')
+        task.save()
+    ```
+    """
+
+    stored_task = models.Task.objects.select_for_update().only(
+        'owner', 'status', 'created_at', 'completed_at', 'due_date'
+    ).get(pk=task.pk)
+
+    task._stats_key = stored_task._stats_key
+    task._reminder_key = stored_task._reminder_key
+
+    return task
+
+
+def assign_resources(task, resources):
+    """
+    Makes the resources the task resources of the (saved) task, like
+    task.taskresource_set.set(resources), and bumps the updated_at of the
+    changed resources and of the tasks that lose or gain one, which the
+    bulk updates of set() don't do.
+    """
+
+    resource_ids = [resource.pk for resource in resources]
+    now = timezone.now()
+
+    with transaction.atomic():
+        models.Task.objects.filter(
+            Q(pk=task.pk) | Q(taskresource__in=resource_ids)
+        ).update(updated_at=now)
+        models.TaskResource.objects.filter(
+            Q(task=task) | Q(pk__in=resource_ids)
+        ).update(updated_at=now)
+
+        task.taskresource_set.set(resources)
+
+
+def bulk_create_tasks(tasks_data, batch_size=BULK_BATCH_SIZE):
+    """
+    Creates the tasks of the validated data (a list of dicts, e.g. the
+    validated_data of a TaskSerializer(many=True)) in one transaction.
+
+    Does what create_task does for a single task, but with a constant
+    number of statements per batch instead of several per task. Signal
+    handlers don't run for the created rows, the tasks are added to the
+    TaskStatsDaily rollup, their reminders are scheduled and the previous
+    tasks of the moved resources are bumped (updated_at) directly.
+
+    Example:
+    ```python
+    serializer = TaskSerializer(data=data, many=True)
+    serializer.is_valid(raise_exception=True)
+    tasks = bulk_create_tasks(serializer.validated_data)
+    ```
+    """
+
+    tasks = []
+    task_resources = []
+    in_progress_status = None
+
+    for data in tasks_data:
+        data = dict(data)
+        resources = data.pop('taskresource_set', [])
+
+        task = models.Task(**data)
+
+        if task.status_id is None:
+            if in_progress_status is None:
+                in_progress_status = get_status('In Progress')
+            task.status = in_progress_status
+
+        tasks.append(task)
+        task_resources.append(resources)
+
+    with transaction.atomic():
+        create_task_groups(
+            [task for task in tasks if task.task_group_id is None],
+            batch_size=batch_size
+        )
+
+        models.Task.objects.bulk_create(tasks, batch_size=batch_size)
+        models.Reminder.objects.sync(tasks, replace=False)
+
+        # Moves submitted resources to their new task
+        moved_resources = []
+        previous_task_ids = set()
+        now = timezone.now()
+
+        for task, resources in zip(tasks, task_resources):
+            for resource in resources:
+                previous_task_ids.add(resource.task_id)
+                resource.task = task
+                resource.updated_at = now
+                moved_resources.append(resource)
+
+        if moved_resources:
+            models.TaskResource.objects.bulk_update(
+                moved_resources, ['task', 'updated_at'], batch_size=batch_size
+            )
+            models.Task.objects.filter(
+                pk__in=previous_task_ids - {None}
+            ).update(updated_at=now)
+
+        models.TaskStatsDaily.objects.apply_deltas(Counter(
+            models.TaskStatsDaily.objects.get_key(task) for task in tasks
+        ))
+
+    return tasks
+
+
+def change_tasks_status(tasks, status, due_date=None, completed_at=None):
+    """
+    Changes the status, due_date and completed_at of the tasks with a
+    single UPDATE statement, moves them to their new TaskStatsDaily rows
+    and reschedules their reminders.
+
+    The tasks need their id, owner, status, created_at and completed_at
+    loaded. Should run in the transaction that locked them (see
+    select_for_update), so no concurrent save moves them in between.
+    Signal handlers don't run for the updated rows.
+
+    Example:
+    ```python
+    tasks = Task.objects.select_for_update().filter(id__in=ids)
+    change_tasks_status(tasks, get_status('Archived'))
+    ```
+    """
+
+    deltas = Counter()
+    get_key = models.TaskStatsDaily.objects.get_key
+
+    for task in tasks:
+        deltas[get_key(task)] -= 1
+
+        task.status = status
+        task.due_date = due_date
+        task.completed_at = completed_at
+
+        deltas[get_key(task)] += 1
+
+    with transaction.atomic():
+        models.Task.objects.filter(
+            id__in=[task.id for task in tasks]
+        ).update(
+            status=status,
+            due_date=due_date,
+            completed_at=completed_at,
+            updated_at=timezone.now()
+        )
+
+        models.TaskStatsDaily.objects.apply_deltas(deltas)
+        models.Reminder.objects.sync(tasks)
+
+    return tasks
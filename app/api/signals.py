@@ -1,8 +1,12 @@
-from django.db.models.signals import post_save, pre_save
+from collections import defaultdict
+from django.db.models.signals import post_save, pre_save, post_init, \
+    post_delete, m2m_changed
 from django.dispatch import receiver
 from django.utils import timezone
 from django.contrib.auth import get_user_model
-from api import models
+from rest_framework.authtoken.models import Token
+from api import models, lookups
+from api.authentication import CachedTokenAuthentication
 
 User = get_user_model()
 
@@ -30,42 +34,254 @@ def create_or_update_profile(sender, instance, created, **kwargs):
         instance.profile.save()
 
 
-# Task - TaskGroup creation
+# Task - TaskStatsDaily rollup
+TASK_STATS_FIELDS = ['owner_id', 'status_id', 'completed_at', 'created_at']
+
+
+@receiver(post_init, sender=models.Task)
+def remember_task_stats_key(sender, instance, **kwargs):
+    """
+    Remembers the TaskStatsDaily row that counts the task as it was loaded,
+    so a later save can move the count without querying the old values.
+    """
+
+    if instance.pk is None:
+        instance._stats_key = None
+
+    # Deferred fields would cost a query each, pre_save loads them instead
+    elif not instance.get_deferred_fields().intersection(TASK_STATS_FIELDS):
+        instance._stats_key = models.TaskStatsDaily.objects.get_key(instance)
+
+
+@receiver(pre_save, sender=models.Task)
+def load_task_stats_key(sender, instance, **kwargs):
+    """
+    Loads the TaskStatsDaily row of a task that was loaded with deferred
+    fields before it gets overwritten.
+    """
+
+    if instance.pk is not None and not hasattr(instance, '_stats_key'):
+        stored_task = models.Task.objects.filter(
+            pk=instance.pk
+        ).only(*TASK_STATS_FIELDS).first()
+
+        instance._stats_key = getattr(stored_task, '_stats_key', None)
+
+
 @receiver(post_save, sender=models.Task)
-def create_task_group(sender, instance, created, **kwargs):
-    """Signal handler to create a new TaskGroup instance for each new Task
-    instance.
+def update_task_stats(sender, instance, **kwargs):
+    """
+    Moves the count of a saved task from its previous TaskStatsDaily row to
+    its current one.
     """
 
-    if created and not instance.task_group:
-        task_group = models.TaskGroup.objects.create(
-            name=f'TaskGroup of {instance.title}'
-        )
-        instance.task_group = task_group
+    previous_key = getattr(instance, '_stats_key', None)
+    current_key = models.TaskStatsDaily.objects.get_key(instance)
+
+    if previous_key != current_key:
+        deltas = defaultdict(int)
+        deltas[previous_key] -= 1
+        deltas[current_key] += 1
 
-        # Adds the task owner to the team member field
-        task_group.team_members.add(instance.owner)
+        models.TaskStatsDaily.objects.apply_deltas(deltas)
+
+    instance._stats_key = current_key
+
+
+@receiver(post_delete, sender=models.Task)
+def remove_task_stats(sender, instance, **kwargs):
+    """
+    Removes the count of a deleted task from its TaskStatsDaily row.
+    """
 
-        # Adds sample positions to the suggested_positions field
-        if instance.category:
-            positions = models.Position.objects.filter(
-                category=instance.category
-            ).distinct().order_by('id')[:4]
+    previous_key = getattr(instance, '_stats_key', None)
 
-            task_group.suggested_positions.add(*positions)
+    models.TaskStatsDaily.objects.apply_deltas({previous_key: -1})
 
-        instance.save()
+
+# Task - Reminder schedule
+REMINDER_FIELDS = ['due_date', 'status_id']
+
+
+@receiver(post_init, sender=models.Task)
+def remember_reminder_key(sender, instance, **kwargs):
+    """
+    Remembers the due date and status the task was loaded with, so a later
+    save only reschedules its reminders if one of them changed.
+    """
+
+    if not instance.get_deferred_fields().intersection(REMINDER_FIELDS):
+        instance._reminder_key = (instance.due_date, instance.status_id)
 
 
-# Task - created_at field
 @receiver(post_save, sender=models.Task)
-def set_status_to_in_progress(sender, instance, created, **kwargs):
+def sync_reminders(sender, instance, created, **kwargs):
+    """
+    Reschedules the reminders of a new task or a task whose due date or
+    status changed.
+    """
+
+    current_key = (instance.due_date, instance.status_id)
+
+    if created or getattr(instance, '_reminder_key', None) != current_key:
+        models.Reminder.objects.sync([instance], replace=not created)
+
+    instance._reminder_key = current_key
+
+
+# TaskGroup, Task - updated_at of the conditional GETs
+@receiver(m2m_changed, sender=models.TaskGroup.team_members.through)
+@receiver(m2m_changed, sender=models.TaskGroup.suggested_positions.through)
+def touch_task_groups(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Bumps the updated_at of the task groups whose team members or
+    suggested positions changed, which saving the group doesn't do.
+    """
+
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            task_group_ids = [instance.pk]
+        else:
+            return
+
+    # Changed from the profile / position side, e.g. profile.taskgroup_set
+    elif action in ('post_add', 'post_remove'):
+        task_group_ids = pk_set
+
+    # The cleared groups are only known before the clear
+    elif action == 'pre_clear':
+        task_group_ids = list(sender.objects.filter(**{
+            instance._meta.model_name: instance.pk
+        }).values_list('taskgroup_id', flat=True))
+    else:
+        return
+
+    models.TaskGroup.objects.filter(
+        pk__in=task_group_ids
+    ).update(updated_at=timezone.now())
+
+
+@receiver(post_init, sender=models.TaskResource)
+def remember_resource_task(sender, instance, **kwargs):
+    """
+    Remembers the task the resource was loaded with, so moving it also
+    bumps its previous task.
     """
-    Sets the status to 'In Progress' for newly created task instances.
+
+    if 'task_id' not in instance.get_deferred_fields():
+        instance._task_id = instance.task_id
+
+
+@receiver([post_save, post_delete], sender=models.TaskResource)
+def touch_resource_tasks(sender, instance, **kwargs):
+    """
+    Bumps the updated_at of the tasks that list a saved or deleted
+    resource.
+    """
+
+    task_ids = {instance.task_id, getattr(instance, '_task_id', None)}
+    task_ids.discard(None)
+
+    if task_ids:
+        models.Task.objects.filter(
+            pk__in=task_ids
+        ).update(updated_at=timezone.now())
+
+    instance._task_id = instance.task_id
+
+
+@receiver(post_init, sender=models.UserProfile)
+def remember_profile_email(sender, instance, **kwargs):
+    """
+    Remembers the email the profile was loaded with, the slug of the
+    profile in the task and task group representations.
+    """
+
+    if 'email' not in instance.get_deferred_fields():
+        instance._email = instance.email
+
+
+@receiver(post_save, sender=models.UserProfile)
+def touch_profile_tasks(sender, instance, created, **kwargs):
+    """
+    Bumps the updated_at of the tasks owned by a profile and of the task
+    groups it is a team member of when its email changed.
+    """
+
+    if not created and getattr(instance, '_email', None) != instance.email:
+        now = timezone.now()
+
+        models.Task.objects.filter(
+            owner=instance
+        ).update(updated_at=now)
+        models.TaskGroup.objects.filter(
+            team_members=instance
+        ).update(updated_at=now)
+
+    instance._email = instance.email
+
+
+# Token - CachedTokenAuthentication invalidation
+@receiver([post_save, post_delete], sender=Token)
+def invalidate_cached_token(sender, instance, **kwargs):
+    """
+    Removes a regenerated or deleted token from the token cache.
     """
 
-    if created:
-        in_progress_status, created = models.Status.objects.get_or_create(
-            caption='In Progress'
+    CachedTokenAuthentication.invalidate(instance.key)
+
+
+@receiver(post_save, sender=User)
+def invalidate_cached_user_tokens(sender, instance, created, **kwargs):
+    """
+    Removes the tokens of a changed (e.g. deactivated) user from the token
+    cache.
+    """
+
+    if not created:
+        CachedTokenAuthentication.invalidate(
+            *Token.objects.filter(user=instance).values_list('key', flat=True)
+        )
+
+
+@receiver(post_save, sender=models.UserProfile)
+def invalidate_cached_profile_tokens(sender, instance, **kwargs):
+    """
+    Removes the tokens of the owner of a changed profile from the token
+    cache, which also caches the profile.
+    """
+
+    if instance.owner_id is not None:
+        CachedTokenAuthentication.invalidate(
+            *Token.objects.filter(
+                user_id=instance.owner_id
+            ).values_list('key', flat=True)
         )
-        instance.status = in_progress_status
+
+
+@receiver([post_save, post_delete], sender=models.Position)
+def invalidate_cached_position_tokens(sender, instance, **kwargs):
+    """
+    Removes the tokens of the employees of a changed position (e.g.
+    is_task_manager) from the token cache, which also caches the position.
+    """
+
+    CachedTokenAuthentication.invalidate(
+        *Token.objects.filter(
+            user__profile__position=instance
+        ).values_list('key', flat=True)
+    )
+
+
+# Priority, Status, Category, Position - lookup cache invalidation
+@receiver([post_save, post_delete], sender=models.Priority)
+@receiver([post_save, post_delete], sender=models.Status)
+@receiver([post_save, post_delete], sender=models.Category)
+@receiver([post_save, post_delete], sender=models.Position)
+def bump_lookup_version(sender, instance, **kwargs):
+    """
+    Invalidates the cached slugs of a changed lookup table in every
+    process (see api/lookups.py).
+    """
+
+    lookups.bump_version(sender)
@@ -0,0 +1,191 @@
+from rest_framework.test import APITestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from django.db.models.signals import post_save
+from api import signals, models
+from api.authentication import CachedTokenAuthentication
+
+
+User = get_user_model()
+
+
+class TestCachedTokenAuthentication(APITestCase):
+    """Tests that are related to the cached token authentication."""
+
+    def setUp(self) -> None:
+        '''The creation of the following instances are necessary to test the
+        token authentication of the views.'''
+
+        # Deactivate signal handlers for more control over setUp instances
+        post_save.disconnect(signals.create_or_update_profile, sender=User)
+
+        # Start every test with empty token caches
+        cache.clear()
+        CachedTokenAuthentication.clear_local_cache()
+
+        # Creating user instance
+        self.regular_user = User.objects.create(
+            email='peterpahn@gmail.com',
+            password='blabla123.'
+        )
+
+        # Creating position instance
+        self.human_resource_position = models.Position.objects.create(
+            title='Human Resource Specialist',
+            description='''A Human Resource Specialist focuses on
+            recruitment, employee relations, benefits administration, and
+            workforce planning, ensuring effective management of human
+            resources within an organization.''',
+            is_task_manager=False
+        )
+
+        # Creating userprofile instance
+        self.regular_userprofile = models.UserProfile.objects.create(
+            owner=self.regular_user,
+            first_name='Peter',
+            last_name='Pahn',
+            phone_number=int('0163557799'),
+            email=self.regular_user.email,
+            position=self.human_resource_position
+        )
+
+        # Priority instance
+        self.priority = models.Priority.objects.create(
+            caption='High Priority'
+        )
+
+        # Authenticate with the token of the user
+        self.token = Token.objects.create(user=self.regular_user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def get_table_queries(self, url):
+        """
+        Requests the url and returns its queries of the token and priority
+        tables, leaving out the ones of the database cache.
+        """
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        return [
+            query['sql'] for query in queries
+            if 'FROM "authtoken_token"' in query['sql'] or
+            'FROM "api_priority"' in query['sql']
+        ]
+
+    def test_token_lookup_is_cached(self):
+        """
+        Checks if only the first request queries the token and every
+        following request is served from the cache.
+        """
+
+        url = reverse('priority-list')
+
+        # Token (+ user, profile, position) and priorities
+        self.assertEqual(len(self.get_table_queries(url)), 2)
+
+        # Token from the cache of this process, without any query
+        with self.assertNumQueries(0):
+            CachedTokenAuthentication().authenticate_credentials(
+                self.token.key
+            )
+
+        # Token and priorities (see views.LookupCacheMixin) from the cache
+        self.assertEqual(self.get_table_queries(url), [])
+
+        # The shared cache still serves the token without the local cache
+        CachedTokenAuthentication.clear_local_cache()
+        self.assertEqual(self.get_table_queries(url), [])
+
+    def test_cached_token_includes_profile_and_position(self):
+        """
+        Checks if the cached user comes with its profile and position, so
+        permission checks don't query them.
+        """
+
+        url = reverse('priority-list')
+        self.client.get(url, format='json')
+
+        authentication = CachedTokenAuthentication()
+        with self.assertNumQueries(0):
+            user, token = authentication.authenticate_credentials(
+                self.token.key
+            )
+            position = user.profile.position
+
+        self.assertEqual(token.key, self.token.key)
+        self.assertEqual(position, self.human_resource_position)
+
+    def test_deleted_token_is_invalidated(self):
+        """Checks if a deleted token can't be used anymore."""
+
+        url = reverse('priority-list')
+        response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.token.delete()
+
+        response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_is_invalidated(self):
+        """Checks if the token of a deactivated user can't be used anymore."""
+
+        url = reverse('priority-list')
+        response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.regular_user.is_active = False
+        self.regular_user.save()
+
+        response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_token_cached_before_commit_is_invalidated(self):
+        """
+        Checks if a token that a parallel request cached before the
+        deactivation of its user committed is removed on commit.
+        """
+
+        url = reverse('priority-list')
+        authentication = CachedTokenAuthentication()
+        cache_key = authentication.get_cache_key(self.token.key)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.regular_user.is_active = False
+            self.regular_user.save()
+
+            # A parallel request still reads the committed (active) user
+            token = Token.objects.select_related(
+                'user__profile__position'
+            ).get(key=self.token.key)
+            token.user.is_active = True
+            authentication.cache_token(cache_key, token)
+
+        self.assertIsNone(authentication.get_cached_token(cache_key))
+
+        response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_changed_position_is_invalidated(self):
+        """
+        Checks if a change of the position of the user is picked up by the
+        next request.
+        """
+
+        url = reverse('priority-list')
+        self.client.get(url, format='json')
+
+        self.human_resource_position.is_task_manager = True
+        self.human_resource_position.save()
+
+        authentication = CachedTokenAuthentication()
+        user, token = authentication.authenticate_credentials(self.token.key)
+
+        self.assertTrue(user.profile.position.is_task_manager)
@@ -1,8 +1,13 @@
+from io import StringIO
+from unittest import mock
 from django.core import mail
-from django.test import TestCase
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
 from django.utils import timezone
-from django.core.management import call_command
-from api import models, signals
+from django.core.management import call_command, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from api import models, notifications, services, signals
 from django.contrib.auth import get_user_model
 from django.db.models.signals import post_save
 
@@ -10,6 +15,16 @@ from django.db.models.signals import post_save
 User = get_user_model()
 
 
+class CountingEmailBackend(EmailBackend):
+    """Locmem email backend that counts its connections."""
+
+    connections = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        CountingEmailBackend.connections += 1
+
+
 class NotifyDueDatesTest(TestCase):
     """Tests that are related to the django cronjobs."""
 
@@ -18,7 +33,6 @@ class NotifyDueDatesTest(TestCase):
         django cronjobs.'''
 
         # Deactivate signal handlers
-        post_save.disconnect(signals.create_task_group, sender=models.Task)
         post_save.disconnect(signals.create_or_update_profile, sender=User)
 
         # Creating user instance 1
@@ -107,7 +121,7 @@ class NotifyDueDatesTest(TestCase):
 
     def test_notify_due_dates_command(self):
         # Call the management command
-        call_command('notify_due_dates')
+        call_command('notify_due_dates', stdout=StringIO())
 
         # Check if the email was sent to the correct recipient
         self.assertEqual(len(mail.outbox), 1)
@@ -123,7 +137,7 @@ class NotifyDueDatesTest(TestCase):
 
     def test_notify_overdue_dates_command(self):
         # Call the management command
-        call_command('notify_overdue_dates')
+        call_command('notify_overdue_dates', stdout=StringIO())
 
         # Check if the email was sent to the correct recipient
         self.assertEqual(len(mail.outbox), 1)
@@ -138,3 +152,482 @@ class NotifyDueDatesTest(TestCase):
 
         # Check if the email was not sent for the task not due soon
         self.assertNotIn(self.task_due_soon.title, sent_email.body)
+
+    # Batched sending tests
+    def seed_due_tasks(self, count, days):
+        """
+        Creates (count) tasks due in (days) days, each with its own task
+        group and the userprofile as team member.
+        """
+
+        task_groups = models.TaskGroup.objects.bulk_create(
+            models.TaskGroup(name=f'Seeded TaskGroup {i}')
+            for i in range(count)
+        )
+        models.TaskGroup.team_members.through.objects.bulk_create(
+            models.TaskGroup.team_members.through(
+                taskgroup=task_group,
+                userprofile=self.userprofile
+            )
+            for task_group in task_groups
+        )
+
+        return models.Task.objects.bulk_create(
+            models.Task(
+                title=f'Seeded Task {i}',
+                due_date=(
+                    timezone.now() + timezone.timedelta(days=days)
+                ).date(),
+                task_group=task_group
+            )
+            for i, task_group in enumerate(task_groups)
+        )
+
+    @override_settings(
+        EMAIL_BACKEND='api.tests.test_cron_jobs.CountingEmailBackend'
+    )
+    def test_notify_due_dates_sends_batches_over_one_connection(self):
+        """
+        Checks if all emails are sent over one connection and the number
+        of queries only grows per batch.
+        """
+
+        self.seed_due_tasks(24, days=3)
+        CountingEmailBackend.connections = 0
+        out = StringIO()
+
+        # One query for the 25 tasks and their team members, one insert
+        # into the ledger per batch of 10 (in a savepoint within the test)
+        with self.assertNumQueries(10):
+            call_command('notify_due_dates', batch_size=10, stdout=out)
+
+        self.assertEqual(len(mail.outbox), 25)
+        self.assertEqual(CountingEmailBackend.connections, 1)
+        self.assertIn('Sent 25 due date notifications in', out.getvalue())
+
+        for sent_email in mail.outbox:
+            self.assertEqual(sent_email.to, [self.userprofile.email])
+
+    def test_notify_overdue_dates_batches(self):
+        """
+        Checks if every overdue task is notified once whatever the batch
+        size.
+        """
+
+        tasks = self.seed_due_tasks(7, days=-3)
+        out = StringIO()
+
+        call_command('notify_overdue_dates', batch_size=3, stdout=out)
+
+        self.assertEqual(len(mail.outbox), 8)
+        self.assertIn('Sent 8 overdue notifications in', out.getvalue())
+
+        bodies = ' '.join(sent_email.body for sent_email in mail.outbox)
+        for task in [self.task_overdue, *tasks]:
+            self.assertIn(f'"{task.title}"', bodies)
+
+    def test_commands_reject_batch_sizes_below_one(self):
+        """
+        Checks if the batch size of the commands (and the other counts,
+        e.g. the days of the digest) has to be at least 1.
+        """
+
+        commands = [
+            'notify_due_dates',
+            'notify_overdue_dates',
+            'notify_digest',
+            'send_reminders',
+            'run_outbox_worker'
+        ]
+
+        for command in commands:
+            for batch_size in ['0', '-5', 'many']:
+                with self.subTest(command=command, batch_size=batch_size):
+                    with self.assertRaises(CommandError):
+                        call_command(
+                            command,
+                            f'--batch-size={batch_size}',
+                            stdout=StringIO()
+                        )
+
+        with self.assertRaises(CommandError):
+            call_command('run_outbox_worker', '--workers=0', stdout=StringIO())
+
+        with self.assertRaises(CommandError):
+            call_command(
+                'run_outbox_worker', '--max-attempts=0', stdout=StringIO()
+            )
+
+        for days in ['0', '-1']:
+            with self.assertRaises(CommandError):
+                call_command('notify_digest', f'--days={days}', stdout=StringIO())
+
+        self.assertEqual(len(mail.outbox), 0)
+
+    # Digest tests
+    def test_notify_digest_sends_one_email_per_recipient(self):
+        """
+        Checks if each team member gets one email with all of their
+        approaching and overdue tasks.
+        """
+
+        # A second team member of the overdue task only
+        user2 = User.objects.create(
+            email='christucker@gmail.com',
+            password='blabla123.'
+        )
+        userprofile2 = models.UserProfile.objects.create(
+            owner=user2,
+            first_name='Chris',
+            last_name='Tucker',
+            email=user2.email,
+            position=self.human_resource_position
+        )
+        self.task_group3.team_members.add(userprofile2)
+
+        tasks = self.seed_due_tasks(5, days=3)
+        out = StringIO()
+
+        # A single query groups the tasks per recipient, one more logs them
+        # (in a savepoint within the test)
+        with self.assertNumQueries(4):
+            call_command('notify_digest', stdout=out)
+
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertIn('Sent 2 digests in', out.getvalue())
+
+        emails = {sent_email.to[0]: sent_email for sent_email in mail.outbox}
+
+        body = emails[self.userprofile.email].body
+        self.assertIn('Tasks with an approaching due date (6):', body)
+        self.assertIn('Overdue tasks (1):', body)
+        for task in [self.task_due_soon, self.task_overdue, *tasks]:
+            self.assertIn(f'"{task.title}" with the ID: {task.id}', body)
+        self.assertNotIn(self.task_not_due_soon.title, body)
+
+        body = emails[userprofile2.email].body
+        self.assertNotIn('approaching', body)
+        self.assertIn(f'"{self.task_overdue.title}"', body)
+        self.assertIn(str(self.task_overdue.due_date), body)
+        self.assertEqual(
+            emails[userprofile2.email].from_email, 'admin@it-backends.com'
+        )
+
+    # Notification ledger tests
+    def test_notify_commands_skip_logged_notifications(self):
+        """
+        Checks if a rerun on the same day doesn't send the notifications
+        again.
+        """
+
+        for command in ['notify_due_dates', 'notify_overdue_dates',
+                        'notify_digest']:
+            call_command(command, stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 3)
+
+        logs = models.NotificationLog.objects.values_list(
+            'task', 'recipient', 'kind'
+        )
+        self.assertEqual(
+            set(logs),
+            {
+                (self.task_due_soon.id, self.userprofile.id, 'due_date'),
+                (self.task_overdue.id, self.userprofile.id, 'overdue'),
+                (self.task_due_soon.id, self.userprofile.id, 'digest'),
+                (self.task_overdue.id, self.userprofile.id, 'digest'),
+            }
+        )
+
+        for command in ['notify_due_dates', 'notify_overdue_dates',
+                        'notify_digest']:
+            call_command(command, stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_notify_due_dates_resumes_after_failed_batch(self):
+        """
+        Checks if a batch that fails to send isn't logged, so the next run
+        sends the rest without sending the first batch again.
+        """
+
+        self.seed_due_tasks(3, days=3)
+
+        sent_batches = []
+
+        def send_messages(backend, messages):
+            if sent_batches:
+                raise ConnectionError('The mail server went away')
+            sent_batches.append(messages)
+            mail.outbox.extend(messages)
+            return len(messages)
+
+        with mock.patch.object(EmailBackend, 'send_messages', send_messages):
+            with self.assertRaises(ConnectionError):
+                call_command(
+                    'notify_due_dates', batch_size=2, stdout=StringIO()
+                )
+
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(models.NotificationLog.objects.count(), 2)
+
+        # The rerun only sends the remaining tasks
+        call_command('notify_due_dates', batch_size=2, stdout=StringIO())
+
+        self.assertEqual(len(mail.outbox), 4)
+        self.assertEqual(models.NotificationLog.objects.count(), 4)
+        self.assertEqual(
+            len({sent_email.body for sent_email in mail.outbox}), 4
+        )
+
+    def test_notify_overdue_dates_escalation_schedule(self):
+        """
+        Checks if only tasks 1, 3 and 7 days and whole weeks overdue are
+        notified with the escalation schedule.
+        """
+
+        current_date = timezone.now().date()
+
+        # The task of the setUp is 1 day overdue
+        for days in [2, 3, 5, 7, 13, 14, 21, 30]:
+            task = models.Task.objects.create(
+                title=f'Overdue {days} days',
+                due_date=current_date - timezone.timedelta(days=days),
+                task_group=models.TaskGroup.objects.create(name=str(days))
+            )
+            task.task_group.team_members.set([self.userprofile])
+
+        call_command('notify_overdue_dates', escalate=True, stdout=StringIO())
+
+        notified = {
+            task.title for task in models.Task.objects.filter(
+                notification_logs__kind='overdue'
+            )
+        }
+        self.assertEqual(
+            notified,
+            {
+                self.task_overdue.title, 'Overdue 3 days', 'Overdue 7 days',
+                'Overdue 14 days', 'Overdue 21 days'
+            }
+        )
+        self.assertEqual(len(mail.outbox), 5)
+
+    # Email outbox tests
+    def test_notify_commands_queue_emails_in_outbox(self):
+        """
+        Checks if the notify commands only add the emails to the outbox and
+        the worker sends them.
+        """
+
+        out = StringIO()
+        call_command('notify_overdue_dates', outbox=True, stdout=out)
+        call_command('notify_digest', outbox=True, stdout=out)
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertIn('Queued 1 overdue notifications in', out.getvalue())
+        self.assertEqual(
+            models.EmailOutbox.objects.filter(
+                status=models.EmailOutbox.PENDING
+            ).count(),
+            2
+        )
+
+        # The ledger was written together with the outbox
+        self.assertEqual(models.NotificationLog.objects.count(), 3)
+
+        out = StringIO()
+        call_command('run_outbox_worker', once=True, stdout=out)
+
+        self.assertIn('Sent 2 emails (0 failed attempts) in', out.getvalue())
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(
+            {sent_email.subject for sent_email in mail.outbox},
+            {
+                'The date of the task is overdue!',
+                'Your tasks with approaching and overdue due dates'
+            }
+        )
+        for sent_email in mail.outbox:
+            self.assertEqual(sent_email.to, [self.userprofile.email])
+
+        self.assertFalse(
+            models.EmailOutbox.objects.exclude(
+                status=models.EmailOutbox.SENT
+            ).exists()
+        )
+
+    def test_outbox_worker_retries_with_backoff(self):
+        """
+        Checks if a failed email is retried later and marked as failed
+        after the last attempt.
+        """
+
+        models.EmailOutbox.objects.enqueue([
+            ('Subject', 'Message', 'admin@it-backends.com', ['a@b.com'])
+        ])
+
+        def send_messages(backend, messages):
+            raise ConnectionError('The mail server went away')
+
+        with mock.patch.object(EmailBackend, 'send_messages', send_messages):
+            call_command(
+                'run_outbox_worker',
+                once=True,
+                max_attempts=2,
+                stdout=StringIO()
+            )
+
+            email = models.EmailOutbox.objects.get()
+            self.assertEqual(email.status, models.EmailOutbox.PENDING)
+            self.assertEqual(email.attempts, 1)
+            self.assertGreater(email.available_at, timezone.now())
+            self.assertIn('ConnectionError', email.last_error)
+
+            # Not due yet
+            call_command(
+                'run_outbox_worker',
+                once=True,
+                max_attempts=2,
+                stdout=StringIO()
+            )
+            email.refresh_from_db()
+            self.assertEqual(email.attempts, 1)
+
+            # Last attempt
+            models.EmailOutbox.objects.update(available_at=timezone.now())
+            call_command(
+                'run_outbox_worker',
+                once=True,
+                max_attempts=2,
+                stdout=StringIO()
+            )
+            email.refresh_from_db()
+            self.assertEqual(email.status, models.EmailOutbox.FAILED)
+            self.assertEqual(email.attempts, 2)
+
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_outbox_claim_skips_locked_rows(self):
+        """Checks if the workers claim their batches with SKIP LOCKED."""
+
+        models.EmailOutbox.objects.enqueue([
+            ('Subject', 'Message', 'admin@it-backends.com', ['a@b.com'])
+        ])
+
+        with CaptureQueriesContext(connection) as queries:
+            with transaction.atomic():
+                emails = models.EmailOutbox.objects.claim(10)
+
+        self.assertEqual(len(emails), 1)
+        self.assertTrue(any(
+            'FOR UPDATE SKIP LOCKED' in query['sql'] for query in queries
+        ))
+
+    # Reminder tests
+    def test_reminders_are_scheduled_on_create(self):
+        """Checks if the upcoming reminders of new tasks are scheduled."""
+
+        # The 7 day reminder of the task due in 5 days already passed
+        self.assertEqual(
+            set(self.task_due_soon.reminders.values_list('kind', flat=True)),
+            {'1d', '1h'}
+        )
+        self.assertEqual(
+            set(
+                self.task_not_due_soon.reminders.values_list(
+                    'kind', flat=True
+                )
+            ),
+            {'7d', '1d', '1h'}
+        )
+        self.assertFalse(self.task_overdue.reminders.exists())
+
+    def test_reminders_follow_due_date_and_status_changes(self):
+        """Checks if the reminders are rescheduled when a task changes."""
+
+        reminder = self.task_not_due_soon.reminders.get(kind='1d')
+        self.task_not_due_soon.due_date += timezone.timedelta(days=2)
+        self.task_not_due_soon.save()
+
+        rescheduled = self.task_not_due_soon.reminders.get(kind='1d')
+        self.assertEqual(
+            rescheduled.fire_at - reminder.fire_at,
+            timezone.timedelta(days=2)
+        )
+
+        # Saving without changes keeps the reminders
+        self.task_not_due_soon.title = 'Renamed'
+        self.task_not_due_soon.save()
+        self.assertEqual(
+            self.task_not_due_soon.reminders.get(kind='1d').id,
+            rescheduled.id
+        )
+
+        # Inactive tasks have no reminders
+        tasks = list(models.Task.objects.filter(id=self.task_not_due_soon.id))
+        services.change_tasks_status(tasks, services.get_status('Archived'))
+        self.assertFalse(self.task_not_due_soon.reminders.exists())
+
+    def test_send_reminders_command(self):
+        """Checks if only the reminders that are due are sent, once."""
+
+        models.Reminder.objects.filter(
+            task=self.task_due_soon,
+            kind='1d'
+        ).update(fire_at=timezone.now() - timezone.timedelta(minutes=1))
+        out = StringIO()
+
+        call_command('send_reminders', stdout=out)
+
+        self.assertIn('Sent 1 reminders', out.getvalue())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn(self.task_due_soon.title, mail.outbox[0].body)
+        self.assertEqual(mail.outbox[0].to, [self.userprofile.email])
+        self.assertIsNotNone(
+            self.task_due_soon.reminders.get(kind='1d').sent_at
+        )
+
+        # Sent reminders aren't read again
+        call_command('send_reminders', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_send_reminders_queries_do_not_grow_with_reminders(self):
+        """
+        Checks if the reminders are read in batches with their task and
+        team members.
+        """
+
+        tasks = self.seed_due_tasks(12, days=3)
+        models.Reminder.objects.sync(tasks, replace=False)
+        models.Reminder.objects.update(
+            fire_at=timezone.now() - timezone.timedelta(minutes=1)
+        )
+        count = models.Reminder.objects.count()
+
+        # Per batch: the claim, the team members and the update, plus the
+        # claim that finds no reminders (in savepoints within the test)
+        with CaptureQueriesContext(connection) as queries:
+            sent = notifications.send_reminders(batch_size=count)
+
+        self.assertEqual(sent, count)
+        self.assertLessEqual(len(queries), 8)
+
+    # Index benchmark tests
+    def test_benchmark_task_indexes_rolls_back_the_seeded_tasks(self):
+        """Checks if every query shape is explained and nothing is kept."""
+
+        tasks = models.Task.objects.count()
+        out = StringIO()
+
+        call_command(
+            'benchmark_task_indexes',
+            tasks=200,
+            owners=10,
+            stdout=out
+        )
+
+        self.assertIn('Seeded 200 tasks', out.getvalue())
+        self.assertIn('Tasks created within a week (trends)', out.getvalue())
+        self.assertEqual(models.Task.objects.count(), tasks)
+        self.assertFalse(
+            models.UserProfile.objects.filter(first_name='Benchmark').exists()
+        )
@@ -18,7 +18,6 @@ class TestPositionModel(APITestCase):
 
         # Deactivate signal handlers for more control over setUp instances
         post_save.disconnect(signals.create_or_update_profile, sender=User)
-        post_save.disconnect(signals.create_task_group, sender=models.Task)
 
         # Creating user instances
         self.regular_user = User.objects.create(
@@ -347,3 +346,55 @@ class TestPositionModel(APITestCase):
         # Checks if the slugfields are occupied with the correct values
         for field in expected_data:
             self.assertEqual(data[field], expected_data[field])
+
+    # Response cache
+    def test_list_and_retrieve_are_served_from_cache(self):
+        """
+        Checks if repeated list and retrieve requests are answered from the
+        cache (one query of the database cache), with Cache-Control
+        headers, until a position or category changes.
+        """
+
+        self.client.force_authenticate(user=self.regular_user)
+
+        list_url = reverse('position-list')
+        detail_url = reverse(
+            'position-detail', args=[self.financial_position.id]
+        )
+
+        for url in [list_url, detail_url]:
+            response = self.client.get(url, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+            with self.assertNumQueries(1):
+                cached_response = self.client.get(url, format='json')
+
+            self.assertEqual(cached_response.data, response.data)
+            self.assertIn('max-age=', cached_response['Cache-Control'])
+            self.assertIn('public', cached_response['Cache-Control'])
+            self.assertNotIn('private', cached_response['Cache-Control'])
+            self.assertIn('Authorization', cached_response['Vary'])
+
+        # Changed query params are cached separately
+        response = self.client.get(list_url, {'search': 'Financial'})
+        self.assertEqual(len(response.data), 1)
+
+        # Saved positions and categories invalidate the cached responses
+        self.financial_position.title = 'Financial Controller'
+        self.financial_position.save()
+        response = self.client.get(detail_url, format='json')
+        self.assertEqual(response.data['title'], 'Financial Controller')
+
+        self.financial_category.name = 'Controlling'
+        self.financial_category.save()
+        response = self.client.get(detail_url, format='json')
+        self.assertEqual(response.data['category'], 'Controlling')
+
+        # Deleted positions too, and missing ones are not cached
+        self.financial_position.delete()
+        response = self.client.get(detail_url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertNotIn('Cache-Control', response)
+
+        response = self.client.get(list_url, format='json')
+        self.assertEqual(len(response.data), 1)
@@ -18,7 +18,6 @@ class TestPriorityModel(APITestCase):
 
         # Deactivate signal handlers for more control over setUp instances
         post_save.disconnect(signals.create_or_update_profile, sender=User)
-        post_save.disconnect(signals.create_task_group, sender=models.Task)
 
         # Creating user instances
         self.regular_user1 = User.objects.create(
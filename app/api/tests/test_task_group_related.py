@@ -4,7 +4,9 @@ from api.serializers import TaskGroupSerializer
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from rest_framework import status
+from django.db import connection
 from django.db.models.signals import post_save
+from django.test.utils import CaptureQueriesContext
 from api import signals, models
 
 
@@ -20,7 +22,6 @@ class TestTaskGroupModel(APITestCase):
 
         # Deactivate signal handlers for more control over setUp instances
         post_save.disconnect(signals.create_or_update_profile, sender=User)
-        post_save.disconnect(signals.create_task_group, sender=models.Task)
 
         # Creating user instances
         self.regular_user1 = User.objects.create(
@@ -707,13 +708,10 @@ class TestTaskGroupModel(APITestCase):
         for field in expected_data:
             self.assertEqual(representation_data[field], expected_data[field])
 
-    # Signal handler tests
+    # Task creation service tests
     def test_task_group_gets_created_and_assigned_to_task_when_not_yet_set(self):
-        """Tests if the taskgroup is created and assigned by the signal
-        handler."""
-
-        # Connect the signal for the current test method
-        post_save.connect(signals.create_task_group, sender=models.Task)
+        """Tests if the taskgroup is created and assigned by the task
+        creation service."""
 
         # Task manager (Allowed to create task instances)
         self.regular_user1.profile.position.is_task_manager = True
@@ -730,22 +728,20 @@ class TestTaskGroupModel(APITestCase):
         }
         response = self.client.post(url, data, format='json')
 
-        # Checks if a taskgroup was created by the signal handler
+        # Checks if a taskgroup was created by the task creation service
         task_group_id = response.data["task_group"]
         task_group_instance = models.TaskGroup.objects.get(id=task_group_id)
         self.assertIsNotNone(task_group_instance)
 
-        # Checks if the taskgroup got assigned to the task by the signal handler
+        # Checks if the taskgroup got assigned to the task by the task
+        # creation service
         task_id = response.data['id']
         task_instance = models.Task.objects.get(id=task_id)
         self.assertEqual(task_instance.task_group.id, task_group_instance.id)
 
     def test_task_group_is_not_created_and_assigned_to_task_when_already_set(self):
-        """Tests if the taskgroup is not created and assigned by the signal
-        handler when staff user already submitted one."""
-
-        # Connect the signal for the current test method
-        post_save.connect(signals.create_task_group, sender=models.Task)
+        """Tests if the taskgroup is not created and assigned by the task
+        creation service when staff user already submitted one."""
 
         # Staff user
         self.client.force_authenticate(user=self.admin_user)
@@ -781,11 +777,8 @@ class TestTaskGroupModel(APITestCase):
     def test_suggested_positions_get_assigned_to_task_group(self):
         """Tests if the task owner gets assigned as a team member of the
         task group, and 4 positions related with the task category get
-        assigned to the suggested_positions of the task group by the signal
-        handler."""
-
-        # Connect the signal for the current test method
-        post_save.connect(signals.create_task_group, sender=models.Task)
+        assigned to the suggested_positions of the task group by the task
+        creation service."""
 
         # Task manager (Allowed to create task instances)
         self.regular_user1.profile.position.is_task_manager = True
@@ -821,8 +814,8 @@ class TestTaskGroupModel(APITestCase):
         )
 
         # Sending a post request to create a new task instance to trigger
-        # the signal handler for he creation of a task group for the task
-        # instance.
+        # the task creation service for the creation of a task group for the
+        # task instance.
         url = reverse('task-list')
         data = {
             'title': 'The first Task',
@@ -834,7 +827,7 @@ class TestTaskGroupModel(APITestCase):
         }
         response = self.client.post(url, data, format='json')
 
-        # Retrieving the by the signal handler created and assigned
+        # Retrieving the by the task creation service created and assigned
         # task group.
         task_id = response.data['id']
         task_group_instance = models.TaskGroup.objects.get(
@@ -842,10 +835,10 @@ class TestTaskGroupModel(APITestCase):
         )
 
         # Retrieving the positions and team members from the newly created
-        # task group (by the signal handler) to create 2 lists that can
-        # occupy the suggested_positions and team_members field of the actual
-        # data dictionary so a comparison can be made with the expected data
-        # dictionary.
+        # task group (by the task creation service) to create 2 lists that
+        # can occupy the suggested_positions and team_members field of the
+        # actual data dictionary so a comparison can be made with the expected
+        # data dictionary.
         positions = []
         team_members = []
         for position in task_group_instance.suggested_positions.all():
@@ -879,3 +872,68 @@ class TestTaskGroupModel(APITestCase):
         # Check if the suggested_positions/team_members got assigned
         # correctly.
         self.assertEqual(actual_data, expected_data)
+
+    # Conditional GET tests
+    def test_team_member_changes_modify_task_group(self):
+        """
+        Checks if changed team members (from either side) and suggested
+        positions change the ETag of a task group.
+        """
+
+        # Staff user
+        self.client.force_authenticate(user=self.admin_user)
+
+        url = reverse('taskgroup-detail', args=[self.task_group1.id])
+        response = self.client.get(url, format='json')
+        etag = response['ETag']
+
+        response = self.client.get(url, format='json', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        changes = [
+            lambda: self.task_group1.team_members.add(self.admin_userprofile),
+            lambda: self.admin_userprofile.taskgroup_set.remove(
+                self.task_group1
+            ),
+            lambda: self.human_resource_position.taskgroup_set.clear(),
+        ]
+
+        for change in changes:
+            change()
+
+            response = self.client.get(
+                url, format='json', HTTP_IF_NONE_MATCH=etag
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotEqual(response['ETag'], etag)
+            etag = response['ETag']
+
+    # Sparse fieldsets
+    def test_list_loads_only_the_task_id(self):
+        """
+        Checks if the list of task groups loads only the id of their task,
+        not its other columns (e.g. the search vector).
+        """
+
+        # Staff user
+        self.client.force_authenticate(user=self.admin_user)
+
+        url = reverse('taskgroup-list')
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(
+                url, {'fields': 'id,task'}, format='json'
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(
+            {'id': self.task_group1.id, 'task': self.task1.id}, response.data
+        )
+
+        task_group_query = next(
+            query['sql'] for query in context.captured_queries
+            if 'FROM "api_taskgroup"' in query['sql'] and
+            'JOIN "api_task"' in query['sql']
+        )
+        self.assertIn('"api_task"."id"', task_group_query)
+        self.assertNotIn('"api_task"."title"', task_group_query)
+        self.assertNotIn('"api_task"."search_vector"', task_group_query)
@@ -1,8 +1,21 @@
+import csv
+import json
+import os
+import tempfile
+import time
+from base64 import b64encode
+from io import StringIO
+from unittest import mock
 from rest_framework.test import APITestCase, APIRequestFactory
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
 from django.utils import timezone
-from api import serializers, models, signals
+from api import serializers, models, signals, services, views, lookups
 from django.contrib.auth import get_user_model
+from django.core.management import call_command, CommandError
 from rest_framework import status
 from django.db.models.signals import post_save
 
@@ -19,7 +32,6 @@ class TestTaskModel(APITestCase):
 
         # Deactivate signal handlers for more control over setUp instances
         post_save.disconnect(signals.create_or_update_profile, sender=User)
-        post_save.disconnect(signals.create_task_group, sender=models.Task)
 
         # Creating user instances
         self.regular_user1 = User.objects.create(
@@ -145,6 +157,48 @@ class TestTaskModel(APITestCase):
         else:
             return i.get('id')
 
+    def seed_tasks(self, count, team_member):
+        """
+        Creates (count) tasks, each with its own task group, team member and
+        task resource. Uses bulk_create so no signal handlers are involved.
+        """
+
+        task_groups = models.TaskGroup.objects.bulk_create(
+            models.TaskGroup(name=f'Seeded TaskGroup {i}')
+            for i in range(count)
+        )
+        models.TaskGroup.team_members.through.objects.bulk_create(
+            models.TaskGroup.team_members.through(
+                taskgroup=task_group,
+                userprofile=team_member
+            )
+            for task_group in task_groups
+        )
+        tasks = models.Task.objects.bulk_create(
+            models.Task(
+                title=f'Seeded Task {i}',
+                description='A seeded task.',
+                due_date=timezone.now().date() + timezone.timedelta(days=2),
+                category=self.human_resource_category,
+                priority=self.priority,
+                status=self.status,
+                owner=team_member,
+                task_group=task_group
+            )
+            for i, task_group in enumerate(task_groups)
+        )
+        models.TaskResource.objects.bulk_create(
+            models.TaskResource(
+                source_name=f'Seeded Resource {i}',
+                description='A seeded resource.',
+                resource_link='https://example.com/resource',
+                task=task
+            )
+            for i, task in enumerate(tasks)
+        )
+
+        return tasks
+
     # # List view
     # def test_authenticated_user_can_access_list(self):
     #     """Tests if the list view action allows authenticated users."""
@@ -921,3 +975,1658 @@ class TestTaskModel(APITestCase):
         current_date = timezone.now().date()
 
         self.assertEqual(created_at, current_date)
+
+    # Queryset tests
+    def test_non_team_member_only_lists_visible_tasks(self):
+        """
+        Checks if the list view only returns the tasks of which the
+        request user is a team member.
+        """
+
+        # Authenticated user (team member of task_group1 only)
+        self.client.force_authenticate(user=self.regular_user1)
+
+        url = reverse('task-list')
+        response = self.client.get(url, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        task_ids = [task['id'] for task in response.data['results']]
+        self.assertEqual(task_ids, [self.task1.id])
+
+    def test_staff_lists_all_tasks(self):
+        """
+        Checks if the list view returns every task to staff users,
+        independent from team membership.
+        """
+
+        # Staff user
+        self.client.force_authenticate(user=self.admin_user)
+
+        url = reverse('task-list')
+        response = self.client.get(url, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        task_ids = sorted(task['id'] for task in response.data['results'])
+        self.assertEqual(task_ids, sorted([self.task1.id, self.task2.id]))
+
+    def test_non_team_member_cant_retrieve_task(self):
+        """
+        Checks if the retrieve view responds with 404 for tasks of which
+        the request user is not a team member.
+        """
+
+        # Authenticated user (not a team member of task_group2)
+        self.client.force_authenticate(user=self.regular_user1)
+
+        url = reverse('task-detail', args=[self.task2.id])
+        response = self.client.get(url, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_query_count_is_constant_for_staff(self):
+        """
+        Checks if the number of queries of the list view doesn't depend on
+        the number of tasks for staff users.
+        """
+
+        # Staff user
+        self.client.force_authenticate(user=self.admin_user)
+        url = reverse('task-list')
+
+        # Reads the lookup versions of the ETags into the process cache
+        self.client.get(url, format='json')
+
+        # Seeds up to 10, 100 and 1000 tasks in total
+        seeded = 0
+        for total in [10, 100, 1000]:
+            self.seed_tasks(total - seeded, self.regular_userprofile)
+            seeded = total
+
+            with self.subTest(total=total):
+                # Tasks (+ owner, category, priority, status) and resources
+                with self.assertNumQueries(2):
+                    response = self.client.get(
+                        url, {'page_size': total}, format='json'
+                    )
+
+                self.assertEqual(len(response.data['results']), total)
+
+    def test_list_query_count_is_constant_for_team_member(self):
+        """
+        Checks if the number of queries of the list view doesn't depend on
+        the number of tasks for non-staff users.
+        """
+
+        # Authenticated user (team member of all seeded tasks)
+        self.client.force_authenticate(user=self.regular_user1)
+        url = reverse('task-list')
+
+        # Reads the lookup versions of the ETags into the process cache
+        self.client.get(url, format='json')
+
+        # Seeds up to 10, 100 and 1000 tasks in total
+        seeded = 0
+        for total in [10, 100, 1000]:
+            self.seed_tasks(total - seeded, self.regular_userprofile)
+            seeded = total
+
+            with self.subTest(total=total):
+                # Memberships of the ETag, tasks (+ owner, category,
+                # priority, status) and resources
+                with self.assertNumQueries(3):
+                    response = self.client.get(
+                        url, {'page_size': total}, format='json'
+                    )
+
+                self.assertEqual(len(response.data['results']), total)
+
+    def test_retrieve_query_count(self):
+        """
+        Checks if the retrieve view loads the task together with its
+        related instances in a fixed number of queries.
+        """
+
+        # Authenticated user (team member of task_group1)
+        self.client.force_authenticate(user=self.regular_user1)
+        url = reverse('task-detail', args=[self.task1.id])
+
+        # Reads the lookup versions of the ETags into the process cache
+        self.client.get(url, format='json')
+
+        # Conditional GET validator and memberships, task (+ owner,
+        # category, priority, status) and resources
+        with self.assertNumQueries(4):
+            response = self.client.get(url, format='json')
+
+        self.assertEqual(response.data['owner'], self.regular_userprofile.email)
+        self.assertEqual(response.data['status'], self.status.caption)
+
+    # Pagination tests
+    def seed_tasks_with_due_dates(self):
+        """
+        Seeds tasks with repeating due dates and some tasks without a due
+        date, so the id tie-breaker and the null handling get exercised.
+        """
+
+        tasks = self.seed_tasks(30, self.regular_userprofile)
+        current_date = timezone.now().date()
+
+        for i, task in enumerate(tasks):
+            if i % 6 == 0:
+                task.due_date = None
+            else:
+                task.due_date = current_date + timezone.timedelta(days=i % 4)
+
+        models.Task.objects.bulk_update(tasks, ['due_date'])
+
+    def collect_pages(self, url, params, direction='next'):
+        """
+        Follows the next (or previous) links starting at the url and
+        returns the ids of all visited tasks in the order of the pages.
+        """
+
+        pages = []
+        response = self.client.get(url, params, format='json')
+
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append([task['id'] for task in response.data['results']])
+
+            link = response.data[direction]
+            if link is None:
+                break
+
+            response = self.client.get(link, format='json')
+
+        return pages
+
+    def test_pagination_walks_tasks_by_due_date_and_id(self):
+        """
+        Checks if following the next links returns every task exactly once
+        ordered by due_date and id, with tasks without due date last.
+        """
+
+        self.seed_tasks_with_due_dates()
+
+        # Staff user
+        self.client.force_authenticate(user=self.admin_user)
+
+        url = reverse('task-list')
+        pages = self.collect_pages(url, {'page_size': 7})
+
+        expected_ids = [
+            task.id for task in sorted(
+                models.Task.objects.all(),
+                key=lambda task: (task.due_date is None, task.due_date, task.id)
+            )
+        ]
+
+        self.assertEqual(sum(pages, []), expected_ids)
+        self.assertTrue(all(len(page) <= 7 for page in pages))
+
+    def test_pagination_previous_links_walk_back(self):
+        """
+        Checks if following the previous links from the last page returns
+        the same pages as walking forward.
+        """
+
+        self.seed_tasks_with_due_dates()
+
+        # Staff user
+        self.client.force_authenticate(user=self.admin_user)
+
+        url = reverse('task-list')
+        forward_pages = self.collect_pages(url, {'page_size': 7})
+
+        # Last page, reached by following the next links
+        response = self.client.get(url, {'page_size': 7}, format='json')
+        while response.data['next'] is not None:
+            response = self.client.get(response.data['next'], format='json')
+
+        backward_pages = self.collect_pages(
+            response.data['previous'], {}, direction='previous'
+        )
+
+        self.assertEqual(
+            list(reversed(backward_pages)), forward_pages[:-1]
+        )
+
+    def test_pagination_uses_ordering_filter(self):
+        """
+        Checks if the pagination follows the ordering query param with the
+        id as tie-breaker.
+        """
+
+        self.seed_tasks_with_due_dates()
+
+        # Staff user
+        self.client.force_authenticate(user=self.admin_user)
+
+        url = reverse('task-list')
+        pages = self.collect_pages(
+            url, {'page_size': 7, 'ordering': '-title'}
+        )
+
+        expected_ids = list(
+            models.Task.objects.order_by('-title', '-id').values_list(
+                'id', flat=True
+            )
+        )
+
+        self.assertEqual(sum(pages, []), expected_ids)
+
+    def test_pagination_does_not_offset_or_count(self):
+        """
+        Checks if later pages are fetched without OFFSET and that no
+        COUNT query is executed.
+        """
+
+        self.seed_tasks_with_due_dates()
+
+        # Staff user
+        self.client.force_authenticate(user=self.admin_user)
+
+        url = reverse('task-list')
+        response = self.client.get(url, {'page_size': 7}, format='json')
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(response.data['next'], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        for query in context.captured_queries:
+            self.assertNotIn('OFFSET', query['sql'])
+            self.assertNotIn('COUNT(', query['sql'])
+
+    def test_pagination_rejects_invalid_cursor(self):
+        """Checks if a malformed cursor responds with 404."""
+
+        # Staff user
+        self.client.force_authenticate(user=self.admin_user)
+
+        url = reverse('task-list')
+        response = self.client.get(url, {'cursor': 'garbage'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_pagination_rejects_tampered_cursor(self):
+        """
+        Checks if a cursor that decodes but holds values of the wrong type
+        responds with 404.
+        """
+
+        # Staff user
+        self.client.force_authenticate(user=self.admin_user)
+
+        url = reverse('task-list')
+        cursors = [
+            ({'v': 'abc', 'i': 1, 'r': False}, {}),
+            ({'v': '2030-01-01', 'i': 'abc', 'r': False}, {}),
+            ({'v': '2030-01-01', 'i': 2 ** 64, 'r': False}, {}),
+            ({'v': 'abc', 'i': 1, 'r': False}, {'ordering': 'category'}),
+            ({'v': 'abc', 'i': 1, 'r': False}, {'search': 'task'}),
+        ]
+
+        for cursor, params in cursors:
+            with self.subTest(cursor=cursor, params=params):
+                encoded = b64encode(json.dumps(cursor).encode()).decode()
+                response = self.client.get(
+                    url, {'cursor': encoded, **params}, format='json'
+                )
+
+                self.assertEqual(
+                    response.status_code, status.HTTP_404_NOT_FOUND
+                )
+
+    # Sparse fieldset tests
+    def test_sparse_fields_trim_representation_and_queries(self):
+        """
+        Checks if ?fields= only returns and loads the requested fields and
+        relations.
+        """
+
+        self.seed_tasks(5, self.regular_userprofile)
+
+        # Staff user
+        self.client.force_authenticate(user=self.admin_user)
+
+        url = reverse('task-list')
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(
+                url, {'fields': 'id,title,due_date,status'}, format='json'
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for task in response.data['results']:
+            self.assertEqual(
+                set(task), {'id', 'title', 'due_date', 'status'}
+            )
+
+        sql = ' '.join(query['sql'] for query in context.captured_queries)
+        self.assertNotIn('"api_task"."description"', sql)
+        self.assertNotIn('"api_task"."search_vector"', sql)
+        self.assertNotIn('api_taskresource', sql)
+        self.assertNotIn('api_userprofile', sql)
+
+    def test_sparse_omit_drops_fields_and_relations(self):
+        """
+        Checks if ?omit= drops the listed fields and their prefetching,
+        while write requests keep all fields.
+        """
+
+        self.seed_tasks(5, self.regular_userprofile)
+
+        # Staff user
+        self.client.force_authenticate(user=self.admin_user)
+
+        url = reverse('task-list')
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(
+                url, {'omit': 'description,taskresource_set'}, format='json'
+            )
+
+        for task in response.data['results']:
+            self.assertNotIn('description', task)
+            self.assertNotIn('taskresource_set', task)
+            self.assertIn('owner', task)
+
+        self.assertFalse(any(
+            'api_taskresource' in query['sql']
+            for query in context.captured_queries
+        ))
+
+        url = reverse('task-detail', args=[self.task1.id])
+        response = self.client.patch(
+            f'{url}?fields=id', {'title': 'Renamed'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['title'], 'Renamed')
+
+    # Conditional GET tests
+    def test_unchanged_list_is_not_modified(self):
+        """
+        Checks if a list request with the ETag of the previous response gets
+        a 304 without serializing the page, and a changed task a new ETag.
+        """
+
+        self.seed_tasks(5, self.regular_userprofile)
+
+        # Team member
+        self.client.force_authenticate(user=self.regular_user1)
+
+        url = reverse('task-list')
+        response = self.client.get(url, format='json')
+        etag = response['ETag']
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('Last-Modified', response)
+        self.assertIn('Authorization', response['Vary'])
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(
+                url, format='json', HTTP_IF_NONE_MATCH=etag
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+        # The rows of the page (without their resources) and the task group
+        # memberships of the user, nothing over all matching rows
+        self.assertEqual(len(context.captured_queries), 2)
+        for query in context.captured_queries:
+            self.assertNotIn('COUNT(', query['sql'])
+            self.assertNotIn('api_taskresource', query['sql'])
+
+        # Another user sees other tasks
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.get(url, format='json', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # Changes of a task, its resources and deleted tasks
+        self.client.force_authenticate(user=self.regular_user1)
+
+        self.task1.title = 'Renamed'
+        self.task1.save()
+        response = self.client.get(url, format='json', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+
+        resource = models.TaskResource.objects.filter(
+            task__owner=self.regular_userprofile
+        ).first()
+        resource.source_name = 'Renamed Resource'
+        resource.save()
+        response = self.client.get(url, format='json', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+
+        models.Task.objects.filter(title='Seeded Task 0').delete()
+        response = self.client.get(url, format='json', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_owner_email_change_modifies_tasks(self):
+        """
+        Checks if a changed email of the owner, shown as its slug, changes
+        the ETag of the tasks and of the task groups of the profile.
+        """
+
+        # Team member
+        self.client.force_authenticate(user=self.regular_user1)
+
+        url = reverse('task-list')
+        etag = self.client.get(url, format='json')['ETag']
+
+        group_url = reverse('taskgroup-detail', args=[self.task_group1.id])
+        group_etag = self.client.get(group_url, format='json')['ETag']
+
+        profile = models.UserProfile.objects.get(id=self.regular_userprofile.id)
+        profile.email = 'peter.pahn@example.com'
+        profile.save()
+
+        response = self.client.get(url, format='json', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data['results'][0]['owner'], 'peter.pahn@example.com'
+        )
+
+        response = self.client.get(
+            group_url, format='json', HTTP_IF_NONE_MATCH=group_etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data['team_members'], ['peter.pahn@example.com']
+        )
+
+    def test_membership_change_modifies_tasks(self):
+        """
+        Checks if swapping the task groups of a user changes the ETag of the
+        task list, even when the latest updated_at and count stay the same.
+        """
+
+        tasks = self.seed_tasks(3, self.regular_userprofile)
+
+        # Team member
+        self.client.force_authenticate(user=self.regular_user1)
+
+        url = reverse('task-list')
+        response = self.client.get(url, format='json')
+        etag = response['ETag']
+
+        # The oldest visible task is swapped for an older one
+        tasks[0].task_group.team_members.remove(self.regular_userprofile)
+        self.task_group2.team_members.add(self.regular_userprofile)
+
+        response = self.client.get(url, format='json', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(
+            self.task2.id, [task['id'] for task in response.data['results']]
+        )
+
+    def test_unchanged_task_is_not_modified(self):
+        """
+        Checks the validators of retrieve, including If-Modified-Since and
+        the bulk status change, which bypasses save().
+        """
+
+        # Staff user
+        self.client.force_authenticate(user=self.admin_user)
+
+        url = reverse('task-detail', args=[self.task1.id])
+        response = self.client.get(url, format='json')
+        etag = response['ETag']
+
+        response = self.client.get(url, format='json', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.client.get(
+            url,
+            format='json',
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        updated_at = models.Task.objects.get(id=self.task1.id).updated_at
+        services.change_tasks_status(
+            list(models.Task.objects.filter(id=self.task1.id)),
+            services.get_status('Archived')
+        )
+        self.assertGreater(
+            models.Task.objects.get(id=self.task1.id).updated_at,
+            updated_at
+        )
+
+        response = self.client.get(url, format='json', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'Archived')
+
+        # Missing tasks keep their 404
+        url = reverse('task-detail', args=[0])
+        response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    # Export tests
+    def test_export_streams_visible_tasks_as_ndjson(self):
+        """
+        Checks if the export streams one JSON object per visible task, with
+        a number of queries that only grows with the number of chunks.
+        """
+
+        self.seed_tasks(25, self.regular_userprofile)
+        self.seed_tasks(5, self.regular_userprofile2)
+
+        # Team member of task_group1 and the first seeded task groups
+        self.client.force_authenticate(user=self.regular_user1)
+
+        url = reverse('task-export')
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+            lines = b''.join(response.streaming_content).splitlines()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertTrue(
+            response['Content-Type'].startswith('application/x-ndjson')
+        )
+
+        tasks = [json.loads(line) for line in lines]
+        self.assertEqual(len(tasks), 26)
+        self.assertEqual(
+            [task['id'] for task in tasks],
+            sorted(task['id'] for task in tasks)
+        )
+        self.assertTrue(all(
+            task['owner'] == self.regular_userprofile.email for task in tasks
+        ))
+        self.assertEqual(tasks[-1]['taskresource_set'], ['Seeded Resource 24'])
+
+        # The tasks are fetched from one server side cursor, their
+        # resources with one query per chunk (3 chunks of up to 10 tasks)
+        export_chunk_size = views.TaskView.export_chunk_size
+        views.TaskView.export_chunk_size = 10
+
+        try:
+            with CaptureQueriesContext(connection) as chunked_context:
+                response = self.client.get(url)
+                b''.join(response.streaming_content)
+        finally:
+            views.TaskView.export_chunk_size = export_chunk_size
+
+        self.assertEqual(
+            len(chunked_context.captured_queries),
+            len(context.captured_queries) + 2
+        )
+
+    def test_export_streams_csv_with_sparse_fields(self):
+        """Checks the CSV export, its header and the ?fields= param."""
+
+        self.seed_tasks(3, self.regular_userprofile)
+
+        # Staff user
+        self.client.force_authenticate(user=self.admin_user)
+
+        url = reverse('task-export')
+        response = self.client.get(
+            url, {'format': 'csv', 'fields': 'id,title,taskresource_set'}
+        )
+        rows = list(csv.reader(
+            b''.join(response.streaming_content).decode().splitlines()
+        ))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+        self.assertIn('tasks.csv', response['Content-Disposition'])
+        self.assertEqual(rows[0], ['id', 'title', 'taskresource_set'])
+        self.assertEqual(len(rows), 1 + models.Task.objects.count())
+        self.assertIn(
+            [str(self.task1.id), self.task1.title, ''], rows[1:]
+        )
+
+        # Unauthenticated users get the error in the requested format
+        self.client.force_authenticate(user=None)
+        response = self.client.get(url, {'format': 'csv'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertTrue(response.content.startswith(b'detail'))
+
+    # Import tests
+    def write_import_file(self, content, suffix):
+        """Writes the content to a temporary file and returns its path."""
+
+        file = tempfile.NamedTemporaryFile(
+            'w', suffix=suffix, delete=False, encoding='utf-8'
+        )
+        with file:
+            file.write(content)
+
+        self.addCleanup(os.remove, file.name)
+        return file.name
+
+    def test_import_tasks_command_copies_csv(self):
+        """
+        Checks if the command imports the tasks of a CSV file together with
+        their task groups, rollup rows, reminders and search vectors.
+        """
+
+        due_date = timezone.localdate() + timezone.timedelta(days=30)
+        path = self.write_import_file(
+            'title,description,due_date,category,priority,status,owner\n'
+            f'Imported "quoted" task,"Two\nlines",{due_date},'
+            f'{self.human_resource_category.name},{self.priority.caption},'
+            f',{self.regular_userprofile2.email}\n'
+            'Imported archived task,,2020-01-01,,,Archived,\n',
+            '.csv'
+        )
+        services.get_status('Archived')
+
+        out = StringIO()
+        call_command(
+            'import_tasks', path,
+            owner=self.regular_userprofile.email,
+            stdout=out
+        )
+        self.assertRegex(
+            out.getvalue(), r'Imported 2 tasks in [\d.]+s \(\d+ rows/s\)'
+        )
+
+        task = models.Task.objects.get(title='Imported "quoted" task')
+        self.assertEqual(task.description, 'Two\nlines')
+        self.assertEqual(task.due_date, due_date)
+        self.assertEqual(task.status.caption, 'In Progress')
+        self.assertEqual(task.owner, self.regular_userprofile2)
+        self.assertEqual(
+            list(task.task_group.team_members.all()),
+            [self.regular_userprofile2]
+        )
+        self.assertEqual(
+            list(task.task_group.suggested_positions.all()),
+            [self.human_resource_position]
+        )
+        self.assertEqual(task.reminders.count(), len(models.REMINDER_OFFSETS))
+        self.assertTrue(
+            models.Task.objects.filter(search_vector='quoted').exists()
+        )
+
+        archived_task = models.Task.objects.get(title='Imported archived task')
+        self.assertEqual(archived_task.owner, self.regular_userprofile)
+        self.assertIsNone(archived_task.category)
+        self.assertFalse(archived_task.reminders.exists())
+
+        self.assertEqual(models.TaskStatsDaily.objects.verify(), [])
+
+    def test_import_tasks_command_rejects_invalid_rows(self):
+        """Checks if invalid rows are reported and nothing is imported."""
+
+        path = self.write_import_file(
+            '{"title": "Valid task"}\n'
+            '{"title": "", "due_date": "tomorrow"}\n'
+            '{"title": "Unknown slugs", "category": "Unknown", '
+            '"owner": "nobody@example.com"}\n',
+            '.ndjson'
+        )
+        tasks = models.Task.objects.count()
+
+        err = StringIO()
+        with self.assertRaises(CommandError):
+            call_command('import_tasks', path, stderr=err)
+
+        self.assertIn('Row 2: The title is required.', err.getvalue())
+        self.assertIn("Invalid due_date 'tomorrow'", err.getvalue())
+        self.assertEqual(models.Task.objects.count(), tasks)
+
+        # Unknown slugs are only found after the copy of valid rows
+        path = self.write_import_file(
+            '[{"title": "Valid task"}, {"title": "Unknown slugs", '
+            '"category": "Unknown", "owner": "nobody@example.com"}]',
+            '.json'
+        )
+
+        err = StringIO()
+        with self.assertRaises(CommandError):
+            call_command('import_tasks', path, stderr=err)
+
+        self.assertIn(
+            "Row 2: Unknown category 'Unknown'. Unknown owner "
+            "'nobody@example.com'.",
+            err.getvalue()
+        )
+        self.assertEqual(models.Task.objects.count(), tasks)
+
+        path = self.write_import_file('[{"title": ', '.json')
+        with self.assertRaisesRegex(CommandError, 'Could not read'):
+            call_command('import_tasks', path)
+
+    def test_import_endpoint_requires_staff(self):
+        """
+        Checks if staff users can upload tasks, owned by them unless the
+        file names an owner, and other users can't.
+        """
+
+        url = reverse('task-import')
+        upload = SimpleUploadedFile(
+            'tasks.ndjson',
+            b'{"title": "Uploaded task", "priority": "High Priority"}\n'
+        )
+
+        # Non-staff user
+        self.client.force_authenticate(user=self.regular_user1)
+        response = self.client.post(url, {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        # Staff user
+        self.client.force_authenticate(user=self.admin_user)
+        upload.seek(0)
+        response = self.client.post(url, {'file': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['imported'], 1)
+        self.assertIn('rows_per_second', response.data)
+
+        task = models.Task.objects.get(title='Uploaded task')
+        self.assertEqual(task.owner, self.admin_userprofile)
+        self.assertEqual(task.priority, self.priority)
+
+        upload = SimpleUploadedFile('tasks.txt', b'title\nA task\n')
+        response = self.client.post(url, {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        upload.seek(0)
+        response = self.client.post(
+            url, {'file': upload, 'format': 'csv'}, format='multipart'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    # Search tests
+    def seed_searchable_tasks(self):
+        """
+        Seeds tasks of which some mention 'budget' in the title, some only
+        in the description and the rest not at all.
+        """
+
+        tasks = self.seed_tasks(12, self.regular_userprofile)
+
+        # No digits in the titles, so a number only matches the ids
+        for i, task in enumerate(tasks):
+            if i % 3 == 0:
+                task.title = 'Budget planning'
+            elif i % 3 == 1:
+                task.title = 'Spreadsheet cleanup'
+                task.description = 'Check the remaining budgets.'
+            else:
+                task.title = 'Office move'
+
+        models.Task.objects.bulk_update(tasks, ['title', 'description'])
+
+        return tasks
+
+    def test_search_ranks_title_matches_first(self):
+        """
+        Checks if the search matches the title and description by stem and
+        pages through the results ordered by rank.
+        """
+
+        tasks = self.seed_searchable_tasks()
+
+        # Staff user
+        self.client.force_authenticate(user=self.admin_user)
+
+        url = reverse('task-list')
+        pages = self.collect_pages(url, {'search': 'budget', 'page_size': 3})
+        ids = sum(pages, [])
+
+        title_ids = {task.id for i, task in enumerate(tasks) if i % 3 == 0}
+        description_ids = {
+            task.id for i, task in enumerate(tasks) if i % 3 == 1
+        }
+
+        self.assertEqual(len(ids), 8)
+        self.assertEqual(set(ids[:4]), title_ids)
+        self.assertEqual(set(ids[4:]), description_ids)
+
+    def test_search_matches_id_and_follows_ordering_param(self):
+        """
+        Checks if a number matches the task id and if an ordering param
+        replaces the rank ordering.
+        """
+
+        tasks = self.seed_searchable_tasks()
+
+        # Staff user
+        self.client.force_authenticate(user=self.admin_user)
+
+        url = reverse('task-list')
+        response = self.client.get(
+            url, {'search': str(tasks[1].id)}, format='json'
+        )
+        self.assertEqual(
+            [task['id'] for task in response.data['results']],
+            [tasks[1].id]
+        )
+
+        pages = self.collect_pages(
+            url, {'search': 'budget', 'ordering': '-id', 'page_size': 3}
+        )
+        ids = sum(pages, [])
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertEqual(len(ids), 8)
+
+    def test_search_vector_follows_bulk_updates(self):
+        """
+        Checks if the search vector is maintained by the database for
+        updates that bypass the model.
+        """
+
+        models.Task.objects.filter(id=self.task1.id).update(
+            title='Onboarding of the new hires'
+        )
+
+        # Staff user
+        self.client.force_authenticate(user=self.admin_user)
+
+        url = reverse('task-list')
+        response = self.client.get(url, {'search': 'hire'}, format='json')
+
+        self.assertEqual(
+            [task['id'] for task in response.data['results']],
+            [self.task1.id]
+        )
+
+    # Statistics tests
+    def create_status_tasks(self):
+        """
+        Creates a completed, postponed and archived task for the
+        regular_userprofile, plus a completed task outside of the last 3
+        months and a completed task of the regular_userprofile2.
+        """
+
+        completed_status = models.Status.objects.create(caption='Completed')
+        postponed_status = models.Status.objects.create(caption='Postponed')
+        archived_status = models.Status.objects.create(caption='Archived')
+
+        current_datetime = timezone.now()
+        task_data = [
+            (completed_status, self.regular_userprofile, 1),
+            (postponed_status, self.regular_userprofile, 2),
+            (archived_status, self.regular_userprofile, 3),
+            (completed_status, self.regular_userprofile, 100),
+            (completed_status, self.regular_userprofile2, 1),
+        ]
+
+        for status_instance, owner, days_ago in task_data:
+            models.Task.objects.create(
+                title=f'{status_instance.caption} Task',
+                description='The task to be tested.',
+                status=status_instance,
+                owner=owner,
+                completed_at=current_datetime - timezone.timedelta(
+                    days=days_ago
+                )
+            )
+
+    def test_tasks_statistics_for_staff(self):
+        """
+        Checks if staff users get the numbers of all tasks of the last 3
+        months within a single query.
+        """
+
+        self.create_status_tasks()
+
+        # Staff user
+        self.client.force_authenticate(user=self.admin_user)
+
+        url = reverse('task-tasks-statistics')
+        with self.assertNumQueries(1):
+            response = self.client.get(url, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['completed_tasks (last 3 months)'], 2)
+        self.assertEqual(response.data['postponed_tasks (last 3 months)'], 1)
+        self.assertEqual(response.data['archived_tasks (last 3 months)'], 1)
+        self.assertEqual(
+            response.data['tasks_in_progress (last 3 months)'], 2
+        )
+
+    def test_tasks_statistics_for_owner(self):
+        """
+        Checks if non-staff users only get the numbers of the tasks they
+        own.
+        """
+
+        self.create_status_tasks()
+
+        # Task manager (Allowed to view the statistics)
+        self.regular_user1.profile.position.is_task_manager = True
+        self.client.force_authenticate(user=self.regular_user1)
+
+        url = reverse('task-tasks-statistics')
+        response = self.client.get(url, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['completed_tasks (last 3 months)'], 1)
+        self.assertEqual(response.data['postponed_tasks (last 3 months)'], 1)
+        self.assertEqual(response.data['archived_tasks (last 3 months)'], 1)
+        self.assertEqual(
+            response.data['tasks_in_progress (last 3 months)'], 1
+        )
+
+    def test_tasks_statistics_date_range(self):
+        """
+        Checks if the ?from= and ?to= query params limit the date range of
+        the statistics and if invalid dates are rejected.
+        """
+
+        self.create_status_tasks()
+
+        # Staff user
+        self.client.force_authenticate(user=self.admin_user)
+
+        url = reverse('task-tasks-statistics')
+        current_date = timezone.now().date()
+
+        # Only covers the completed task of 100 days ago
+        response = self.client.get(
+            url,
+            {
+                'from': current_date - timezone.timedelta(days=120),
+                'to': current_date - timezone.timedelta(days=90)
+            },
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['completed_tasks (last 3 months)'], 1)
+        self.assertEqual(response.data['postponed_tasks (last 3 months)'], 0)
+
+        # Invalid date
+        response = self.client.get(url, {'from': 'yesterday'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # 'from' after 'to'
+        response = self.client.get(
+            url,
+            {
+                'from': current_date,
+                'to': current_date - timezone.timedelta(days=1)
+            },
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    # Trends tests
+    def test_trends_per_day(self):
+        """
+        Checks if the trends action gives the numbers of created,
+        completed and overdue tasks per day.
+        """
+
+        self.create_status_tasks()
+
+        # Overdue task (due yesterday, not completed)
+        current_date = timezone.now().date()
+        models.Task.objects.create(
+            title='Overdue Task',
+            description='The task to be tested.',
+            due_date=current_date - timezone.timedelta(days=1),
+            status=self.status,
+            owner=self.regular_userprofile
+        )
+
+        # Staff user
+        self.client.force_authenticate(user=self.admin_user)
+
+        url = reverse('task-trends')
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                url,
+                {
+                    'from': current_date - timezone.timedelta(days=6),
+                    'to': current_date
+                },
+                format='json'
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        results = {
+            row['period_start']: row for row in response.data['results']
+        }
+
+        # One row per day of the range
+        self.assertEqual(len(results), 7)
+
+        # All tasks of the setUp and create_status_tasks were created today
+        self.assertEqual(results[current_date]['created'], 8)
+
+        yesterday = current_date - timezone.timedelta(days=1)
+        self.assertEqual(results[yesterday]['completed'], 2)
+        self.assertEqual(results[yesterday]['overdue'], 1)
+
+    def test_trends_per_month_and_invalid_period(self):
+        """
+        Checks if the trends action groups the numbers by month and
+        rejects unknown periods.
+        """
+
+        # Staff user
+        self.client.force_authenticate(user=self.admin_user)
+
+        url = reverse('task-trends')
+        current_date = timezone.now().date()
+
+        response = self.client.get(url, {'period': 'month'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data['results'][-1]['period_start'],
+            current_date.replace(day=1)
+        )
+        self.assertEqual(response.data['results'][-1]['created'], 2)
+
+        response = self.client.get(url, {'period': 'year'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    # Statistics rollup tests
+    def get_stats_counts(self):
+        """Returns the non-zero TaskStatsDaily counts as a dictionary."""
+
+        return {
+            (stats.owner_id, stats.day, stats.status_id): stats.count
+            for stats in models.TaskStatsDaily.objects.exclude(count=0)
+        }
+
+    def test_stats_rollup_follows_task_changes(self):
+        """
+        Checks if the TaskStatsDaily rollup gets updated when tasks are
+        created, change their status and get deleted.
+        """
+
+        current_date = timezone.now().date()
+
+        # The tasks of the setUp are counted on the day of their creation
+        self.assertEqual(
+            self.get_stats_counts(),
+            {
+                (self.regular_userprofile.id, current_date, self.status.id): 1,
+                (self.regular_userprofile2.id, current_date, self.status.id): 1
+            }
+        )
+
+        # Completing a task moves it to the day of its completion
+        completed_at = timezone.now() - timezone.timedelta(days=1)
+        serializer = serializers.StatusChangeSerializer(
+            instance=self.task1,
+            data={'status': 'Completed', 'completed_at': completed_at},
+            partial=True
+        )
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        serializer.save()
+
+        completed_status = models.Status.objects.get(caption='Completed')
+        self.assertEqual(
+            self.get_stats_counts(),
+            {
+                (
+                    self.regular_userprofile.id,
+                    completed_at.date(),
+                    completed_status.id
+                ): 1,
+                (self.regular_userprofile2.id, current_date, self.status.id): 1
+            }
+        )
+
+        # A task loaded with deferred fields is moved as well
+        task = models.Task.objects.only('id', 'title').get(id=self.task2.id)
+        task.status = completed_status
+        task.save()
+
+        # Deleting a task removes its count
+        models.Task.objects.filter(id=self.task1.id).delete()
+
+        self.assertEqual(
+            self.get_stats_counts(),
+            {
+                (
+                    self.regular_userprofile2.id,
+                    current_date,
+                    completed_status.id
+                ): 1
+            }
+        )
+        self.assertEqual(models.TaskStatsDaily.objects.verify(), [])
+
+    def test_stats_rollup_survives_concurrent_saves(self):
+        """
+        Checks if updating a task that another request saved since it was
+        loaded moves its count from the row it's stored in, not from the
+        row it was loaded with.
+        """
+
+        # Both requests load the task before either saves it
+        stale_task = models.Task.objects.get(id=self.task1.id)
+        other_task = models.Task.objects.get(id=self.task1.id)
+
+        other_task.status = services.get_status('Archived')
+        other_task.save()
+
+        serializer = serializers.StatusChangeSerializer(
+            instance=stale_task,
+            data={'status': 'Completed', 'completed_at': timezone.now()},
+            partial=True
+        )
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        serializer.save()
+
+        stale_task = models.Task.objects.get(id=self.task2.id)
+        other_task = models.Task.objects.get(id=self.task2.id)
+
+        other_task.status = services.get_status('Archived')
+        other_task.save()
+
+        serializer = serializers.TaskSerializer(
+            instance=stale_task,
+            data={'title': 'Renamed Task'},
+            partial=True
+        )
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        serializer.save(status=services.get_status('Completed'))
+
+        self.assertEqual(models.TaskStatsDaily.objects.verify(), [])
+
+    def test_rebuild_task_stats_command(self):
+        """
+        Checks if the rebuild_task_stats command detects a drifted rollup
+        and rebuilds it from the tasks.
+        """
+
+        # Tasks created with bulk_create bypass the signal handlers
+        self.seed_tasks(3, self.regular_userprofile)
+
+        with self.assertRaises(CommandError):
+            call_command(
+                'rebuild_task_stats', '--check',
+                stdout=StringIO(), stderr=StringIO()
+            )
+
+        call_command('rebuild_task_stats', stdout=StringIO())
+
+        current_date = timezone.now().date()
+        self.assertEqual(
+            self.get_stats_counts(),
+            {
+                (self.regular_userprofile.id, current_date, self.status.id): 4,
+                (self.regular_userprofile2.id, current_date, self.status.id): 1
+            }
+        )
+
+    # Lookup cache tests
+    def get_task_serializer(self, data):
+        """Returns a task serializer for the data with a staff request."""
+
+        url = reverse('task-list')
+        request = APIRequestFactory().post(url)
+        request.user = self.admin_user
+
+        return serializers.TaskSerializer(
+            data=data,
+            context={'request': request}
+        )
+
+    def test_serializer_resolves_lookups_from_cache(self):
+        """
+        Checks if the category, priority and status slugs are resolved
+        without querying the database once the lookups are cached.
+        """
+
+        data = {
+            'title': 'The third Task',
+            'description': 'The task to be tested.',
+            'category': self.human_resource_category.name,
+            'priority': self.priority.caption,
+            'status': self.status.caption,
+        }
+
+        # Loads the lookups into the cache
+        serializer = self.get_task_serializer(data)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+
+        serializer = self.get_task_serializer(data)
+        with self.assertNumQueries(0):
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+
+        validated_data = serializer.validated_data
+        self.assertEqual(
+            validated_data['category'], self.human_resource_category
+        )
+        self.assertEqual(validated_data['priority'], self.priority)
+        self.assertEqual(validated_data['status'], self.status)
+
+    def test_serializer_picks_up_changed_lookups(self):
+        """
+        Checks if a changed lookup is picked up by the next validation.
+        """
+
+        data = {
+            'title': 'The third Task',
+            'description': 'The task to be tested.',
+            'category': self.human_resource_category.name,
+            'priority': self.priority.caption,
+            'status': self.status.caption,
+        }
+
+        # Loads the lookups into the cache
+        serializer = self.get_task_serializer(data)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+
+        self.priority.caption = 'Low Priority'
+        self.priority.save()
+
+        # The old caption doesn't exist anymore
+        serializer = self.get_task_serializer(data)
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('priority', serializer.errors)
+
+        # The new caption resolves to the same priority
+        data['priority'] = 'Low Priority'
+        serializer = self.get_task_serializer(data)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(serializer.validated_data['priority'], self.priority)
+
+    def test_other_processes_pick_up_changed_lookups(self):
+        """
+        Checks if a lookup added by another process is picked up once the
+        local entries of this process expire.
+        """
+
+        data = {
+            'title': 'The third Task',
+            'description': 'The task to be tested.',
+            'category': self.human_resource_category.name,
+            'priority': 'Urgent',
+            'status': self.status.caption,
+        }
+
+        # Loads the lookups into the cache
+        self.get_task_serializer(data).is_valid()
+
+        # Another process adds a priority and bumps the shared version
+        priority = models.Priority.objects.bulk_create([
+            models.Priority(caption='Urgent')
+        ])[0]
+        cache.incr(lookups.get_version_key(models.Priority))
+
+        serializer = self.get_task_serializer(data)
+        self.assertFalse(serializer.is_valid())
+
+        expired = time.monotonic() + lookups.LOOKUP_LOCAL_TIMEOUT + 1
+        with mock.patch('api.lookups.time.monotonic', return_value=expired):
+            serializer = self.get_task_serializer(data)
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+
+        self.assertEqual(serializer.validated_data['priority'], priority)
+
+    # Bulk creation tests
+    def get_bulk_data(self, count, **fields):
+        """Returns the request data for (count) new tasks."""
+
+        return [
+            {
+                'title': f'Bulk Task {i}',
+                'description': 'A task of the bulk creation.',
+                'due_date': timezone.now().date() + timezone.timedelta(days=2),
+                'category': self.human_resource_category.name,
+                'priority': self.priority.caption,
+                **fields
+            }
+            for i in range(count)
+        ]
+
+    def test_bulk_creates_tasks_with_task_groups(self):
+        """
+        Checks if the bulk action creates the tasks together with their
+        task groups, team members, suggested positions and status like the
+        signal handlers of the single create do.
+        """
+
+        # Task manager
+        self.human_resource_position.is_task_manager = True
+        self.human_resource_position.save()
+        self.client.force_authenticate(user=self.regular_user1)
+
+        url = reverse('task-bulk')
+        response = self.client.post(
+            url, self.get_bulk_data(3), format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 3)
+
+        tasks = models.Task.objects.filter(title__startswith='Bulk Task')
+        self.assertEqual(tasks.count(), 3)
+
+        for task in tasks:
+            self.assertEqual(task.owner, self.regular_userprofile)
+            self.assertEqual(task.status, self.status)
+            self.assertEqual(
+                task.task_group.name, f'TaskGroup of {task.title}'
+            )
+            self.assertEqual(
+                list(task.task_group.team_members.all()),
+                [self.regular_userprofile]
+            )
+            self.assertEqual(
+                list(task.task_group.suggested_positions.all()),
+                [self.human_resource_position]
+            )
+
+        # Check if the rollup counts the new tasks
+        self.assertEqual(models.TaskStatsDaily.objects.verify(), [])
+
+    def test_bulk_query_count_is_constant(self):
+        """
+        Checks if the number of queries doesn't grow with the number of
+        created tasks.
+        """
+
+        self.client.force_authenticate(user=self.admin_user)
+        url = reverse('task-bulk')
+
+        resources = models.TaskResource.objects.bulk_create([
+            models.TaskResource(
+                source_name=f'Bulk Resource {i}',
+                description='A resource of the bulk creation.',
+                resource_link=f'https://example.com/bulk/{i}'
+            )
+            for i in range(80)
+        ])
+
+        def get_data(count, offset):
+            data = self.get_bulk_data(
+                count,
+                status='In Progress',
+                owner=self.regular_userprofile.email
+            )
+            for i, task in enumerate(data):
+                task['taskresource_set'] = [
+                    resource.source_name
+                    for resource in resources[2 * (offset + i):][:2]
+                ]
+            return data
+
+        # Loads the lookups into the cache
+        self.client.post(url, self.get_bulk_data(1, status='In Progress'), format='json')
+
+        with CaptureQueriesContext(connection) as few_tasks:
+            response = self.client.post(url, get_data(2, 0), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        with CaptureQueriesContext(connection) as many_tasks:
+            response = self.client.post(url, get_data(38, 2), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(len(few_tasks), len(many_tasks))
+        self.assertEqual(
+            models.TaskResource.objects.filter(
+                pk__in=[resource.pk for resource in resources],
+                task__isnull=False
+            ).count(),
+            len(resources)
+        )
+        self.assertEqual(
+            models.Task.objects.filter(
+                owner=self.regular_userprofile,
+                title__startswith='Bulk Task'
+            ).count(),
+            40
+        )
+
+    def test_bulk_reports_errors_per_task(self):
+        """
+        Checks if an invalid task rejects the whole request with the errors
+        of each task and creates nothing.
+        """
+
+        self.client.force_authenticate(user=self.admin_user)
+
+        data = self.get_bulk_data(3, status='In Progress')
+        data[1]['due_date'] = timezone.now().date()
+        data[2]['owner'] = 'nobody@example.com'
+
+        url = reverse('task-bulk')
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        errors = response.data['Details']
+        self.assertEqual(errors[0], {})
+        self.assertIn('due_date', errors[1])
+        self.assertIn('owner', errors[2])
+
+        self.assertFalse(
+            models.Task.objects.filter(title__startswith='Bulk Task').exists()
+        )
+
+    def test_bulk_requires_task_manager(self):
+        """Checks if regular users can't create tasks in bulk."""
+
+        self.client.force_authenticate(user=self.regular_user1)
+
+        url = reverse('task-bulk')
+        response = self.client.post(
+            url, self.get_bulk_data(2), format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    # Bulk status change tests
+    def test_bulk_change_status_per_status_group(self):
+        """
+        Checks if the bulk change_status action changes each status group
+        and keeps the rollup in sync.
+        """
+
+        tasks = self.seed_tasks(4, self.regular_userprofile)
+        completed_at = timezone.now()
+
+        # Seeded tasks bypass the rollup
+        models.TaskStatsDaily.objects.rebuild()
+
+        self.client.force_authenticate(user=self.admin_user)
+
+        url = reverse('task-bulk-change-status')
+        response = self.client.patch(
+            url,
+            [
+                {'ids': [tasks[0].id, tasks[1].id], 'status': 'Archived'},
+                {
+                    'ids': [tasks[2].id],
+                    'status': 'Completed',
+                    'completed_at': completed_at
+                }
+            ],
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        for task in tasks[:2]:
+            task.refresh_from_db()
+            self.assertEqual(task.status.caption, 'Archived')
+            self.assertIsNone(task.due_date)
+
+        tasks[2].refresh_from_db()
+        self.assertEqual(tasks[2].status.caption, 'Completed')
+        self.assertEqual(tasks[2].completed_at, completed_at)
+
+        # The last task is left untouched
+        tasks[3].refresh_from_db()
+        self.assertEqual(tasks[3].status, self.status)
+
+        self.assertEqual(models.TaskStatsDaily.objects.verify(), [])
+
+    def test_bulk_change_status_query_count_is_constant(self):
+        """
+        Checks if the number of queries doesn't grow with the number of
+        changed tasks.
+        """
+
+        few_tasks = self.seed_tasks(2, self.regular_userprofile)
+        many_tasks = self.seed_tasks(30, self.regular_userprofile)
+        due_date = timezone.now() + timezone.timedelta(days=5)
+
+        self.client.force_authenticate(user=self.admin_user)
+        url = reverse('task-bulk-change-status')
+
+        # Loads the lookups into the cache
+        models.Status.objects.create(caption='Postponed')
+        self.client.patch(
+            url,
+            {
+                'ids': [self.task2.id],
+                'status': 'Postponed',
+                'due_date': due_date
+            },
+            format='json'
+        )
+
+        query_counts = []
+        for tasks in [few_tasks, many_tasks]:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.patch(
+                    url,
+                    {
+                        'ids': [task.id for task in tasks],
+                        'status': 'Postponed',
+                        'due_date': due_date
+                    },
+                    format='json'
+                )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            query_counts.append(len(queries))
+
+            # The tasks are locked in a fixed order
+            lock_query = next(
+                query['sql'] for query in queries
+                if query['sql'].endswith('FOR UPDATE')
+            )
+            self.assertIn('ORDER BY "api_task"."id" ASC', lock_query)
+
+        self.assertEqual(query_counts[0], query_counts[1])
+        self.assertEqual(
+            models.Task.objects.filter(
+                status__caption='Postponed',
+                due_date=due_date.date()
+            ).count(),
+            33
+        )
+
+    def test_bulk_change_status_checks_ownership(self):
+        """
+        Checks if a task manager can't change tasks of other owners, which
+        are reported like unknown tasks, and nothing is changed then.
+        """
+
+        # Task manager
+        self.human_resource_position.is_task_manager = True
+        self.human_resource_position.save()
+        self.client.force_authenticate(user=self.regular_user1)
+
+        url = reverse('task-bulk-change-status')
+        response = self.client.patch(
+            url,
+            {
+                'ids': [self.task1.id, self.task2.id, 999999],
+                'status': 'Archived'
+            },
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.data['Details'], [self.task2.id, 999999])
+
+        self.task1.refresh_from_db()
+        self.assertEqual(self.task1.status, self.status)
+
+        # Own tasks only
+        response = self.client.patch(
+            url,
+            {'ids': [self.task1.id], 'status': 'Archived'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.task1.refresh_from_db()
+        self.assertEqual(self.task1.status.caption, 'Archived')
+
+    def test_bulk_change_status_validation(self):
+        """
+        Checks if unknown tasks and invalid status groups are rejected.
+        """
+
+        self.client.force_authenticate(user=self.admin_user)
+        url = reverse('task-bulk-change-status')
+
+        # Unknown task
+        response = self.client.patch(
+            url,
+            {'ids': [self.task1.id, 999999], 'status': 'Archived'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.data['Details'], [999999])
+
+        # 'Completed' without completed_at
+        response = self.client.patch(
+            url,
+            {'ids': [self.task1.id], 'status': 'Completed'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # Same task in two status groups
+        response = self.client.patch(
+            url,
+            [
+                {'ids': [self.task1.id], 'status': 'Archived'},
+                {
+                    'ids': [self.task1.id],
+                    'status': 'Completed',
+                    'completed_at': timezone.now()
+                }
+            ],
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    # Task creation service tests
+    def test_create_writes_task_once_with_status(self):
+        """
+        Checks if a new task is inserted once, with its task group and the
+        'In Progress' status already set, and not updated afterwards.
+        """
+
+        # Task manager
+        self.human_resource_position.is_task_manager = True
+        self.human_resource_position.save()
+        self.client.force_authenticate(user=self.regular_user1)
+
+        url = reverse('task-list')
+        data = self.get_bulk_data(1)[0]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        task_writes = [
+            query['sql'] for query in queries
+            if query['sql'].startswith(('INSERT INTO "api_task"',
+                                        'UPDATE "api_task"'))
+        ]
+        self.assertEqual(len(task_writes), 1)
+        self.assertTrue(task_writes[0].startswith('INSERT'))
+
+        task = models.Task.objects.get(id=response.data['id'])
+        self.assertEqual(task.status, self.status)
+        self.assertEqual(task.owner, self.regular_userprofile)
+        self.assertEqual(
+            list(task.task_group.team_members.all()),
+            [self.regular_userprofile]
+        )
+        self.assertEqual(models.TaskStatsDaily.objects.verify(), [])
@@ -20,7 +20,6 @@ class TestsTaskResourceModel(APITestCase):
 
         # Deactivate signal handlers for more control over setUp instances
         post_save.disconnect(signals.create_or_update_profile, sender=User)
-        post_save.disconnect(signals.create_task_group, sender=models.Task)
 
         # Creating user instances
         self.regular_user1 = User.objects.create(
@@ -651,3 +650,39 @@ class TestsTaskResourceModel(APITestCase):
 
         # Checks if the validate_task method raises no error
         self.assertEqual(validated_task, task)
+
+    def test_list_checks_membership_with_one_query(self):
+        """
+        Checks if the membership of the request user is queried once per
+        request instead of once per task resource.
+        """
+
+        # More task resources of both tasks
+        models.TaskResource.objects.bulk_create(
+            models.TaskResource(
+                source_name=f'Resource {i}',
+                description='Some descripion text for the instance',
+                resource_link='https://www.example.com/sample-page',
+                task=task
+            )
+            for i in range(10)
+            for task in [self.task1, self.task2]
+        )
+
+        # Authenticated user (team member of task_group1 only)
+        self.client.force_authenticate(user=self.regular_user1)
+
+        url = reverse('taskresource-list')
+
+        # Conditional GET validators, task resources (+ task) and the task
+        # group memberships
+        with self.assertNumQueries(3):
+            response = self.client.get(url, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        visible_resources = [data for data in response.data if data]
+        self.assertEqual(len(visible_resources), 11)
+        self.assertTrue(
+            all(data['task'] == self.task1.id for data in visible_resources)
+        )
@@ -18,7 +18,6 @@ class TestUserProfileModel(APITestCase):
 
         # Deactivate signal handlers for more control over setUp instances
         post_save.disconnect(signals.create_or_update_profile, sender=User)
-        post_save.disconnect(signals.create_task_group, sender=models.Task)
 
         # Creating user instances
         self.regular_user1 = User.objects.create(
@@ -554,3 +553,81 @@ class TestUserProfileModel(APITestCase):
         profile_id = response.data['profile']
         profile_instance = models.UserProfile.objects.get(id=profile_id)
         self.assertEqual(one_off_userprofile, profile_instance)
+
+    # Search
+    def test_search_matches_all_terms_and_ranks_by_similarity(self):
+        """
+        Tests if the search requires every term, matches the phone number
+        exactly and orders by similarity.
+        """
+
+        # Authenticated user
+        self.client.force_authenticate(user=self.regular_user1)
+
+        url = reverse('userprofile-list')
+
+        # Equally similar matches are ordered by id
+        response = self.client.get(url, {'search': 'tu'})
+        self.assertEqual(
+            [profile['id'] for profile in response.data],
+            [self.admin_userprofile.id, self.regular_userprofile2.id]
+        )
+        response = self.client.get(url, {'search': 'tuck'})
+        self.assertEqual(
+            [profile['id'] for profile in response.data],
+            [self.regular_userprofile2.id]
+        )
+
+        response = self.client.get(url, {'search': 'peter pahn'})
+        self.assertEqual(
+            [profile['id'] for profile in response.data],
+            [self.regular_userprofile.id]
+        )
+
+        response = self.client.get(url, {'search': '163557799'})
+        self.assertEqual(
+            [profile['id'] for profile in response.data],
+            [self.regular_userprofile.id]
+        )
+
+    # Autocomplete
+    def test_autocomplete_returns_best_matches(self):
+        """
+        Tests if the autocomplete action returns the (id, name, email) of
+        the best matches within the limit.
+        """
+
+        # Authenticated user
+        self.client.force_authenticate(user=self.regular_user1)
+
+        url = reverse('userprofile-autocomplete')
+        response = self.client.get(url, {'q': 'tucker'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data,
+            [[self.regular_userprofile2.id, 'Chris Tucker',
+              'christucker@gmail.com']]
+        )
+
+        response = self.client.get(url, {'q': 'gmail', 'limit': 2})
+        self.assertEqual(len(response.data), 2)
+
+        # Too short to be narrowed down by the indexes
+        response = self.client.get(url, {'q': 'tu'})
+        self.assertEqual(response.data, [])
+
+        response = self.client.get(url, {'q': 'gmail', 'limit': 'all'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unauthenticated_user_cant_access_autocomplete(self):
+        """Tests if the autocomplete action disallows unauthenticated users.
+        """
+
+        # Unauthenticated user
+
+        url = reverse('userprofile-autocomplete')
+        response = self.client.get(url, {'q': 'tucker'})
+
+        # Check if access is denied
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -1,9 +1,25 @@
+import csv
+import hashlib
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist, \
+    ValidationError as DjangoValidationError
+from django.db import connection, transaction
+from dateutil.relativedelta import relativedelta
+from django.db.models import Count, DateField, F, Max, Q, Sum, \
+    prefetch_related_objects
+from django.db.models.functions import Coalesce, Trunc
 from django.utils import timezone
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response, \
+    patch_cache_control, patch_vary_headers
+from django.utils.dateparse import parse_date
+from django.utils.http import http_date
 from rest_framework.viewsets import ModelViewSet
-from api import serializers, models, permissions
-from rest_framework.authentication import TokenAuthentication
+from api import serializers, models, permissions, pagination, \
+    authentication, services, filters, lookups, renderers, imports
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework import status
 from django.shortcuts import get_object_or_404
@@ -11,11 +27,345 @@ from rest_framework.settings import api_settings
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.parsers import MultiPartParser
+from rest_framework.relations import PrimaryKeyRelatedField, SlugRelatedField
 # Create your views here.
 
 User = get_user_model()
 
 
+# View mixins
+class ConditionalGetMixin:
+    """
+    Answers list and retrieve requests whose validators are still current
+    with a 304 Not Modified before anything is serialized.
+
+    The validators are the latest updated_at and the ids of the rows of the
+    response, so deleted rows change them too. Paginated lists take them
+    from the rows of the page (which needs updated_at loaded, see
+    SparseFieldsViewMixin.sparse_required_fields) and its links, so no
+    query runs over all matching rows. Unpaginated lists get them from one
+    aggregate (latest updated_at and count) over the filtered rows.
+
+    The ETag (If-None-Match) also covers the full path (query params and
+    page), the request user (the visible rows and fields depend on it) and
+    the lookup versions of the etag_lookup_models, whose slugs are part of
+    the representation, and the team memberships of the user if
+    etag_memberships is set.
+
+    Last-Modified is sent for both, but If-Modified-Since is only honored
+    by retrieve: a list whose rows were deleted keeps its latest updated_at.
+    """
+
+    etag_lookup_models = []
+    # Whether the representation depends on the task group memberships of
+    # the request user (e.g. hides the rows of other teams)
+    etag_memberships = False
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+
+        if self.paginator is None:
+            validators = queryset.order_by().aggregate(
+                updated_at=Max('updated_at'),
+                count=Count('pk')
+            )
+
+            return self.get_conditional_response(
+                request,
+                validators['updated_at'],
+                validators['count'],
+                lambda: super(ConditionalGetMixin, self).list(
+                    request, *args, **kwargs
+                ),
+                modified_since=False
+            )
+
+        # The prefetches are only needed if the page gets serialized
+        prefetch_lookups = queryset._prefetch_related_lookups
+        page = self.paginate_queryset(queryset.prefetch_related(None))
+
+        def get_response():
+            prefetch_related_objects(page, *prefetch_lookups)
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        return self.get_conditional_response(
+            request,
+            max((row.updated_at for row in page), default=None),
+            [
+                [row.pk for row in page],
+                self.paginator.get_next_link(),
+                self.paginator.get_previous_link()
+            ],
+            get_response,
+            modified_since=False
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+
+        try:
+            updated_at = self.filter_queryset(self.get_queryset()).filter(**{
+                self.lookup_field: self.kwargs[lookup_url_kwarg]
+            }).order_by().values_list('updated_at', flat=True).first()
+        except (TypeError, ValueError, DjangoValidationError):
+            updated_at = None
+
+        # Missing objects and invalid lookups get the usual 404 of retrieve
+        if updated_at is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        return self.get_conditional_response(
+            request,
+            updated_at,
+            1,
+            lambda: super(ConditionalGetMixin, self).retrieve(
+                request, *args, **kwargs
+            )
+        )
+
+    def get_conditional_response(self, request, updated_at, rows,
+                                 get_response, modified_since=True):
+        """
+        Returns a 304 response if the validators of the request match,
+        otherwise the response of get_response with the validators set.
+        """
+
+        etag = self.get_etag(request, updated_at, rows)
+        last_modified = int(updated_at.timestamp()) if updated_at else None
+
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=last_modified if modified_since else None
+        )
+
+        if response is None:
+            response = get_response()
+
+        if response.status_code == status.HTTP_200_OK or \
+                response.status_code == status.HTTP_304_NOT_MODIFIED:
+            response['ETag'] = etag
+
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+
+        # The response depends on the user of the token
+        patch_vary_headers(response, ['Authorization'])
+
+        return response
+
+    def get_etag(self, request, updated_at, rows):
+        """
+        Returns the quoted ETag of the rows of the request, identified by
+        rows (e.g. their count).
+        """
+
+        parts = [
+            request.get_full_path(),
+            request.user.pk,
+            updated_at.isoformat() if updated_at else '',
+            rows,
+            *lookups.get_versions(self.etag_lookup_models)
+        ]
+
+        if self.etag_memberships and not request.user.is_staff:
+            parts.append(sorted(permissions.get_task_group_ids(request)))
+
+        digest = hashlib.md5(
+            '|'.join(str(part) for part in parts).encode(),
+            usedforsecurity=False
+        ).hexdigest()
+
+        return f'"{digest}"'
+
+
+class LookupCacheMixin:
+    """
+    Serves the list and retrieve responses of a lookup table (Priority,
+    Status, Category, Position) from the Django cache, keyed by the full
+    URL and the lookup versions of the cache_lookup_models. Saving or
+    deleting a row bumps the version of its table (see
+    signals.bump_lookup_version), so stale responses are never served.
+
+    Only the response data is cached, it is rendered for every request.
+    The data is the same for every user, so Cache-Control lets clients and
+    shared caches reuse a response for cache_max_age seconds, varying on
+    the Authorization header.
+    """
+
+    # Models whose rows are part of the representation, defaults to the
+    # model of the queryset
+    cache_lookup_models = []
+    cache_max_age = 60
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            request,
+            lambda: super(LookupCacheMixin, self).list(
+                request, *args, **kwargs
+            )
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            request,
+            lambda: super(LookupCacheMixin, self).retrieve(
+                request, *args, **kwargs
+            )
+        )
+
+    def get_cached_response(self, request, get_response):
+        """
+        Returns a response with the cached data of the request, otherwise
+        the response of get_response, whose data is cached if successful.
+        """
+
+        cache_key = self.get_cache_key(request)
+        data = cache.get(cache_key)
+
+        if data is not None:
+            response = Response(data)
+        else:
+            response = get_response()
+
+            if response.status_code == status.HTTP_200_OK:
+                cache.set(
+                    cache_key,
+                    response.data,
+                    lookups.LOOKUP_CACHE_TIMEOUT
+                )
+
+        if response.status_code == status.HTTP_200_OK:
+            # Every authenticated user gets the same data
+            patch_cache_control(
+                response,
+                public=True,
+                max_age=self.cache_max_age
+            )
+            patch_vary_headers(response, ['Authorization'])
+
+        return response
+
+    def get_cache_key(self, request):
+        """Returns the cache key of the response data of the request."""
+
+        lookup_models = self.cache_lookup_models or [self.queryset.model]
+        versions = '.'.join(
+            str(version) for version in lookups.get_versions(lookup_models)
+        )
+        url = hashlib.md5(
+            request.build_absolute_uri().encode(),
+            usedforsecurity=False
+        ).hexdigest()
+
+        return f'lookup-response:{self.queryset.model._meta.label_lower}:' \
+            f'{versions}:{url}'
+
+
+class SparseFieldsViewMixin:
+    """
+    Loads only what the serializer fields of a list or retrieve request
+    need, after they were trimmed by ?fields= / ?omit= (see
+    serializers.SparseFieldsMixin): the columns of the remaining fields
+    (.only()) and only those of the list_select_related and
+    list_prefetch_related relations that belong to a remaining field. Of a
+    selected relation shown by its primary key or a slug only that column
+    is loaded.
+
+    Columns that are needed regardless of the fields (e.g. by permissions
+    or a serializer) are listed in sparse_required_fields. The ordering
+    field of the pagination is always loaded.
+    """
+
+    list_select_related = []
+    list_prefetch_related = []
+    sparse_required_fields = []
+
+    def get_sparse_queryset(self, queryset):
+        """Returns the queryset trimmed to the fields of the serializer."""
+
+        serializer = self.get_serializer()
+        fields = {
+            field.source.split('.')[0]: field
+            for field in serializer.fields.values()
+            if field.source != '*'
+        }
+        sources = set(fields)
+
+        columns = [
+            name for name in sources | set(self.get_ordering_fields(queryset))
+            if self.is_column(queryset.model, name)
+        ]
+
+        select_related = [
+            relation for relation in self.list_select_related
+            if relation.split('__')[0] in sources
+        ]
+        prefetch_related = [
+            relation for relation in self.list_prefetch_related
+            if relation.split('__')[0] in sources
+        ]
+
+        # select_related() without relations would follow all of them
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+
+        related_columns = []
+        for relation in select_related:
+            related_columns.extend(self.get_related_columns(
+                queryset.model, relation, fields[relation.split('__')[0]]
+            ))
+
+        return queryset.prefetch_related(*prefetch_related).only(
+            'pk', *columns, *related_columns, *self.sparse_required_fields
+        )
+
+    def get_related_columns(self, model, relation, field):
+        """
+        Returns the columns of a selected relation the field shows: its
+        primary key or slug. Relations shown otherwise (e.g. nested) and
+        nested relations (e.g. 'owner__position') are loaded whole.
+        """
+
+        if '__' in relation:
+            return []
+
+        related_model = model._meta.get_field(relation).related_model
+        pk_column = f'{relation}__{related_model._meta.pk.name}'
+
+        if isinstance(field, PrimaryKeyRelatedField):
+            return [pk_column]
+
+        if isinstance(field, SlugRelatedField) and \
+                '__' not in field.slug_field:
+            return [pk_column, f'{relation}__{field.slug_field}']
+
+        return []
+
+    def get_ordering_fields(self, queryset):
+        """Returns the ordering field of the pagination, if any."""
+
+        if not hasattr(self.paginator, 'get_ordering'):
+            return []
+
+        field, descending = self.paginator.get_ordering(
+            self.request, queryset, self
+        )
+        return [field]
+
+    def is_column(self, model, name):
+        """Checks if the name is a concrete, non many-to-many field."""
+
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return False
+
+        return field.concrete and not field.many_to_many
+
+
 class CustomUserView(ModelViewSet):
     """
     Modelviewset for CustomUser model with basic crud functions.
@@ -23,8 +373,9 @@ class CustomUserView(ModelViewSet):
 
     queryset = User.objects.all()
     serializer_class = serializers.CustomUserSerializer
-    authentication_classes = [TokenAuthentication]
-    filter_backends = [SearchFilter,]
+    authentication_classes = [authentication.CachedTokenAuthentication]
+    # Trigram indexed search
+    filter_backends = [filters.TrigramSearchFilter,]
     search_fields = ['email']
 
     def get_permissions(self):
@@ -50,16 +401,18 @@ class CustomUserView(ModelViewSet):
         return [permission() for permission in permission_classes]
 
 
-class PositionView(ModelViewSet):
+class PositionView(LookupCacheMixin, ModelViewSet):
     """
     Modelviewset for Position model with basic crud functions.
     """
 
     queryset = models.Position.objects.all()
     serializer_class = serializers.PositionSerializer
-    authentication_classes = [TokenAuthentication,]
+    authentication_classes = [authentication.CachedTokenAuthentication]
     filter_backends = [SearchFilter,]
     search_fields = ['title']
+    # The category slug is part of the position representation
+    cache_lookup_models = [models.Position, models.Category]
 
     def get_permissions(self):
         """Requires specific permissions depending on the view action and
@@ -81,14 +434,14 @@ class PositionView(ModelViewSet):
         return [permission() for permission in permission_classes]
 
 
-class CategoryView(ModelViewSet):
+class CategoryView(LookupCacheMixin, ModelViewSet):
     """
     Modelviewset for Category model with basic crud functions.
     """
 
     queryset = models.Category.objects.all()
     serializer_class = serializers.CategorySerializer
-    authentication_classes = [TokenAuthentication,]
+    authentication_classes = [authentication.CachedTokenAuthentication]
     filter_backends = [SearchFilter,]
     search_fields = ['name']
 
@@ -112,14 +465,14 @@ class CategoryView(ModelViewSet):
         return [permission() for permission in permission_classes]
 
 
-class StatusView(ModelViewSet):
+class StatusView(LookupCacheMixin, ModelViewSet):
     """
     Modelviewset for Status model with basic crud functions.
     """
 
     queryset = models.Status.objects.all()
     serializer_class = serializers.StatusSerializer
-    authentication_classes = [TokenAuthentication,]
+    authentication_classes = [authentication.CachedTokenAuthentication]
     filter_backends = [SearchFilter,]
     search_fields = ['caption']
 
@@ -145,14 +498,14 @@ class StatusView(ModelViewSet):
         return [permission() for permission in permission_classes]
 
 
-class PriorityView(ModelViewSet):
+class PriorityView(LookupCacheMixin, ModelViewSet):
     """
     Modelviewset for Task model with basic crud functions.
     """
 
     queryset = models.Priority.objects.all()
     serializer_class = serializers.PrioritySerializer
-    authentication_classes = [TokenAuthentication,]
+    authentication_classes = [authentication.CachedTokenAuthentication]
     filter_backends = [SearchFilter,]
     search_fields = ['caption']
 
@@ -185,15 +538,62 @@ class UserProfileView(ModelViewSet):
 
     queryset = models.UserProfile.objects.all()
     serializer_class = serializers.UserProfileSerializer
-    authentication_classes = [TokenAuthentication]
-    filter_backends = [SearchFilter, OrderingFilter]
-    search_fields = [
-        'owner', 'first_name', 'last_name', 'phone_number', 'position'
-    ]
+    authentication_classes = [authentication.CachedTokenAuthentication]
+    # Trigram indexed search, phone numbers are matched exactly
+    filter_backends = [filters.TrigramSearchFilter, OrderingFilter]
+    search_fields = ['first_name', 'last_name', 'email']
+    search_exact_fields = ['phone_number']
     ordering_fields = [
         'owner', 'first_name', 'last_name', 'position'
     ]
 
+    # Results of the autocomplete action
+    autocomplete_min_length = 3
+    autocomplete_limit = 10
+    autocomplete_max_limit = 50
+
+    # Autocomplete for people pickers
+    @action(detail=False, methods=['GET'])
+    def autocomplete(self, request):
+        """
+        Gives the best matching user profiles for ?q= as [id, name, email]
+        arrays, best match first (at most ?limit=, defaults to 10).
+
+        Queries shorter than 3 characters give no results, because the
+        trigram indexes can't narrow them down. The indexes find the
+        candidate profiles, which are then read from the table to recheck
+        and rank them.
+        """
+
+        query = request.query_params.get('q', '').strip()
+
+        try:
+            limit = min(
+                int(request.query_params.get(
+                    'limit', self.autocomplete_limit
+                )),
+                self.autocomplete_max_limit
+            )
+        except ValueError:
+            raise ValidationError(
+                {'Error': "The 'limit' query param expects a number"}
+            )
+
+        if len(query) < self.autocomplete_min_length or limit < 1:
+            return Response([])
+
+        profiles = filters.TrigramSearchFilter().search(
+            models.UserProfile.objects.all(),
+            self.search_fields,
+            query.split(),
+            self.search_exact_fields
+        ).values_list('id', 'first_name', 'last_name', 'email')[:limit]
+
+        return Response([
+            [profile_id, f'{first_name} {last_name}'.strip(), email]
+            for profile_id, first_name, last_name, email in profiles
+        ])
+
     def get_permissions(self):
         """
         Requires specific permissions depending on the view action and
@@ -201,7 +601,8 @@ class UserProfileView(ModelViewSet):
         """
 
         if self.action == 'list' or \
-                self.action == 'retrieve':
+                self.action == 'retrieve' or \
+                self.action == 'autocomplete':
             permission_classes = [IsAuthenticated]
 
         elif self.action == 'create' or \
@@ -218,17 +619,40 @@ class UserProfileView(ModelViewSet):
         return [permission() for permission in permission_classes]
 
 
-class TaskGroupView(ModelViewSet):
+class TaskGroupView(ConditionalGetMixin, SparseFieldsViewMixin,
+                    ModelViewSet):
     """
     Modelviewset for TaskGroup model with basic crud functions.
     """
 
     queryset = models.TaskGroup.objects.all()
     serializer_class = serializers.TaskGroupSerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [authentication.CachedTokenAuthentication]
     filter_backends = [SearchFilter,]
     search_fields = ['name', 'id']
 
+    # Relations read by the task group serializer representation
+    list_select_related = ['task']
+    list_prefetch_related = ['suggested_positions', 'team_members']
+
+    # Lookups whose slugs are part of the task group representation
+    etag_lookup_models = [models.Position]
+    etag_memberships = True
+
+    def get_queryset(self):
+        """
+        Loads only the columns and relations of the requested fields for
+        list and retrieve (see SparseFieldsViewMixin).
+        """
+
+        queryset = super().get_queryset()
+
+        if self.action == 'list' or \
+                self.action == 'retrieve':
+            queryset = self.get_sparse_queryset(queryset)
+
+        return queryset
+
     def get_permissions(self):
         """
         Requires specific permissions depending on the view action and
@@ -254,21 +678,237 @@ class TaskGroupView(ModelViewSet):
         return [permission() for permission in permission_classes]
 
 
-class TaskView(ModelViewSet):
+class TaskView(ConditionalGetMixin, SparseFieldsViewMixin, ModelViewSet):
     """
     Modelviewset for Task model with basic crud functions.
     """
 
     queryset = models.Task.objects.all()
     serializer_class = serializers.TaskSerializer
-    authentication_classes = [TokenAuthentication]
-    filter_backends = [SearchFilter, OrderingFilter]
-    search_fields = ['title', 'id', 'owner', 'task_group']
+    authentication_classes = [authentication.CachedTokenAuthentication]
+    pagination_class = pagination.KeysetPagination
+    # Ranked full text search over the title and description
+    filter_backends = [filters.TaskSearchFilter, OrderingFilter]
     ordering_fields = [
         'title', 'id', 'due_date', 'category', 'priority',
         'status', 'owner', 'task_group', 'completed_at'
     ]
 
+    # Relations read by the task serializer representation. Loaded up
+    # front for list/retrieve so the number of queries doesn't grow with
+    # the number of tasks.
+    list_select_related = ['owner', 'category', 'priority', 'status']
+    list_prefetch_related = ['taskresource_set']
+
+    # Validator of the conditional GETs of the list pages
+    sparse_required_fields = ['updated_at']
+
+    # Lookups whose slugs are part of the task representation
+    etag_lookup_models = [models.Category, models.Priority, models.Status]
+    # The visible tasks depend on the task groups of the user
+    etag_memberships = True
+
+    # Periods of the trends action
+    trend_periods = ['day', 'week', 'month']
+
+    # Maximum number of tasks per request of the bulk action
+    bulk_max_tasks = 1000
+
+    # Number of tasks per query of the export action
+    export_chunk_size = 2000
+
+    # Bulk creation
+    @action(detail=False, methods=['POST'])
+    def bulk(self, request):
+        """
+        Creates several tasks at once. Expects a json array of task
+        objects with the same fields as the create action (at most
+        bulk_max_tasks).
+
+        Either all tasks are created or none. If any task is invalid, the
+        details contain the errors of each task in the order of the
+        request (an empty object for the valid ones).
+
+        The tasks, their task groups, team members and suggested positions
+        are inserted with bulk statements, so the post_save signal
+        handlers of the single create don't run per task.
+        """
+
+        if not isinstance(request.data, list) or not request.data:
+            return Response(
+                {
+                    'Error': '''Request.data expects a json array of task
+                    objects (e.g. [{"title": "...", ...}, ...])'''
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if len(request.data) > self.bulk_max_tasks:
+            return Response(
+                {
+                    'Error': f'''Request.data cant contain more than
+                    {self.bulk_max_tasks} tasks'''
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = self.get_serializer(data=request.data, many=True)
+
+        if not serializer.is_valid():
+            return Response(
+                {
+                    'Error': '400 Bad Request', 'Details': serializer.errors
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Like perform_create, the request user owns tasks without owner
+        tasks_data = serializer.validated_data
+        for task_data in tasks_data:
+            if 'owner' not in task_data:
+                task_data['owner'] = request.user.profile
+
+        tasks = services.bulk_create_tasks(tasks_data)
+
+        queryset = models.Task.objects.filter(
+            id__in=[task.id for task in tasks]
+        ).select_related(
+            *self.list_select_related
+        ).prefetch_related(
+            *self.list_prefetch_related
+        ).order_by('id')
+
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    # Export
+    @action(
+        detail=False,
+        methods=['GET'],
+        renderer_classes=[renderers.NDJSONRenderer, renderers.CSVRenderer]
+    )
+    def export(self, request):
+        """
+        Streams all tasks of the list (same visibility, ?search=,
+        ?ordering=, ?fields= and ?omit=) as newline delimited JSON
+        (?format=ndjson, the default) or CSV (?format=csv), without
+        pagination.
+
+        The tasks are read in chunks of export_chunk_size from a single
+        repeatable read snapshot and rendered one row at a time, so the
+        memory use doesn't depend on the number of tasks.
+        """
+
+        queryset = self.filter_queryset(self.get_queryset())
+
+        # A stable order unless the request asks for one
+        if not queryset.query.order_by:
+            queryset = queryset.order_by('id')
+
+        serializer = self.get_serializer()
+        renderer = request.accepted_renderer
+
+        response = StreamingHttpResponse(
+            renderer.render_stream(
+                (
+                    serializer.to_representation(task)
+                    for task in self.iterate_snapshot(queryset)
+                ),
+                fields=list(serializer.fields)
+            ),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}'
+        )
+        response['Content-Disposition'] = \
+            f'attachment; filename="tasks.{renderer.format}"'
+
+        return response
+
+    def iterate_snapshot(self, queryset):
+        """
+        Yields the rows of the queryset in chunks (prefetches included)
+        from one REPEATABLE READ transaction, so every chunk sees the
+        tables as of the first query. Inside an outer transaction its
+        isolation level is kept.
+        """
+
+        outermost = not connection.in_atomic_block
+
+        with transaction.atomic():
+            if outermost:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        'SET TRANSACTION ISOLATION LEVEL REPEATABLE READ'
+                    )
+
+            yield from queryset.iterator(chunk_size=self.export_chunk_size)
+
+    # Import
+    @action(
+        detail=False,
+        methods=['POST'],
+        url_path='import',
+        url_name='import',
+        parser_classes=[MultiPartParser]
+    )
+    def import_tasks(self, request):
+        """
+        Imports the tasks of an uploaded CSV, JSON or NDJSON file (the
+        'file' field, e.g. an export of the task list) through a COPY into
+        a staging table (see imports.import_tasks). The format is taken
+        from the 'format' field or the file extension. Tasks without owner
+        are owned by the request user.
+
+        Either all tasks are imported or none. The response reports the
+        number of tasks and the throughput in rows per second, or the
+        errors per row.
+        """
+
+        file = request.FILES.get('file')
+
+        if file is None:
+            return Response(
+                {'Error': 'Request.data expects a file in the file field'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        file_format = request.data.get('format') or \
+            imports.get_format(file.name)
+
+        if file_format not in imports.FORMATS:
+            return Response(
+                {
+                    'Error': f'''The format must be one of
+                    {", ".join(imports.FORMATS)}'''
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            result = imports.import_tasks(
+                imports.read_rows(file, file_format),
+                default_owner=getattr(request.user, 'profile', None)
+            )
+        except (ValueError, csv.Error) as error:
+            return Response(
+                {'Error': f'The file could not be read: {error}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if result.errors:
+            return Response(
+                {'Error': '400 Bad Request', 'Details': result.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(
+            {
+                'imported': result.imported,
+                'seconds': round(result.seconds, 3),
+                'rows_per_second': round(result.rows_per_second)
+            },
+            status=status.HTTP_201_CREATED
+        )
+
     # Status Change
     @action(detail=True, methods=['PATCH'])
     def change_status(self, request, pk):
@@ -326,81 +966,351 @@ class TaskView(ModelViewSet):
             status=status.HTTP_400_BAD_REQUEST
         )
 
+    # Bulk status change
+    @action(
+        detail=False,
+        methods=['PATCH'],
+        url_path='change_status',
+        url_name='bulk-change-status'
+    )
+    def bulk_change_status(self, request):
+        """
+        Changes the status of several tasks at once with the same rules as
+        the change_status action. Expects a json object with the ids of
+        the tasks and the fields of the change_status action, or a json
+        array of such objects (one per status group).
+
+        Example:
+        - [{"ids": [1, 2], "status": "Archived"},
+           {"ids": [3], "status": "Completed",
+            "completed_at": "datetime"}]
+
+        Either all tasks are changed or none. Non-staff users can only
+        change the tasks they own, other tasks are not found for them. The
+        tasks are checked and locked (in id order, so overlapping requests
+        can't deadlock) by one query and each status group is changed by
+        one UPDATE statement.
+        """
+
+        data = request.data
+        if isinstance(data, dict):
+            data = [data]
+
+        if not isinstance(data, list) or not data:
+            return Response(
+                {
+                    'Error': '''Request.data expects a json object or array
+                    of objects (e.g.
+                    {"ids": [1, 2], "status": "Archived"})'''
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = serializers.BulkStatusChangeSerializer(
+            data=data,
+            many=True
+        )
+        if not serializer.is_valid():
+            return Response(
+                {
+                    'Error': '400 Bad Request', 'Details': serializer.errors
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        status_groups = serializer.validated_data
+        for status_group in status_groups:
+            status_group['ids'] = set(status_group['ids'])
+
+        task_ids = set().union(
+            *[status_group['ids'] for status_group in status_groups]
+        )
+        if len(task_ids) != sum(
+            len(status_group['ids']) for status_group in status_groups
+        ):
+            return Response(
+                {'Error': 'A task can only be in one status group'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        with transaction.atomic():
+            tasks = models.Task.objects.select_for_update().only(
+                'owner', 'status', 'created_at', 'completed_at'
+            ).filter(id__in=task_ids)
+
+            # Tasks of other owners are not found (except for staff), so
+            # the response doesn't tell which ids exist
+            if not request.user.is_staff:
+                tasks = tasks.filter(owner=request.user.profile)
+
+            # in_bulk would drop the ordering the rows are locked in
+            tasks = {task.id: task for task in tasks.order_by('pk')}
+
+            missing_ids = sorted(task_ids - tasks.keys())
+            if missing_ids:
+                return Response(
+                    {'Error': '404 Not Found', 'Details': missing_ids},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+
+            for status_group in status_groups:
+                services.change_tasks_status(
+                    [tasks[task_id] for task_id in status_group['ids']],
+                    services.get_status(status_group['status']),
+                    due_date=status_group.get('due_date'),
+                    completed_at=status_group.get('completed_at')
+                )
+
+        return Response(
+            {
+                'Message': f'''The status of {len(task_ids)} tasks was
+                successfully updated'''
+            },
+            status=status.HTTP_200_OK
+        )
+
     # Statistics for tasks
     @action(detail=False, methods=['GET'])
     def tasks_statistics(self, request):
         """
         Gives numbers of all the tasks acording to their statuses
-        within the last 3 months of which the request user is the
-        owner. Staff user can see all the tasks in the system 
-        independent from ownership status.
+        within the last 3 months (or between the optional ?from= and
+        ?to= dates, e.g. ?from=2024-01-01&to=2024-03-31) of which the
+        request user is the owner. Staff user can see all the tasks in the
+        system independent from ownership status.
+
+        All numbers are computed by a single aggregate query over the
+        TaskStatsDaily rollup. Tasks are counted on the day of their
+        completed_at or, if not completed, their created_at datetime.
         """
 
-        current_date = timezone.now().date()
-        three_month_earlier = current_date - timezone.timedelta(days=60)
+        from_date, to_date = self.get_date_range(request, default_days=60)
+
+        # Reads the daily rollup, so the cost depends on the number of days
+        # instead of the number of tasks.
+        stats = self.get_task_stats(request)
+        in_range = Q(day__gte=from_date, day__lte=to_date)
+
+        statistics = stats.aggregate(
+            completed_tasks=Coalesce(Sum(
+                'count', filter=Q(status__caption='Completed') & in_range
+            ), 0),
+            postponed_tasks=Coalesce(Sum(
+                'count', filter=Q(status__caption='Postponed') & in_range
+            ), 0),
+            archived_tasks=Coalesce(Sum(
+                'count', filter=Q(status__caption='Archived') & in_range
+            ), 0),
+            tasks_in_progress=Coalesce(Sum(
+                'count', filter=Q(status__caption='In Progress')
+            ), 0)
+        )
+
+        return Response(
+            {
+                'completed_tasks (last 3 months)':
+                    statistics['completed_tasks'],
+                'postponed_tasks (last 3 months)':
+                    statistics['postponed_tasks'],
+                'archived_tasks (last 3 months)':
+                    statistics['archived_tasks'],
+                'tasks_in_progress (last 3 months)':
+                    statistics['tasks_in_progress'],
+                'from': from_date,
+                'to': to_date
+            }
+        )
 
-        # For staff users
-        if request.user.is_staff:
+    # Completion trends for tasks
+    @action(detail=False, methods=['GET'])
+    def trends(self, request):
+        """
+        Gives the numbers of created, completed and overdue tasks per day,
+        week or month (?period=day|week|month, defaults to day) within the
+        last 3 months or between the optional ?from= and ?to= dates. Like
+        the tasks_statistics, non-staff users only get the numbers of
+        tasks they own.
+
+        The tasks are grouped into periods by the database, one GROUP BY
+        query per number. The completed tasks are read from the
+        TaskStatsDaily rollup.
+        """
 
-            completed_tasks = models.Task.objects.filter(
-                status='Completed',
-                completed_at__lte=current_date,
-                completed_at__gte=three_month_earlier
-            ).count()
+        period = request.query_params.get('period', 'day')
 
-            postponed_tasks = models.Task.objects.filter(
-                status='Postponed',
-                completed_at__lte=current_date,
-                completed_at__gte=three_month_earlier
-            ).count()
+        if period not in self.trend_periods:
+            raise ValidationError(
+                {
+                    'Error': f'''The 'period' query param expects one of
+                    {', '.join(self.trend_periods)}'''
+                }
+            )
 
-            archived_tasks = models.Task.objects.filter(
-                status='Archived',
-                completed_at__lte=current_date,
-                completed_at__gte=three_month_earlier
-            ).count()
+        from_date, to_date = self.get_date_range(request, default_days=60)
+        start, end = self.get_datetime_range(from_date, to_date)
+        current_date = timezone.now().date()
 
-            tasks_in_progress = models.Task.objects.filter(
-                status='In Progress'
-            ).count()
+        tasks = models.Task.objects.all()
 
         # For non staff users
-        else:
-            completed_tasks = models.Task.objects.filter(
-                owner=request.user,
-                status='Completed',
-                completed_at__lte=current_date,
-                completed_at__gte=three_month_earlier
-            ).count()
-
-            postponed_tasks = models.Task.objects.filter(
-                owner=request.user,
-                status='Postponed',
-                completed_at__lte=current_date,
-                completed_at__gte=three_month_earlier
-            ).count()
-
-            archived_tasks = models.Task.objects.filter(
-                owner=request.user,
-                status='Archived',
-                completed_at__lte=current_date,
-                completed_at__gte=three_month_earlier
-            ).count()
-
-            tasks_in_progress = models.Task.objects.filter(
-                owner=request.user,
-                status='In Progress'
-            ).count()
+        if not request.user.is_staff:
+            tasks = tasks.filter(owner=getattr(request.user, 'profile', None))
+
+        created = tasks.filter(
+            created_at__gte=start,
+            created_at__lt=end
+        ).annotate(
+            period_start=Trunc('created_at', period, output_field=DateField())
+        )
+
+        # Completed tasks come from the daily rollup
+        completed = self.get_task_stats(request).filter(
+            status__caption='Completed',
+            day__gte=from_date,
+            day__lte=to_date
+        ).annotate(
+            period_start=Trunc('day', period, output_field=DateField())
+        )
+
+        # Tasks whose due date passed without being completed in time
+        overdue = tasks.filter(
+            Q(completed_at__isnull=True) |
+            Q(completed_at__date__gt=F('due_date')),
+            due_date__gte=from_date,
+            due_date__lte=to_date,
+            due_date__lt=current_date
+        ).annotate(
+            period_start=Trunc('due_date', period, output_field=DateField())
+        )
+
+        # One row per period with data, every other period stays at 0
+        trends = {
+            period_start: {'created': 0, 'completed': 0, 'overdue': 0}
+            for period_start in self.get_periods(from_date, to_date, period)
+        }
+
+        for key, rows in [
+            ('created', created.values('period_start').annotate(
+                count=Count('id')
+            )),
+            ('completed', completed.values('period_start').annotate(
+                count=Sum('count')
+            )),
+            ('overdue', overdue.values('period_start').annotate(
+                count=Count('id')
+            ))
+        ]:
+            rows = rows.order_by()
+
+            for row in rows:
+                trends[row['period_start']][key] = row['count']
 
         return Response(
             {
-                'completed_tasks (last 3 months)': completed_tasks,
-                'postponed_tasks (last 3 months)': postponed_tasks,
-                'archived_tasks (last 3 months)': archived_tasks,
-                'tasks_in_progress (last 3 months)': tasks_in_progress
+                'period': period,
+                'from': from_date,
+                'to': to_date,
+                'results': [
+                    {'period_start': period_start, **counts}
+                    for period_start, counts in trends.items()
+                ]
             }
         )
 
+    def get_task_stats(self, request):
+        """
+        Returns the TaskStatsDaily rows of the request user, or all rows
+        for staff users.
+        """
+
+        stats = models.TaskStatsDaily.objects.all()
+
+        if not request.user.is_staff:
+            stats = stats.filter(owner=getattr(request.user, 'profile', None))
+
+        return stats
+
+    def get_periods(self, from_date, to_date, period):
+        """
+        Returns the start dates of all the periods (day, week or month)
+        between from_date and to_date, like the database truncates them.
+        """
+
+        if period == 'day':
+            current, step = from_date, relativedelta(days=1)
+
+        elif period == 'week':
+            current = from_date - timezone.timedelta(days=from_date.weekday())
+            step = relativedelta(weeks=1)
+
+        else:
+            current, step = from_date.replace(day=1), relativedelta(months=1)
+
+        periods = []
+        while current <= to_date:
+            periods.append(current)
+            current += step
+
+        return periods
+
+    def get_date_range(self, request, default_days):
+        """
+        Returns the (from, to) dates of the optional ?from= and ?to= query
+        params. Defaults to the last (default_days) days until today.
+        """
+
+        current_date = timezone.now().date()
+        dates = {}
+
+        for param in ['from', 'to']:
+            value = request.query_params.get(param)
+
+            if value is None:
+                dates[param] = None
+                continue
+
+            try:
+                dates[param] = parse_date(value)
+            except ValueError:
+                dates[param] = None
+
+            if dates[param] is None:
+                raise ValidationError(
+                    {
+                        'Error': f'''The '{param}' query param expects a date
+                        (e.g. 2024-02-03)'''
+                    }
+                )
+
+        to_date = dates['to'] or current_date
+        from_date = dates['from'] or \
+            to_date - timezone.timedelta(days=default_days)
+
+        if from_date > to_date:
+            raise ValidationError(
+                {'Error': "The 'from' date cant be after the 'to' date"}
+            )
+
+        return from_date, to_date
+
+    def get_datetime_range(self, from_date, to_date):
+        """
+        Returns the half-open datetime range [start of from_date, start of
+        the day after to_date) in the current time zone.
+        """
+
+        start = timezone.make_aware(
+            timezone.datetime.combine(from_date, timezone.datetime.min.time())
+        )
+        end = timezone.make_aware(
+            timezone.datetime.combine(
+                to_date + timezone.timedelta(days=1),
+                timezone.datetime.min.time()
+            )
+        )
+
+        return start, end
+
     def get_permissions(self):
         """
         Requires specific permissions depending on the view action and
@@ -408,11 +1318,14 @@ class TaskView(ModelViewSet):
         """
 
         if self.action == 'list' or \
-                self.action == 'retrieve':
+                self.action == 'retrieve' or \
+                self.action == 'export':
             permission_classes = [IsAuthenticated]
 
         elif self.action == 'create' or \
-                self.action == 'statistics':
+                self.action == 'bulk' or \
+                self.action == 'tasks_statistics' or \
+                self.action == 'trends':
             permission_classes = [IsAdminUser | permissions.IsTaskManager]
 
         elif self.action == 'update' or \
@@ -423,11 +1336,45 @@ class TaskView(ModelViewSet):
                 IsAdminUser | permissions.IsOwner & permissions.IsTaskManager
             ]
 
+        # Ownership of the tasks is checked by the action itself
+        elif self.action == 'bulk_change_status':
+            permission_classes = [IsAdminUser | permissions.IsTaskManager]
+
+        elif self.action == 'import_tasks':
+            permission_classes = [IsAdminUser]
+
         else:
             permission_classes = []
 
         return [permission() for permission in permission_classes]
 
+    def get_queryset(self):
+        """
+        Restricts the tasks to those in which the request user is a team
+        member, except for staff users. The membership check runs as a
+        subquery so the database only returns the visible rows.
+        """
+
+        queryset = super().get_queryset()
+        user = self.request.user
+
+        if self.action == 'list' or \
+                self.action == 'retrieve' or \
+                self.action == 'export':
+            queryset = self.get_sparse_queryset(queryset)
+
+        if user.is_staff:
+            return queryset
+
+        if not hasattr(user, 'profile'):
+            return queryset.none()
+
+        memberships = models.TaskGroup.team_members.through.objects.filter(
+            userprofile=user.profile
+        ).values('taskgroup_id')
+
+        return queryset.filter(task_group__in=memberships)
+
     def perform_create(self, serializer):
         """Assigns the user's profile to the Task as owner except if staff
         has already submittted an owner."""
@@ -437,12 +1384,16 @@ class TaskView(ModelViewSet):
         return super().perform_create(serializer)
 
 
-class TaskResourceView(ModelViewSet):
+class TaskResourceView(ConditionalGetMixin, SparseFieldsViewMixin,
+                       ModelViewSet):
     """Modelviewset for TaskResource model with basic crud functions."""
 
-    queryset = models.TaskResource.objects.all()
+    # The task is needed for the membership check of every resource
+    queryset = models.TaskResource.objects.select_related('task')
+    sparse_required_fields = ['task__task_group']
+    etag_memberships = True
     serializer_class = serializers.TaskResourceSerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [authentication.CachedTokenAuthentication]
     search_fields = ['source_name', 'id', 'resource_link', 'task']
     ordering_fields = ['task', 'id', 'resource_link']
 
@@ -462,6 +1413,20 @@ class TaskResourceView(ModelViewSet):
 
         return [permission() for permission in permission_classes]
 
+    def get_queryset(self):
+        """
+        Loads only the columns of the requested fields for list and
+        retrieve (see SparseFieldsViewMixin).
+        """
+
+        queryset = super().get_queryset()
+
+        if self.action == 'list' or \
+                self.action == 'retrieve':
+            queryset = self.get_sparse_queryset(queryset)
+
+        return queryset
+
 
 class LoginView(ObtainAuthToken):
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
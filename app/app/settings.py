@@ -39,6 +39,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'api',
@@ -93,6 +94,27 @@ DATABASES = {
         'HOST': os.environ.get('DJANGO_DB_HOST'),
     }
 }
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/ref/settings/#caches
+
+# Shared by all processes, so the lookup versions (api/lookups.py) and the
+# token invalidations (api/authentication.py) reach every worker. The
+# database cache needs its table: python manage.py createcachetable
+# A Redis server can be used instead, e.g.
+# DJANGO_CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# DJANGO_CACHE_LOCATION=redis://redis:6379 (requires the redis package)
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'DJANGO_CACHE_BACKEND',
+            'django.core.cache.backends.db.DatabaseCache'
+        ),
+        'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', 'api_cache'),
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 